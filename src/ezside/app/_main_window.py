@@ -7,6 +7,7 @@ import os
 import sys
 
 from PySide6.QtCore import QMargins, QRectF, QPointF, QSizeF, QSize, Slot
+from PySide6.QtCore import QStandardPaths, QTimer
 from PySide6.QtGui import QColor, QFont, QFontDatabase, QResizeEvent
 from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox
 from icecream import ic
@@ -29,3 +30,25 @@ class MainWindow(LayoutWindow):
     self.imgEdit.contextMenu.selectColor.triggered.connect(
         self.requestColor)
     self.colorSelected.connect(self.imgEdit.setPaintColor)
+    editMenu = self.mainMenuBar.editMenu
+    editMenu.undoAction.triggered.connect(self.imgEdit.undo)
+    editMenu.redoAction.triggered.connect(self.imgEdit.redo)
+    appData = QStandardPaths.writableLocation(
+        QStandardPaths.StandardLocation.AppDataLocation)
+    self.imgEdit.enableAutosave(os.path.join(appData, 'autosave'))
+    self.pulse.connect(self.imgEdit.autosave)
+    QTimer.singleShot(0, self, self.offerRestore)
+
+  @Slot()
+  def offerRestore(self) -> None:
+    """Asks whether to restore the image autosaved by the previous
+    session. If declined, the autosaved image is discarded."""
+    if not self.imgEdit.hasAutosave():
+      return
+    answer = QMessageBox.question(
+        self, 'Restore image',
+        'The previous session ended with unsaved changes. Restore them?')
+    if answer == QMessageBox.StandardButton.Yes:
+      self.imgEdit.restoreSession()
+    else:
+      self.imgEdit.discardAutosave()
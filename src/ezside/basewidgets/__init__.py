@@ -6,7 +6,9 @@ from __future__ import annotations
 
 from ._button_state import ButtonState
 from ._button_style import ButtonStyle
+from ._box_model import BoxModel
 from ._box_widget import BoxWidget
-from ._label import Label, Label
+from ._box_item import BoxItem
+from ._label import LabelModel, Label, LabelItem
 from ._push_button import PushButton
-from ._seven_seg import SevenSeg
+from ._seven_seg import SevenSegModel, SevenSeg, SevenSegItem
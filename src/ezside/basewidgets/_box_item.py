@@ -0,0 +1,62 @@
+"""BoxItem provides a lightweight base class for items painted by the
+layouts in 'ezside.layouts'. The layouts paint their children through
+'paintMeLike' and route mouse events to them directly, so a child never
+needs a QWidget of its own. BoxItem shares the box model of BoxWidget,
+but is a plain Python object, making it cheap to create in the
+thousands."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from PySide6.QtCore import QEvent, QPointF
+from PySide6.QtGui import QMouseEvent, QEnterEvent, QWheelEvent
+
+from ezside.basewidgets import BoxModel
+
+
+class BoxItem(BoxModel):
+  """BoxItem provides a lightweight base class for items painted by the
+  layouts in 'ezside.layouts'. Subclasses implement 'requiredSize' and
+  'paintMeLike' exactly as they would on BoxWidget, and may reimplement
+  the mouse event handlers to receive the events routed by the layout."""
+
+  def update(self, *args) -> None:
+    """Requests the parent layout to repaint this item. A rectangle or
+    region received is understood relative to the top left corner of
+    this item. Before the item is added to a layout, nothing happens."""
+    self.requestLayoutRepaint(*args)
+
+  def enterEvent(self, event: QEnterEvent) -> None:
+    """Called by the layout when the cursor enters the item."""
+
+  def leaveEvent(self, event: QEvent) -> None:
+    """Called by the layout when the cursor leaves the item."""
+
+  def mouseMoveEvent(self, event: QMouseEvent) -> None:
+    """Called by the layout when the cursor moves over the item. The
+    position is relative to the top left corner of the item."""
+
+  def mouseMoveAt(self, point: QPointF, event: QMouseEvent) -> None:
+    """Reimplementation creating no event unless a subclass reimplements
+    'mouseMoveEvent'."""
+    if type(self).mouseMoveEvent is not BoxItem.mouseMoveEvent:
+      BoxModel.mouseMoveAt(self, point, event)
+
+  def mousePressEvent(self, event: QMouseEvent) -> None:
+    """Called by the layout when a mouse button is pressed over the
+    item."""
+
+  def mouseReleaseEvent(self, event: QMouseEvent) -> None:
+    """Called by the layout when a mouse button is released over the
+    item."""
+
+  def wheelEvent(self, event: QWheelEvent) -> None:
+    """Called by the layout when the wheel is turned over the item. The
+    event is ignored, like QWidget does, such that the layout may use
+    it."""
+    event.ignore()
+
+  def __init__(self, *args) -> None:
+    for arg in args:
+      if type(arg).__name__ == 'AbstractLayout':
+        self.parentLayout = arg
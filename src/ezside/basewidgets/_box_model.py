@@ -0,0 +1,228 @@
+"""BoxModel provides the box model shared by BoxWidget and BoxItem. It
+holds the margins, borders and paddings, the colors painted on them, the
+size rule and stretch weight read by the layouts, the reference to the
+parent layout, and the cached required size. Subclasses decide what
+happens when the box model changes and how repaints are requested when
+no layout paints them."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from typing import TypeAlias, Union, Optional, TYPE_CHECKING
+
+from PySide6.QtCore import QRect, QRectF, QSizeF, QSize, QPointF, QMarginsF
+from PySide6.QtCore import QEvent
+from PySide6.QtGui import QPainter, QColor, QBrush, QRegion, QMouseEvent
+from PySide6.QtWidgets import QWidget
+from worktoy.desc import AttriBox, Field
+from worktoy.text import typeMsg
+
+from ezside.tools import fillBrush, emptyPen, SizeRule, MarginsBox, ColorBox
+
+if TYPE_CHECKING:
+  from ezside.layouts import AbstractLayout, LayoutItem
+
+Rect: TypeAlias = Union[QRect, QRectF]
+
+
+class BoxModel:
+  """BoxModel provides the box model shared by BoxWidget and BoxItem.
+  Subclasses must implement 'update'. """
+
+  __parent_layout__ = None
+  __parent_layout_item__ = None
+  __required_size__ = None
+  __size_cache_hits__ = 0
+  __size_cache_misses__ = 0
+
+  margins = MarginsBox(0)
+  paddings = MarginsBox(0)
+  borders = MarginsBox(0)
+  allMargins = Field()
+  sizeRule = AttriBox[SizeRule](SizeRule.PREFER)
+  stretch = AttriBox[float](1.)
+  borderColor = ColorBox(QColor(0, 0, 0, 255))
+  backgroundColor = ColorBox(QColor(255, 255, 255, 255))
+  borderBrush = Field()
+  backgroundBrush = Field()
+  parentLayout = Field()
+  parentLayoutItem = Field()
+  sizeCacheHits = Field()
+  sizeCacheMisses = Field()
+
+  @sizeCacheHits.GET
+  def _getSizeCacheHits(self) -> int:
+    """Getter-function for the number of times 'getRequiredSize' returned
+    the cached size."""
+    return self.__size_cache_hits__
+
+  @sizeCacheMisses.GET
+  def _getSizeCacheMisses(self) -> int:
+    """Getter-function for the number of times 'getRequiredSize' had to
+    compute the required size."""
+    return self.__size_cache_misses__
+
+  @parentLayoutItem.GET
+  def _getParentLayoutItem(self) -> LayoutItem:
+    """Getter-function for the layout item on the parent layout that
+    contains this box."""
+    return self.__parent_layout_item__
+
+  @parentLayoutItem.SET
+  def _setParentLayoutItem(self, item: LayoutItem) -> None:
+    """Setter-function for the layout item on the parent layout that
+    contains this box."""
+    self.__parent_layout_item__ = item
+
+  @parentLayout.GET
+  def _getParentLayout(self) -> Optional[AbstractLayout]:
+    """Getter-function for the parentLayout."""
+    return self.__parent_layout__
+
+  @parentLayout.SET
+  def _setParentLayout(self, parentLayout: AbstractLayout) -> None:
+    """Setter-function for the parentLayout. Setting None detaches the
+    box from its layout."""
+    if parentLayout is None:
+      self.__parent_layout__ = None
+      return
+    if not isinstance(parentLayout, QWidget):
+      e = typeMsg('parentLayout', parentLayout, QWidget)
+      raise TypeError(e)
+    self.__parent_layout__ = parentLayout
+
+  @allMargins.GET
+  def _getAllMargins(self) -> QMarginsF:
+    """Getter-function for the allMargins."""
+    return self.margins + self.paddings + self.borders
+
+  @borderBrush.GET
+  def _getBorderBrush(self) -> QBrush:
+    """Getter-function for the borderBrush."""
+    return fillBrush(self.borderColor, )
+
+  @backgroundBrush.GET
+  def _getBackgroundBrush(self) -> QBrush:
+    """Getter-function for the backgroundBrush."""
+    return fillBrush(self.backgroundColor, )
+
+  @margins.ONSET
+  @borders.ONSET
+  @paddings.ONSET
+  def _updateBoxModel(self,
+                      oldVal: MarginsBox,
+                      newVal: MarginsBox) -> None:
+    """Setter-hook for changes to the box model."""
+    if oldVal != newVal:
+      self.applyBoxModel()
+
+  @sizeRule.ONSET
+  def _updateSizeRule(self, oldRule: SizeRule, newRule: SizeRule) -> None:
+    """Setter-hook for changes to the size rule. """
+    if oldRule != newRule:
+      self.applySizeRule(newRule)
+
+  @stretch.ONSET
+  def _updateStretch(self, oldVal: float, newVal: float) -> None:
+    """Setter-hook for changes to the stretch weight, which affects only
+    the parent layout."""
+    if oldVal != newVal and self.parentLayout is not None:
+      self.parentLayout.invalidateSize()
+
+  def applyBoxModel(self) -> None:
+    """Called after the margins, borders or paddings change. Subclasses
+    may reimplement this method, but should invalidate the required size
+    and repaint."""
+    self.invalidateSize()
+    self.update()
+
+  def applySizeRule(self, rule: SizeRule) -> None:
+    """Called after the size rule changes. The rule affects only the
+    parent layout."""
+    if self.parentLayout is not None:
+      self.parentLayout.invalidateSize()
+
+  def requestLayoutRepaint(self, *args) -> bool:
+    """Requests the parent layout to repaint this box. A rectangle or
+    region received is understood relative to the top left corner of the
+    box. Returns False if no layout paints the box."""
+    if self.parentLayout is None or self.parentLayoutItem is None:
+      return False
+    rect = None
+    if len(args) == 4:
+      rect = QRect(*args)
+    elif args and isinstance(args[0], QRegion):
+      rect = args[0].boundingRect()
+    elif args and isinstance(args[0], (QRect, QRectF)):
+      rect = args[0]
+    self.parentLayout.requestRepaint(self.parentLayoutItem, rect)
+    return True
+
+  def mouseMoveAt(self, point: QPointF, event: QMouseEvent) -> None:
+    """Called by the layouts when the cursor moves over the box, with the
+    position relative to the top left corner of the box and the event
+    received by the layout. This implementation passes a translated copy
+    of the event to 'mouseMoveEvent'. Boxes needing only the position
+    should reimplement this method instead, as no event is then created
+    for each move."""
+    buttons, modifiers = event.buttons(), event.modifiers()
+    self.mouseMoveEvent(QMouseEvent(QEvent.Type.MouseMove, point, buttons,
+                                    buttons, modifiers))
+
+  def invalidateSize(self) -> None:
+    """Clears the cached required size and informs the parent layout,
+    if any, that the required size of this box may have changed.
+    Subclasses must call this method whenever a change affects the value
+    returned by 'requiredSize'. """
+    self.__required_size__ = None
+    if self.parentLayout is not None:
+      self.parentLayout.invalidateSize()
+
+  def getRequiredSize(self) -> QSizeF:
+    """Returns the size given by 'requiredSize'. The size is computed only
+    once and then cached until 'invalidateSize' is called. Callers should
+    use this method rather than calling 'requiredSize' directly."""
+    if self.__required_size__ is None:
+      self.__size_cache_misses__ += 1
+      size = self.requiredSize()
+      if isinstance(size, QSize):
+        size = QSize.toSizeF(size)
+      if not isinstance(size, QSizeF):
+        e = typeMsg('requiredSize', size, QSizeF)
+        raise TypeError(e)
+      self.__required_size__ = size
+    else:
+      self.__size_cache_hits__ += 1
+    return QSizeF(self.__required_size__)
+
+  def requiredSize(self) -> QSizeF:
+    """Subclasses may implement this method to define minimum size
+    requirements. """
+    return QSizeF(0, 0)
+
+  def requiredRect(self) -> QRectF:
+    """This method returns the required rectangle to bound the current
+    box."""
+    size = self.getRequiredSize()
+    return QRectF(QPointF(0, 0), size)
+
+  def paintMeLike(self, rect: Rect, painter: QPainter) -> None:
+    """Subclasses should implement this method to specify how to paint
+    them. When used in a layout from 'ezside.layouts', only this method
+    can specify painting, as QWidget.paintEvent will not be called.
+
+    The painter and rectangle passed are managed by the layout and boxes
+    are expected to draw only inside the given rect. The layout ensures
+    that this rect is at least the exact size specified by the
+    'requiredSize' method on this box. """
+    viewRect = rect if isinstance(rect, QRectF) else QRect.toRectF(rect)
+    center = viewRect.center()
+    marginRect = QRectF.marginsRemoved(viewRect, self.margins)
+    borderRect = QRectF.marginsRemoved(marginRect, self.borders)
+    marginRect.moveCenter(center)
+    borderRect.moveCenter(center)
+    painter.setPen(emptyPen())
+    painter.setBrush(self.borderBrush)
+    painter.drawRect(marginRect)
+    painter.setBrush(self.backgroundBrush)
+    painter.drawRect(borderRect)
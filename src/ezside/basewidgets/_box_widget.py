@@ -5,81 +5,34 @@ a background that supports the box model."""
 #  Copyright (c) 2024 Asger Jon Vistisen
 from __future__ import annotations
 
-from typing import TypeAlias, Union, Optional, TYPE_CHECKING
+from typing import Optional
 
-from PySide6.QtCore import QRect, QRectF, QSizeF, QSize, QPointF, QMarginsF
-from PySide6.QtGui import QPainter, QColor, QBrush
+from PySide6.QtCore import QRectF, QSizeF, QSize, QPointF
+from PySide6.QtGui import QMouseEvent
 from PySide6.QtWidgets import QWidget, QMainWindow
 from icecream import ic
 from worktoy.desc import AttriBox, Field
 from worktoy.text import monoSpace, typeMsg
 
-from ezside.tools import fillBrush, emptyPen, SizeRule, MarginsBox, ColorBox
-
-if TYPE_CHECKING:
-  from ezside.layouts import AbstractLayout, LayoutItem
-
-Rect: TypeAlias = Union[QRect, QRectF]
+from ezside.tools import SizeRule
+from ezside.basewidgets import BoxModel
 
 ic.configureOutput(includeContext=True)
 
 
-class BoxWidget(QWidget):
+class BoxWidget(BoxModel, QWidget):
   """BoxWidget provides a base class for other basewidgets that need to
   paint on
   a background that supports the box model."""
 
   __suppress_notifiers__ = None
   __parent_widget__ = None
-  __parent_layout__ = None
-  __parent_layout_item__ = None
   __main_window__ = None
 
-  margins = MarginsBox(0)
-  paddings = MarginsBox(0)
-  borders = MarginsBox(0)
-  allMargins = Field()
-  sizeRule = AttriBox[SizeRule](SizeRule.PREFER)
   aspectRatio = AttriBox[float](-1)  # -1 means ignore
-  borderColor = ColorBox(QColor(0, 0, 0, 255))
-  backgroundColor = ColorBox(QColor(255, 255, 255, 255))
-  borderBrush = Field()
-  backgroundBrush = Field()
   parentWidget = Field()
-  parentLayout = Field()
-  parentLayoutItem = Field()
   mainWindow = Field()
 
-  @parentLayoutItem.GET
-  def _getParentLayoutItem(self) -> LayoutItem:
-    """Getter-function for the layout item on the parent layout that
-    contains this widget."""
-    return self.__parent_layout_item__
-
-  @parentLayoutItem.SET
-  def _setParentLayoutItem(self, item: LayoutItem) -> None:
-    """Setter-function for the layout item on the parent layout that
-    contains this widget."""
-    self.__parent_layout_item__ = item
-
-  @parentLayout.GET
-  def _getParentLayout(self) -> Optional[AbstractLayout]:
-    """Getter-function for the parentLayout."""
-    return self.__parent_layout__
-
-  @parentLayout.SET
-  def _setParentLayout(self, parentLayout: AbstractLayout) -> None:
-    """Setter-function for the parentLayout."""
-    if not isinstance(parentLayout, QWidget):
-      e = typeMsg('parentLayout', parentLayout, QWidget)
-      raise TypeError(e)
-    self.__parent_layout__ = parentLayout
-
-  @allMargins.GET
-  def _getAllMargins(self) -> QMarginsF:
-    """Getter-function for the allMargins."""
-    return self.margins + self.paddings + self.borders
-
   @parentWidget.GET
   def _getParentWidget(self) -> Optional[QWidget]:
     """Getter-function for the parentWidget."""
@@ -106,16 +59,6 @@ class BoxWidget(QWidget):
       raise TypeError(e)
     self.__main_window__ = mainWindow
 
-  @borderBrush.GET
-  def _getBorderBrush(self) -> QBrush:
-    """Getter-function for the borderBrush."""
-    return fillBrush(self.borderColor, )
-
-  @backgroundBrush.GET
-  def _getBackgroundBrush(self) -> QBrush:
-    """Getter-function for the backgroundBrush."""
-    return fillBrush(self.backgroundColor, )
-
   def resize(self, *args) -> None:
     """Reimplementation enforcing aspect ratio. """
     if self.aspectRatio >= 0 and not self.sizeRule.base:
@@ -134,65 +77,41 @@ class BoxWidget(QWidget):
       newSize = QSize(width, width / self.aspectRatio)
     QWidget.resize(self, newSize)
 
-  @margins.ONSET
-  @borders.ONSET
-  @paddings.ONSET
-  def _updateBoxModel(self,
-                      oldVal: MarginsBox,
-                      newVal: MarginsBox) -> None:
-    """Setter-hook for changes to the box model."""
-    if oldVal != newVal:
-      self.adjustSize()
-      self.update()
-
-  @sizeRule.ONSET
-  def _updateSizeRule(self, oldRule: SizeRule, newRule: SizeRule) -> None:
-    """Setter-hook for changes to the size rule. """
-    if oldRule != newRule:
-      QWidget.setSizePolicy(self, newRule.qt)
-      self.adjustSize()
-      self.update()
-
-  def requiredSize(self) -> QSizeF:
-    """Subclasses may implement this method to define minimum size
-    requirements. """
-    return QSizeF(0, 0)
-
-  def requiredRect(self) -> QRectF:
-    """This method returns the required rectangle to bound the current
+  def applyBoxModel(self) -> None:
+    """Reimplementation adjusting the size of the widget to the new box
+    model."""
+    self.invalidateSize()
+    self.adjustSize()
+    self.update()
+
+  def applySizeRule(self, rule: SizeRule) -> None:
+    """Reimplementation applying the size rule as the size policy of the
     widget."""
-    size = self.requiredSize()
-    return QRectF(QPointF(0, 0), size)
+    QWidget.setSizePolicy(self, rule.qt)
+    BoxModel.applySizeRule(self, rule)
+    self.adjustSize()
+    self.update()
+
+  def update(self, *args) -> None:
+    """Reimplementation routing repaint requests through the parent
+    layout, if any. Since the layout paints this widget, only the
+    rectangle occupied by this widget in the layout is repainted. A
+    rectangle or region received is understood relative to the top left
+    corner of this widget."""
+    if not self.requestLayoutRepaint(*args):
+      QWidget.update(self, *args)
+
+  def mouseMoveAt(self, point: QPointF, event: QMouseEvent) -> None:
+    """Reimplementation creating no event unless a subclass reimplements
+    'mouseMoveEvent'."""
+    if type(self).mouseMoveEvent is not QWidget.mouseMoveEvent:
+      BoxModel.mouseMoveAt(self, point, event)
 
   def minimumSizeHint(self) -> QSize:
     """This method returns the size hint of the widget."""
-    rect = QRectF(QPointF(0, 0), self.requiredSize()) + self.allMargins
+    rect = QRectF(QPointF(0, 0), self.getRequiredSize()) + self.allMargins
     return QRectF.toRect(rect, ).size()
 
-  def paintMeLike(self, rect: Rect, painter: QPainter) -> None:
-    """Subclasses should implement this method to specify how to paint
-    them. When used in a layout from 'ezside.layouts', only this method
-    can specify painting, as QWidget.paintEvent will not be called.
-
-    The painter and rectangle passed are managed by the layout and
-    basewidgets
-    are expected to draw only inside the given rect. The layout ensures
-    that this rect is at least the exact size specified by the
-    'requiredSize' method on this widget. """
-    viewRect = rect if isinstance(rect, QRectF) else QRect.toRectF(rect)
-    center = viewRect.center()
-    marginRect = QRectF.marginsRemoved(viewRect, self.margins)
-    borderRect = QRectF.marginsRemoved(marginRect, self.borders)
-    paddedRect = QRectF.marginsRemoved(borderRect, self.paddings)
-    marginRect.moveCenter(center)
-    borderRect.moveCenter(center)
-    paddedRect.moveCenter(center)
-    painter.setPen(emptyPen())
-    painter.setBrush(self.borderBrush)
-    painter.drawRect(marginRect)
-    painter.setBrush(self.backgroundBrush)
-    painter.drawRect(borderRect)
-
   def __init__(self, *args) -> None:
     for arg in args:
       if isinstance(arg, QMainWindow):
@@ -1,10 +1,16 @@
-"""ButtonStyle provides a data loading class for state aware buttons."""
+"""ButtonStyle provides a data loading class for state aware buttons. The
+style file is read once per process and compiled into a table mapping
+each ButtonState to a ButtonStyle holding precomputed margins, colors and
+brushes. The getters return copies, so changing a value returned does
+not change the style of any other button."""
 #  AGPL-3.0 license
 #  Copyright (c) 2024 Asger Jon Vistisen
 from __future__ import annotations
 
 import json
 import os.path
+from typing import TYPE_CHECKING
+from weakref import WeakSet
 
 from worktoy.desc import Field
 from worktoy.meta import BaseObject
@@ -12,6 +18,12 @@ from PySide6.QtCore import QMarginsF, Qt
 from PySide6.QtGui import QColor, QBrush
 from icecream import ic
 
+from ezside.tools import fillBrush
+from ezside.basewidgets import ButtonState
+
+if TYPE_CHECKING:
+  from ezside.basewidgets import PushButton
+
 ic.configureOutput(includeContext=True)
 
 
@@ -20,8 +32,11 @@ class ButtonStyle(BaseObject):
 
   __file_name__ = 'button_style.json'
   __style_data__ = None
+  __style_table__ = None
   __able_key__ = None
   __mouse_key__ = None
+  __compiled_values__ = None
+  __live_buttons__ = WeakSet()
 
   paddings = Field()
   margins = Field()
@@ -37,23 +52,69 @@ class ButtonStyle(BaseObject):
     BaseObject.__init__(self)
     self.__able_key__ = ableKey
     self.__mouse_key__ = mouseKey
+    self._compileValues()
 
   @classmethod
   def loadStyle(cls) -> dict:
     """Loads the style for the push button."""
-    here = os.path.normpath(os.path.abspath(os.path.dirname(__file__)))
-    fid = os.path.join(here, cls.__file_name__)
+    fid = cls.__file_name__
+    if not os.path.isabs(fid):
+      here = os.path.normpath(os.path.abspath(os.path.dirname(__file__)))
+      fid = os.path.join(here, fid)
     with open(fid, 'r') as file:
       return json.loads(file.read())
 
-  def getStyleData(self, **kwargs) -> dict:
-    """Returns the style data for the push button."""
-    if self.__style_data__ is None:
+  @classmethod
+  def getStyleData(cls, **kwargs) -> dict:
+    """Returns the style data for the push button. The file is read only
+    once per process."""
+    if cls.__style_data__ is None:
       if kwargs.get('_recursion', False):
         raise RecursionError
-      self.__style_data__ = self.loadStyle()
-      return self.getStyleData(_recursion=True)
-    return self.__style_data__
+      cls.__style_data__ = cls.loadStyle()
+      return cls.getStyleData(_recursion=True)
+    return cls.__style_data__
+
+  @classmethod
+  def _createStyleTable(cls) -> None:
+    """Compiles the style of every button state."""
+    cls.__style_table__ = {
+        ButtonState.DISABLED_HOVER   : cls('disabled', 'hover'),
+        ButtonState.DISABLED_RELEASED: cls('disabled', 'released'),
+        ButtonState.DISABLED_PRESSED : cls('disabled', 'pressed'),
+        ButtonState.ENABLED_HOVER    : cls('enabled', 'hover'),
+        ButtonState.ENABLED_RELEASED : cls('enabled', 'released'),
+        ButtonState.ENABLED_PRESSED  : cls('enabled', 'pressed'),
+    }
+
+  @classmethod
+  def getStyleTable(cls, **kwargs) -> dict[ButtonState, ButtonStyle]:
+    """Returns the table of compiled styles shared by every button. The
+    table is compiled at first use."""
+    if cls.__style_table__ is None:
+      if kwargs.get('_recursion', False):
+        raise RecursionError
+      cls._createStyleTable()
+      return cls.getStyleTable(_recursion=True)
+    return cls.__style_table__
+
+  @classmethod
+  def reloadStyles(cls, fid: str = None) -> None:
+    """Discards the compiled styles, such that the next access reads the
+    style file again. If a file name is given, styles are read from it
+    instead. Every registered button is repainted with the new styles."""
+    if fid is not None:
+      cls.__file_name__ = fid
+    cls.__style_data__ = None
+    cls.__style_table__ = None
+    for button in [*cls.__live_buttons__, ]:
+      button.update()
+
+  @classmethod
+  def registerButton(cls, button: PushButton) -> None:
+    """Registers the button to be repainted when the styles are
+    reloaded. Only a weak reference to the button is kept."""
+    cls.__live_buttons__.add(button)
 
   def getStateStyle(self, ) -> dict[str, dict]:
     """Returns the padding for the button state."""
@@ -117,43 +178,61 @@ class ButtonStyle(BaseObject):
     values = self._loadInts(*values, data.get('a', 255))
     return QColor(*values, )
 
+  def _compileValues(self) -> None:
+    """Converts the style data of this state to Qt objects once."""
+    margins = self._loadMargins('margins')
+    borders = self._loadMargins('borders')
+    paddings = self._loadMargins('paddings')
+    backgroundColor = self._loadColors('backgroundColor')
+    borderColor = self._loadColors('borderColor')
+    self.__compiled_values__ = {
+        'margins'        : margins,
+        'borders'        : borders,
+        'paddings'       : paddings,
+        'allMargins'     : margins + borders + paddings,
+        'backgroundColor': backgroundColor,
+        'borderColor'    : borderColor,
+        'backgroundBrush': fillBrush(backgroundColor),
+        'borderBrush'    : fillBrush(borderColor),
+    }
+
   @margins.GET
   def getStateMargins(self) -> QMarginsF:
     """Returns the margins for the button state."""
-    return self._loadMargins('margins')
+    return QMarginsF(self.__compiled_values__['margins'])
 
   @borders.GET
   def getStateBorders(self) -> QMarginsF:
     """Returns the borders for the button state."""
-    return self._loadMargins('borders')
+    return QMarginsF(self.__compiled_values__['borders'])
 
   @paddings.GET
   def getStatePaddings(self) -> QMarginsF:
     """Returns the paddings for the button state."""
-    return self._loadMargins('paddings')
+    return QMarginsF(self.__compiled_values__['paddings'])
+
+  @allMargins.GET
+  def getStateAllMargins(self) -> QMarginsF:
+    """Returns the sum of margins, borders and paddings for the button
+    state."""
+    return QMarginsF(self.__compiled_values__['allMargins'])
 
   @backgroundColor.GET
   def getStateBackgroundColor(self) -> QColor:
     """Returns the background color for the button state."""
-    return self._loadColors('backgroundColor')
+    return QColor(self.__compiled_values__['backgroundColor'])
 
   @borderColor.GET
   def getStateBorderColor(self) -> QColor:
     """Returns the border color for the button state."""
-    return self._loadColors('borderColor')
+    return QColor(self.__compiled_values__['borderColor'])
 
   @borderBrush.GET
   def getBorderBrush(self) -> QBrush:
     """Returns the border brush for the button state."""
-    brush = QBrush()
-    brush.setStyle(Qt.BrushStyle.SolidPattern)
-    brush.setColor(self.borderColor)
-    return brush
+    return QBrush(self.__compiled_values__['borderBrush'])
 
   @backgroundBrush.GET
   def getBackgroundBrush(self) -> QBrush:
     """Returns the background brush for the button state."""
-    brush = QBrush()
-    brush.setStyle(Qt.BrushStyle.SolidPattern)
-    brush.setColor(self.backgroundColor)
-    return brush
+    return QBrush(self.__compiled_values__['backgroundBrush'])
@@ -1,4 +1,7 @@
-"""Label provides a property driven alternative to QLabel. """
+"""Label provides a property driven alternative to QLabel. LabelItem
+paints the same label as a lightweight item for the layouts in
+'ezside.layouts'. Both share the text, font and painting of
+LabelModel."""
 #  AGPL-3.0 license
 #  Copyright (c) 2024 Asger Jon Vistisen
 from __future__ import annotations
@@ -9,13 +12,14 @@ from icecream import ic
 from worktoy.desc import AttriBox
 
 from ezside.tools import Font, FontFamily, FontCap, emptyPen
-from ezside.basewidgets import BoxWidget
+from ezside.basewidgets import BoxModel, BoxWidget, BoxItem
 
 ic.configureOutput(includeContext=True)
 
 
-class Label(BoxWidget):
-  """Label provides a property driven alternative to QLabel. """
+class LabelModel(BoxModel):
+  """LabelModel provides the text, font and painting shared by Label and
+  LabelItem. """
 
   margins: QMarginsF
   borders: QMarginsF
@@ -27,6 +31,28 @@ class Label(BoxWidget):
   textFont = AttriBox[Font](16, FontFamily.MONTSERRAT, FontCap.MIX)
   text = AttriBox[str]()
 
+  @text.ONSET
+  def _updateText(self, oldVal: str, newVal: str) -> None:
+    """Setter-hook for changes to the text."""
+    if oldVal != newVal:
+      self.invalidateSize()
+
+  @textFont.ONSET
+  def _updateFont(self, oldFont: Font, newFont: Font) -> None:
+    """Setter-hook for replacing the font. Changes made to the font
+    itself are received by '_fontChanged'."""
+    if isinstance(oldFont, Font):
+      oldFont.removeChangeCallback(self._fontChanged)
+    newFont.addChangeCallback(self._fontChanged)
+    if oldFont != newFont:
+      self.invalidateSize()
+
+  def _fontChanged(self, resized: bool) -> None:
+    """Called after a setting on the current font changes."""
+    if resized:
+      self.invalidateSize()
+    self.update()
+
   def requiredSize(self) -> QSizeF:
     """The required size to show the current text with the current font."""
     return self.requiredRect().size()
@@ -37,11 +63,6 @@ class Label(BoxWidget):
     size = rect.size()
     return QRectF(QPointF(0, 0), size)
 
-  def minimumSizeHint(self) -> QSize:
-    """The minimum size hint to show the current text with the current
-    font."""
-    return QSize(0, 0)
-
   def paintMeLike(self, rect: QRectF, painter: QPainter) -> None:
     """Paints the label with the current text and font."""
     viewRect = rect
@@ -59,11 +80,12 @@ class Label(BoxWidget):
     painter.drawRect(borderRect)
     painter.setPen(self.textFont.asQPen)
     painter.setFont(self.textFont.asQFont)
-    textRect = self.textFont.align.fitRectF(self.requiredRect(), paddedRect)
+    reqRect = QRectF(QPointF(0, 0), self.getRequiredSize())
+    textRect = self.textFont.align.fitRectF(reqRect, paddedRect)
     painter.drawText(textRect, self.textFont.align.qt, self.text)
 
   def __init__(self, *args) -> None:
-    BoxWidget.__init__(self)
+    self.textFont.addChangeCallback(self._fontChanged)
     for arg in args:
       if isinstance(arg, str):
         self.text = arg
@@ -73,3 +95,25 @@ class Label(BoxWidget):
     self.paddings = QMarginsF(8, 1, 8, 1)
     self.borders = QMarginsF(2, 2, 2, 2, )
     self.margins = QMarginsF(2, 2, 2, 2, )
+
+
+class Label(LabelModel, BoxWidget):
+  """Label provides a property driven alternative to QLabel. """
+
+  def minimumSizeHint(self) -> QSize:
+    """The minimum size hint to show the current text with the current
+    font."""
+    return QSize(0, 0)
+
+  def __init__(self, *args) -> None:
+    BoxWidget.__init__(self)
+    LabelModel.__init__(self, *args)
+
+
+class LabelItem(LabelModel, BoxItem):
+  """LabelItem paints a label as a lightweight item for the layouts in
+  'ezside.layouts'. """
+
+  def __init__(self, *args) -> None:
+    BoxItem.__init__(self)
+    LabelModel.__init__(self, *args)
@@ -18,8 +18,6 @@ ic.configureOutput(includeContext=True)
 class PushButton(Label):
   """This class provides the state awareness of a push button. """
 
-  __style_data__ = None
-
   __is_active__ = True
   __under_mouse__ = None
   __mouse_pressed__ = None
@@ -48,17 +46,6 @@ class PushButton(Label):
   leftClick = Signal()
   rightClick = Signal()
 
-  def _createStyleData(self) -> None:
-    """Creates the style data for the push button."""
-    self.__style_data__ = {
-        ButtonState.DISABLED_HOVER   : ButtonStyle('disabled', 'hover'),
-        ButtonState.DISABLED_RELEASED: ButtonStyle('disabled', 'released'),
-        ButtonState.DISABLED_PRESSED : ButtonStyle('disabled', 'pressed'),
-        ButtonState.ENABLED_HOVER    : ButtonStyle('enabled', 'hover'),
-        ButtonState.ENABLED_RELEASED : ButtonStyle('enabled', 'released'),
-        ButtonState.ENABLED_PRESSED  : ButtonStyle('enabled', 'pressed'),
-    }
-
   @x.GET
   def _getX(self) -> float:
     """Getter-function for the x-coordinate."""
@@ -105,14 +92,10 @@ class PushButton(Label):
     return True if self.__mouse_pressed__ else False
 
   @styleData.GET
-  def _getStyleData(self, **kwargs) -> dict:
-    """Returns the style data for the push button."""
-    if self.__style_data__ is None:
-      if kwargs.get('_recursion', False):
-        raise RecursionError
-      self._createStyleData()
-      return self._getStyleData(_recursion=True)
-    return self.__style_data__
+  def _getStyleData(self, ) -> dict:
+    """Returns the style data for the push button. The table is compiled
+    once and shared by every push button."""
+    return ButtonStyle.getStyleTable()
 
   @state.GET
   def _getState(self) -> ButtonState:
@@ -130,35 +113,38 @@ class PushButton(Label):
     return ButtonState.ENABLED_RELEASED
 
   @style.GET
-  def _getStyle(self) -> dict:
+  def _getStyle(self) -> ButtonStyle:
     """Returns the style for the push button."""
     return self.styleData[self.state]
 
   def paintMeLike(self, rect: QRectF, painter: QPainter) -> None:
     """Paints the push button."""
+    style = self.style
     viewRect = rect
     center = viewRect.center()
-    marginRect = QRectF.marginsRemoved(viewRect, self.style.margins)
-    borderRect = QRectF.marginsRemoved(marginRect, self.style.borders)
-    paddedRect = QRectF.marginsRemoved(borderRect, self.style.paddings)
+    marginRect = QRectF.marginsRemoved(viewRect, style.margins)
+    borderRect = QRectF.marginsRemoved(marginRect, style.borders)
+    paddedRect = QRectF.marginsRemoved(borderRect, style.paddings)
     marginRect.moveCenter(center)
     borderRect.moveCenter(center)
     paddedRect.moveCenter(center)
     self.__mouse_region__ = paddedRect
     painter.setPen(emptyPen())
-    painter.setBrush(self.style.borderBrush)
+    painter.setBrush(style.borderBrush)
     painter.drawRect(marginRect)
-    painter.setBrush(self.style.backgroundBrush)
+    painter.setBrush(style.backgroundBrush)
     painter.drawRect(borderRect)
     painter.setPen(self.textFont.asQPen)
     painter.setFont(self.textFont.asQFont)
-    textRect = self.textFont.align.fitRectF(self.requiredRect(), paddedRect)
+    reqRect = QRectF(QPointF(0, 0), self.getRequiredSize())
+    textRect = self.textFont.align.fitRectF(reqRect, paddedRect)
     painter.drawText(textRect, self.textFont.align.qt, self.text)
 
   def __init__(self, *args) -> None:
     """Initializes the push button."""
     Label.__init__(self, *args)
     self.setMouseTracking(True)
+    ButtonStyle.registerButton(self)
 
   def enterEvent(self, event: QEnterEvent) -> None:
     """Event handler for when the mouse enters the widget."""
@@ -184,6 +170,13 @@ class PushButton(Label):
     self.__cursor_position__ = event.pos()
     self.update()
 
+  def mouseMoveAt(self, point: QPointF, event: QMouseEvent) -> None:
+    """Reimplementation updating the cursor position directly when the
+    cursor moves over the button in a layout."""
+    self.__under_mouse__ = True
+    self.__cursor_position__ = point
+    self.update()
+
   def mousePressEvent(self, event: QMouseEvent) -> None:
     """Event handler for when the mouse is pressed over the widget."""
     Label.mousePressEvent(self, event)
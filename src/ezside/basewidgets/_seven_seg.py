@@ -1,4 +1,7 @@
-"""SevenSeg provides a widget representation of a seven segment display."""
+"""SevenSeg provides a widget representation of a seven segment display.
+SevenSegItem paints the same display as a lightweight item for the
+layouts in 'ezside.layouts'. Both share the segments and painting of
+SevenSegModel."""
 #  AGPL-3.0 license
 #  Copyright (c) 2024 Asger Jon Vistisen
 from __future__ import annotations
@@ -14,7 +17,7 @@ from worktoy.keenum import KeeNum, auto
 from worktoy.parse import maybe
 
 from ezside.tools import emptyBrush, parsePen, fillBrush
-from ezside.basewidgets import BoxWidget
+from ezside.basewidgets import BoxModel, BoxWidget, BoxItem
 
 Size: TypeAlias = Union[QSize, QSizeF]
 Point: TypeAlias = Union[QPoint, QPointF]
@@ -74,8 +77,9 @@ SegSize: TypeAlias = dict[Segment, QSize]
 SegRect: TypeAlias = dict[Segment, QRect]
 
 
-class SevenSeg(BoxWidget):
-  """SevenSeg provides a widget representation of a seven segment display."""
+class SevenSegModel(BoxModel):
+  """SevenSegModel provides the segments and painting shared by SevenSeg
+  and SevenSegItem."""
 
   __fallback_digit__ = 0
   __current_digit__ = None
@@ -230,3 +234,12 @@ class SevenSeg(BoxWidget):
       else:
         painter.setBrush(self.lowBrush)
       painter.drawRect(rect)
+
+
+class SevenSeg(SevenSegModel, BoxWidget):
+  """SevenSeg provides a widget representation of a seven segment display."""
+
+
+class SevenSegItem(SevenSegModel, BoxItem):
+  """SevenSegItem paints a seven segment display as a lightweight item for
+  the layouts in 'ezside.layouts'."""
@@ -0,0 +1,22 @@
+"""The 'ezside.imaging' module provides image editing operations acting
+directly on numpy arrays. These do not depend on widgets and operate on
+whole array slices rather than individual pixels. """
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from ._brush_mask import brushMask
+from ._blend_kernels import BlendKernel, registerBlendMode, getBlendKernel
+from ._blend_kernels import getBlendModes, separableKernel, blend
+from ._blend_kernels import benchmarkBlendModes, formatBenchmark
+from ._pixel_buffer import PixelBuffer
+from ._tiled_image import TiledImage
+from ._brush_stroke import dabBox, stampDab, BrushStroke
+from ._mip_pyramid import MipPyramid
+from ._undo_stack import UndoStack
+from ._image_job import ImageJobSignals, OpenImageJob, SaveImageJob
+from ._image_ops import ImageOp, Resize, Fill, StrokeReplay, ColorBlend
+from ._pipeline import Pipeline
+from ._stroke_log import StrokeRecord, StrokeInfo, StrokeLog
+from ._layer_stack import Layer, LayerStack
+from ._autosave_journal import AutosaveJournal
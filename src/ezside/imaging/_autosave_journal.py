@@ -0,0 +1,453 @@
+"""AutosaveJournal keeps a copy of the layers being edited on disk without
+encoding the whole image at every checkpoint. At each checkpoint the tiles
+of each layer made dirty since the previous checkpoint are compressed and
+appended to the current journal file. Once the journals grow past a size
+threshold, a new journal is started and every layer is written to a
+snapshot on the thread pool. A snapshot is also written when layers are
+added, such that the contents they were given are kept. When the
+snapshot is complete, it replaces the previous one and the journals it
+covers are removed.
+
+A session is restored by loading the snapshot and then applying the
+tiles of the remaining journals in order, after which the layers are
+stacked with the names, opacities, blend modes and visibility last
+recorded. Files are written such that an interrupted write never damages
+the files already complete: snapshots are written to a temporary file
+and then renamed, and a journal record cut short is ignored when reading.
+
+The directory holds the following files:
+  'session.json' - the file name, the size of the image and the layers.
+  'snapshot.bin' - every tile of every layer.
+  'journal-NNNNNN.bin' - tiles appended at checkpoints.
+Snapshots and journals begin with a header holding the session token,
+which prevents files from a previous session being applied, and the
+sequence number. The snapshot supersedes the journals having sequence
+numbers up to and including its own. Each tile is stored with the number
+identifying its layer for the rest of the session, which stays the same
+as layers are moved."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import json
+import os
+import struct
+import uuid
+import zlib
+from threading import Lock
+from typing import TypeAlias, Optional, BinaryIO, Iterator
+
+import numpy as np
+from PySide6.QtCore import QThreadPool
+
+from ezside.imaging import TiledImage, LayerStack, Layer
+
+Box: TypeAlias = tuple[int, int, int, int]
+Session: TypeAlias = tuple[LayerStack, Optional[str]]
+
+_SnapshotMagic = b'EZSNAPSH'
+_JournalMagic = b'EZJOURNL'
+_Version = 2
+_Header = struct.Struct('<8sH16sIII')
+_Record = struct.Struct('<IIIIII')
+
+
+def _writeHeader(file: BinaryIO, magic: bytes, token: bytes,
+                 sequence: int, width: int, height: int) -> None:
+  """Writes the header of a snapshot or journal."""
+  file.write(_Header.pack(magic, _Version, token, sequence, width, height))
+
+
+def _writeTile(file: BinaryIO, layerId: int, image: TiledImage,
+               box: Box) -> int:
+  """Compresses the pixels of the layer inside the box and appends them
+  to the file. Returns the number of bytes written."""
+  left, top, right, bottom = box
+  data = zlib.compress(image.readRegion(box).tobytes(), 1)
+  file.write(_Record.pack(layerId, left, top, right, bottom, len(data)))
+  file.write(data)
+  return _Record.size + len(data)
+
+
+def _readTiles(fid: str, magic: bytes, token: bytes, width: int,
+               height: int) -> Iterator[tuple[int, Box, bytes]]:
+  """Yields the layers, boxes and pixels of the tiles in the file. Files
+  from other sessions or of other sizes yield nothing. Reading stops at
+  the first record cut short."""
+  with open(fid, 'rb') as file:
+    header = file.read(_Header.size)
+    if len(header) < _Header.size:
+      return
+    fileMagic, version, fileToken, _, w, h = _Header.unpack(header)
+    if (fileMagic, version, fileToken) != (magic, _Version, token):
+      return
+    if (w, h) != (width, height):
+      return
+    while True:
+      record = file.read(_Record.size)
+      if len(record) < _Record.size:
+        return
+      layerId, left, top, right, bottom, numBytes = _Record.unpack(record)
+      data = file.read(numBytes)
+      if len(data) < numBytes:
+        return
+      try:
+        yield layerId, (left, top, right, bottom), zlib.decompress(data)
+      except zlib.error:
+        return
+
+
+def _readSequence(fid: str) -> int:
+  """Returns the sequence number in the header of the file."""
+  with open(fid, 'rb') as file:
+    header = file.read(_Header.size)
+  if len(header) < _Header.size:
+    return 0
+  return _Header.unpack(header)[3]
+
+
+
+
+class AutosaveJournal:
+  """AutosaveJournal appends the dirty tiles of each layer to journal
+  files and periodically compacts them into a snapshot. """
+
+  __directory__ = None
+  __threshold__ = 64 * 1024 * 1024
+  __layer_stack__ = None
+  __layer_ids__ = None
+  __layer_state__ = None
+  __next_layer_id__ = 0
+  __file_name__ = None
+  __token__ = None
+  __sequence__ = 0
+  __journal_file__ = None
+  __journal_bytes__ = 0
+  __compacting__ = False
+  __compact_pending__ = False
+  __lock__ = None
+
+  def __init__(self, directory: str, threshold: int = None) -> None:
+    """Session files are kept in the directory given, which is created if
+    necessary. Once the journals hold more bytes than the threshold, they
+    are compacted into a new snapshot."""
+    os.makedirs(directory, exist_ok=True)
+    self.__directory__ = directory
+    if threshold is not None:
+      self.__threshold__ = threshold
+    self.__lock__ = Lock()
+
+  def _path(self, name: str) -> str:
+    """Returns the path of the file in the directory."""
+    return os.path.join(self.__directory__, name)
+
+  def _journalPath(self, sequence: int) -> str:
+    """Returns the path of the journal having the sequence number."""
+    return self._path('journal-%06d.bin' % sequence)
+
+  def _listJournals(self) -> list[tuple[int, str]]:
+    """Returns the sequence numbers and paths of the journals present in
+    ascending order."""
+    out = []
+    for name in os.listdir(self.__directory__):
+      if name.startswith('journal-') and name.endswith('.bin'):
+        try:
+          out.append((int(name[8:-4]), self._path(name)))
+        except ValueError:
+          continue
+    return sorted(out)
+
+  def _removeFiles(self, *prefixes: str) -> None:
+    """Removes the files in the directory whose names begin with any of
+    the prefixes. Files that cannot be removed are left in place."""
+    for name in os.listdir(self.__directory__):
+      if name.startswith(prefixes):
+        try:
+          os.remove(self._path(name))
+        except OSError:
+          continue
+
+  def _readSession(self) -> Optional[dict]:
+    """Returns the contents of the session file or None if there is no
+    valid session."""
+    keys = {'token', 'width', 'height', 'layers', 'active'}
+    try:
+      with open(self._path('session.json'), 'r', encoding='utf-8') as file:
+        session = json.load(file)
+      return session if keys <= set(session) else None
+    except (OSError, ValueError):
+      return None
+
+  def _getLayerId(self, layer: Layer) -> int:
+    """Returns the number identifying the layer in the session. Layers
+    not seen before are given the next number, and a snapshot is
+    requested to keep their contents."""
+    if layer not in self.__layer_ids__:
+      self.__layer_ids__[layer] = self.__next_layer_id__
+      self.__next_layer_id__ += 1
+      self.__compact_pending__ = True
+    return self.__layer_ids__[layer]
+
+  def _describeLayers(self) -> list[dict]:
+    """Returns the settings of the layers from the bottom up."""
+    return [{
+        'id'     : self._getLayerId(layer),
+        'name'   : layer.getName(),
+        'opacity': layer.getOpacity(),
+        'mode'   : layer.getBlendMode(),
+        'visible': layer.isVisible(),
+    } for layer in self.__layer_stack__.getLayers()]
+
+  def _writeSession(self) -> None:
+    """Writes the session file, replacing the previous one."""
+    stack = self.__layer_stack__
+    self.__layer_state__ = (self._describeLayers(), stack.getActiveIndex())
+    session = {
+        'token' : self.__token__.hex(),
+        'fid'   : self.__file_name__,
+        'width' : stack.getWidth(),
+        'height': stack.getHeight(),
+        'layers': self.__layer_state__[0],
+        'active': self.__layer_state__[1],
+    }
+    tempPath = self._path('session.json.tmp')
+    with open(tempPath, 'w', encoding='utf-8') as file:
+      json.dump(session, file)
+    os.replace(tempPath, self._path('session.json'))
+
+  def _openJournal(self) -> None:
+    """Closes the current journal and begins the next one."""
+    if self.__journal_file__ is not None:
+      self.__journal_file__.close()
+    self.__sequence__ += 1
+    self.__journal_file__ = open(self._journalPath(self.__sequence__), 'wb')
+    stack = self.__layer_stack__
+    _writeHeader(self.__journal_file__, _JournalMagic, self.__token__,
+                 self.__sequence__, stack.getWidth(), stack.getHeight())
+    self.__journal_file__.flush()
+    self.__journal_bytes__ = 0
+
+  def getLayerStack(self) -> Optional[LayerStack]:
+    """Returns the layers journaled or None if no session is active."""
+    return self.__layer_stack__
+
+  def getJournalBytes(self) -> int:
+    """Returns the number of bytes appended since the last compaction."""
+    return self.__journal_bytes__
+
+  def isCompacting(self) -> bool:
+    """Returns True while a snapshot is being written."""
+    return True if self.__compacting__ else False
+
+  def hasSession(self) -> bool:
+    """Returns True if the directory holds a session to restore."""
+    return False if self._readSession() is None else True
+
+  def setFileName(self, fid: str) -> None:
+    """Sets the file name stored with the session."""
+    self.__file_name__ = fid
+    if self.__layer_stack__ is not None:
+      self._writeSession()
+
+  def _takeDirtyTiles(self) -> None:
+    """Marks every tile of every layer clean."""
+    for layer in self.__layer_stack__.getLayers():
+      layer.getBuffer().takeDirtyTiles()
+
+  def begin(self, stack: LayerStack, fid: str = None) -> None:
+    """Begins a new session journaling the layers. The files of the
+    previous session are removed and a snapshot of the layers is written
+    on the thread pool."""
+    self.close()
+    with self.__lock__:
+      self.__token__ = uuid.uuid4().bytes
+      self.__compacting__ = False
+    self._removeFiles('journal-', 'snapshot')
+    self.__layer_stack__, self.__file_name__ = stack, fid
+    self.__layer_ids__, self.__next_layer_id__ = {}, 0
+    self.__sequence__ = 0
+    self._takeDirtyTiles()
+    self._writeSession()
+    self.compact()
+
+  def resume(self, stack: LayerStack) -> None:
+    """Continues the session in the directory, journaling the layers
+    restored from it. A new snapshot is written on the thread pool."""
+    session = self._readSession()
+    if session is None:
+      return self.begin(stack)
+    self.close()
+    with self.__lock__:
+      self.__token__ = bytes.fromhex(session['token'])
+      self.__compacting__ = False
+    self.__layer_stack__, self.__file_name__ = stack, session.get('fid')
+    ids = [entry['id'] for entry in session['layers']]
+    self.__layer_ids__ = dict(zip(stack.getLayers(), ids))
+    self.__next_layer_id__ = max(ids, default=-1) + 1
+    journals = self._listJournals()
+    self.__sequence__ = journals[-1][0] if journals else 0
+    self._takeDirtyTiles()
+    self._writeSession()
+    self.compact()
+
+  def checkpoint(self) -> int:
+    """Appends the tiles of each layer made dirty since the previous
+    checkpoint to the journal. Returns the number of tiles written. The
+    session file is rewritten if the layers changed, and the journals
+    are compacted when they exceed the threshold or when layers were
+    added."""
+    stack = self.__layer_stack__
+    if stack is None or self.__journal_file__ is None:
+      return 0
+    state = (self._describeLayers(), stack.getActiveIndex())
+    if state != self.__layer_state__:
+      self._writeSession()
+    count = 0
+    for layer in stack.getLayers():
+      layerId, image = self.__layer_ids__[layer], layer.getBuffer()
+      dirtyTiles = sorted(image.takeDirtyTiles())
+      for tile in dirtyTiles:
+        self.__journal_bytes__ += _writeTile(
+            self.__journal_file__, layerId, image, image.getTileBox(tile))
+      count += len(dirtyTiles)
+    if count:
+      self.__journal_file__.flush()
+    if self.__compact_pending__ or self.__journal_bytes__ > self.__threshold__:
+      self.compact()
+    return count
+
+  def compact(self) -> bool:
+    """Begins the next journal and writes a snapshot of the layers on the
+    thread pool. Tiles changing while the snapshot is written are dirty,
+    and are therefore appended to the new journal at the next checkpoint.
+    Returns False if a snapshot is already being written."""
+    if self.__layer_stack__ is None or self.__compacting__:
+      return False
+    self._openJournal()
+    self.__compacting__ = True
+    token, sequence = self.__token__, self.__sequence__ - 1
+    layers = [(self._getLayerId(layer), layer.getBuffer())
+              for layer in self.__layer_stack__.getLayers()]
+    self.__compact_pending__ = False
+    QThreadPool.globalInstance().start(
+        lambda: self._writeSnapshot(layers, token, sequence))
+    return True
+
+  def _writeSnapshot(self, layers: list[tuple[int, TiledImage]],
+                     token: bytes, sequence: int) -> None:
+    """Writes every tile of the layers to the snapshot superseding the
+    journals up to and including the sequence number. Runs on the thread
+    pool."""
+    tempPath = self._path('snapshot-%s.tmp' % token.hex())
+    try:
+      with open(tempPath, 'wb') as file:
+        width, height = layers[0][1].width, layers[0][1].height
+        _writeHeader(file, _SnapshotMagic, token, sequence, width, height)
+        for layerId, image in layers:
+          rows, cols = image.getTileCount()
+          for row in range(rows):
+            for col in range(cols):
+              _writeTile(file, layerId, image, image.getTileBox((row, col)))
+      with self.__lock__:
+        if token != self.__token__:
+          return
+        os.replace(tempPath, self._path('snapshot.bin'))
+        for journalSequence, journalPath in self._listJournals():
+          if journalSequence <= sequence:
+            os.remove(journalPath)
+    except OSError:
+      return
+    finally:
+      if os.path.exists(tempPath):
+        os.remove(tempPath)
+      with self.__lock__:
+        if token == self.__token__:
+          self.__compacting__ = False
+
+  def restore(self) -> Optional[Session]:
+    """Restores the layers of the session in the directory. Returns the
+    layers and the file name of the session, or None if there is no
+    session. If no snapshot was completed, the tiles of the journals are
+    applied to the file of the session, if it can still be opened, as
+    the bottom layer."""
+    session = self._readSession()
+    if session is None:
+      return None
+    token = bytes.fromhex(session['token'])
+    width, height = session['width'], session['height']
+    fid = session.get('fid')
+    entries = session['layers']
+    clear = (0, 0, 0, 0)
+    images = {entry['id']: TiledImage(width, height, clear)
+              for entry in entries[1:]}
+    snapshotPath, sequence = self._path('snapshot.bin'), 0
+    hasSnapshot, base = os.path.exists(snapshotPath), None
+    if hasSnapshot:
+      base = TiledImage(width, height, clear)
+      sequence = _readSequence(snapshotPath)
+    elif fid is not None and os.path.exists(fid):
+      try:
+        base = TiledImage.open(fid)
+      except OSError:
+        base = None
+      if base is not None and (base.width, base.height) != (width, height):
+        base = None
+    if base is None:
+      base = TiledImage(width, height)
+    images[entries[0]['id']] = base
+    if hasSnapshot:
+      self._applyTiles(images, snapshotPath, _SnapshotMagic, token)
+    for journalSequence, journalPath in self._listJournals():
+      if journalSequence > sequence:
+        self._applyTiles(images, journalPath, _JournalMagic, token)
+    for image in images.values():
+      image.flush()
+      image.takeDirtyTiles()
+    return self._stackLayers(entries, images, session['active']), fid
+
+  @staticmethod
+  def _stackLayers(entries: list[dict], images: dict[int, TiledImage],
+                   active: int) -> LayerStack:
+    """Returns the layers stacked from the bottom up with the settings
+    recorded."""
+    stack = LayerStack(images[entries[0]['id']], entries[0]['name'])
+    for entry in entries[1:]:
+      stack.addLayer(entry['name'], images[entry['id']])
+    for index, entry in enumerate(entries):
+      stack.setLayerOpacity(index, entry['opacity'])
+      stack.setLayerBlendMode(index, entry['mode'])
+      stack.setLayerVisible(index, entry['visible'])
+    stack.setActiveIndex(active)
+    return stack
+
+  @staticmethod
+  def _applyTiles(images: dict[int, TiledImage], fid: str, magic: bytes,
+                  token: bytes) -> None:
+    """Copies the tiles in the file to the images of their layers. Tiles
+    of layers since removed are skipped."""
+    image = next(iter(images.values()))
+    for layerId, (left, top, right, bottom), data in _readTiles(
+        fid, magic, token, image.width, image.height):
+      pixels = np.frombuffer(data, dtype=np.uint8)
+      shape = (bottom - top, right - left, 4)
+      if pixels.size != shape[0] * shape[1] * 4:
+        return
+      if layerId in images:
+        images[layerId].writeRegion((left, top, right, bottom),
+                                    pixels.reshape(shape))
+
+  def close(self) -> None:
+    """Closes the journal. The session files are kept, allowing the
+    session to be restored later."""
+    if self.__journal_file__ is not None:
+      self.__journal_file__.close()
+    self.__journal_file__ = None
+    self.__layer_stack__ = None
+    self.__layer_ids__ = None
+
+  def discard(self) -> None:
+    """Closes the journal and removes the files of the session."""
+    self.close()
+    with self.__lock__:
+      self.__token__ = None
+    self._removeFiles('journal-', 'snapshot', 'session')
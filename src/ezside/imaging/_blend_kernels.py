@@ -0,0 +1,291 @@
+"""The blend kernels composite a source onto a destination slice in
+place. Kernels are registered by name, and the modes included are
+'normal', 'multiply', 'screen', 'overlay', 'additive' and 'erase'. Each
+kernel receives the backdrop color and alpha and the source color and
+coverage as planar float32 arrays of shape (channels, rows, columns)
+with values between 0 and 1, and updates the backdrop in place. The
+planar layout lets each operation run along entire rows rather than
+across the few channels of a single pixel.
+
+The 'blend' function prepares these arrays from uint8 or float32 slices.
+Floating point slices are updated through views of the slice itself,
+while uint8 slices are converted and written back rounded. Slices are
+processed a few rows at a time, such that the temporary arrays stay
+small enough to remain in cache and no array the size of the image is
+ever allocated.
+
+The opacity scales the alpha of the source and the flow scales the
+amount applied by each call. Brushes apply the flow at every dab, such
+that overlapping dabs build up, while layers are composited once with
+their opacity. The two multiply the coverage of the source.
+
+Colors use straight alpha. The separable modes follow the W3C
+compositing specification, in which the result of the mode is mixed
+with the source color according to the alpha of the backdrop. Slices
+without an alpha channel are treated as opaque, and modes changing only
+the alpha, such as 'erase', cannot be used on them.
+
+'benchmarkBlendModes' times each kernel on a slice of the given size
+and reports the throughput in bytes per second, counting the source
+and destination read and the destination written. The throughput of a
+plain copy is included for reference, as no kernel can exceed the memory
+bandwidth it measures."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import time
+from typing import TypeAlias, Callable
+
+import numpy as np
+from worktoy.text import monoSpace
+
+BlendKernel: TypeAlias = Callable[
+  [np.ndarray, np.ndarray, np.ndarray, np.ndarray], None]
+MixFunction: TypeAlias = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+_blendKernels: dict[str, BlendKernel] = {}
+_alphaOnlyModes: set[str] = set()
+_chunkPixels = 16384
+
+
+def registerBlendMode(name: str, kernel: BlendKernel,
+                      alphaOnly: bool = False) -> BlendKernel:
+  """Registers the kernel under the name, replacing any kernel
+  registered under it before. The kernel is called as 'kernel(cb, ab, cs,
+  sa)' with the backdrop color and alpha, which it must update in place,
+  followed by the source color and coverage, which it must not change.
+  The arrays are planar and the source may be broadcast against the
+  backdrop. Kernels changing only the alpha of the backdrop must be
+  registered with 'alphaOnly', as they have no effect on destinations
+  without alpha. Returns the kernel."""
+  if not callable(kernel):
+    e = """Expected the blend kernel to be callable, but received: %s!"""
+    raise TypeError(e % type(kernel).__name__)
+  _blendKernels[name] = kernel
+  if alphaOnly:
+    _alphaOnlyModes.add(name)
+  else:
+    _alphaOnlyModes.discard(name)
+  return kernel
+
+
+def getBlendKernel(name: str) -> BlendKernel:
+  """Returns the kernel registered under the name."""
+  if name not in _blendKernels:
+    e = """Unknown blend mode: '%s'! Expected one of: %s"""
+    raise KeyError(e % (name, ', '.join(_blendKernels)))
+  return _blendKernels[name]
+
+
+def getBlendModes() -> list[str]:
+  """Returns the names of the registered blend modes."""
+  return [*_blendKernels, ]
+
+
+def _over(cb: np.ndarray, ab: np.ndarray,
+          cs: np.ndarray, sa: np.ndarray) -> None:
+  """Composites the source over the backdrop in place."""
+  keep = ab * (1. - sa)
+  cb *= keep
+  cb += sa * cs
+  keep += sa
+  np.divide(cb, keep, out=cb, where=keep > 0)
+  ab[...] = keep
+
+
+def separableKernel(mix: MixFunction) -> BlendKernel:
+  """Creates the kernel of a separable blend mode from the mixing
+  function, which receives the backdrop and source colors and returns a
+  new array."""
+
+  def kernel(cb: np.ndarray, ab: np.ndarray,
+             cs: np.ndarray, sa: np.ndarray) -> None:
+    """Mixes the colors where the backdrop is opaque and composites the
+    result over the backdrop."""
+    mixed = mix(cb, cs)
+    mixed -= cs
+    mixed *= ab
+    mixed += cs
+    _over(cb, ab, mixed, sa)
+
+  return kernel
+
+
+def _multiply(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+  """Mixing function of 'multiply'."""
+  return cb * cs
+
+
+def _screen(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+  """Mixing function of 'screen'."""
+  out = cb + cs
+  out -= cb * cs
+  return out
+
+
+def _overlay(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+  """Mixing function of 'overlay'. Multiplies where the backdrop is dark
+  and screens where it is light."""
+  out = cb * cs
+  out *= 2.
+  light = np.broadcast_to(cb > .5, out.shape)
+  screen = (1. - cb) * (1. - cs)
+  screen *= -2.
+  screen += 1.
+  np.copyto(out, screen, where=light)
+  return out
+
+
+def _additive(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+  """Mixing function of 'additive', clipped at white."""
+  out = cb + cs
+  np.minimum(out, 1., out=out)
+  return out
+
+
+def _erase(cb: np.ndarray, ab: np.ndarray,
+           cs: np.ndarray, sa: np.ndarray) -> None:
+  """Removes alpha from the backdrop by the coverage of the source. The
+  color of the source is ignored."""
+  ab *= 1. - sa
+
+
+registerBlendMode('normal', _over)
+registerBlendMode('multiply', separableKernel(_multiply))
+registerBlendMode('screen', separableKernel(_screen))
+registerBlendMode('overlay', separableKernel(_overlay))
+registerBlendMode('additive', separableKernel(_additive))
+registerBlendMode('erase', _erase, alphaOnly=True)
+
+
+def _scaleOf(dtype: np.dtype) -> float:
+  """Returns the value of full intensity in arrays of the type."""
+  if np.issubdtype(dtype, np.integer):
+    return float(np.iinfo(dtype).max)
+  return 1.
+
+
+def blend(dst: np.ndarray,
+          src: np.ndarray,
+          mode: str = 'normal',
+          opacity: float = 1.,
+          flow: float = 1.,
+          mask: np.ndarray = None) -> None:
+  """Blends the source into the destination slice in place. The
+  destination has shape (rows, columns, channels), where four channels
+  are RGBA and other counts have no alpha. The source is either a slice
+  of the same shape or a single color, given in the units of the
+  destination. A source having a channel beyond the color channels of
+  the destination carries its alpha there, also when the destination has
+  no alpha, and a source without one is opaque. If given, the mask of
+  shape (rows, columns) holds the coverage of the source between 0 and
+  1. Large slices are blended a few rows at a time, keeping the
+  temporary arrays small enough to remain in cache. Raises ValueError if
+  the mode changes only the alpha and the destination has none."""
+  kernel = getBlendKernel(mode)
+  opaque = dst.shape[2] != 4
+  if opaque and mode in _alphaOnlyModes:
+    e = """The blend mode '%s' changes only the alpha, but the destination
+    has %d channels and no alpha!"""
+    raise ValueError(monoSpace(e % (mode, dst.shape[2])))
+  amount = float(opacity) * float(flow)
+  if amount <= 0. or not dst.size:
+    return
+  src = np.asarray(src)
+  if src.ndim == 1:
+    src = src.reshape(1, 1, -1)
+  step = max(_chunkPixels // dst.shape[1], 1)
+  ab = None
+  if opaque:
+    ab = np.empty((1, min(step, dst.shape[0]), dst.shape[1]), np.float32)
+  for top in range(0, dst.shape[0], step):
+    rows = slice(top, top + step)
+    _blendRows(kernel, dst[rows], src if src.shape[0] == 1 else src[rows],
+               amount, None if mask is None else mask[rows], ab)
+
+
+def _blendRows(kernel: BlendKernel, dst: np.ndarray, src: np.ndarray,
+               amount: float, mask: np.ndarray = None,
+               opaque: np.ndarray = None) -> None:
+  """Blends the rows of the source into those of the destination. The
+  kernel receives planar arrays of shape (channels, rows, columns), such
+  that each operation runs along entire rows. If the destination has no
+  alpha, the alpha passed to the kernel is filled into 'opaque', which
+  must have room for at least the rows given, and is allocated if
+  None."""
+  scale = _scaleOf(dst.dtype)
+  dst, src = np.moveaxis(dst, 2, 0), np.moveaxis(src, 2, 0)
+  n = 3 if dst.shape[0] == 4 else dst.shape[0]
+  if src.shape[0] > n:
+    sa = src[n:n + 1].astype(np.float32, order='C')
+    sa *= amount / scale
+  else:
+    sa = np.full((1, 1, 1), amount, dtype=np.float32)
+  if mask is not None:
+    sa = sa * mask[None]
+  if not sa.any():
+    return
+  cs = src[:n].astype(np.float32, order='C')
+  cs /= scale
+  if n < dst.shape[0]:
+    ab = dst[n:]
+  else:
+    if opaque is None:
+      opaque = np.empty((1, *dst.shape[1:]), dtype=np.float32)
+    ab = opaque[:, :dst.shape[1]]
+    ab.fill(1.)
+  if np.issubdtype(dst.dtype, np.floating):
+    return kernel(dst[:n], ab, cs, sa)
+  cb = dst[:n].astype(np.float32, order='C')
+  cb /= scale
+  if n < dst.shape[0]:
+    ab = ab.astype(np.float32, order='C')
+    ab /= scale
+  kernel(cb, ab, cs, sa)
+  cb *= scale
+  dst[:n] = np.rint(cb, out=cb)
+  if n < dst.shape[0]:
+    ab *= scale
+    dst[n:] = np.rint(ab, out=ab)
+
+
+def benchmarkBlendModes(width: int = 1024,
+                        height: int = 1024,
+                        dtype: type = np.uint8,
+                        repeat: int = 5) -> dict[str, float]:
+  """Blends an RGBA slice of the given size and type with each kernel
+  and returns the throughput of the fastest run in bytes per second. The
+  entry 'copy' holds the throughput of copying the source into the
+  destination."""
+  rng = np.random.default_rng(0)
+  scale = _scaleOf(np.dtype(dtype))
+  shape = (height, width, 4)
+  src = (rng.random(shape, dtype=np.float32) * scale).astype(dtype)
+  base = (rng.random(shape, dtype=np.float32) * scale).astype(dtype)
+  dst = base.copy()
+  runs = {'copy': (lambda: np.copyto(dst, src), 2 * dst.nbytes)}
+  for name in getBlendModes():
+    runs[name] = (lambda mode=name: blend(dst, src, mode, .5, .5),
+                  3 * dst.nbytes)
+  out = {}
+  for name, (run, numBytes) in runs.items():
+    best = float('inf')
+    for _ in range(repeat):
+      np.copyto(dst, base)
+      start = time.perf_counter()
+      run()
+      best = min(best, time.perf_counter() - start)
+    out[name] = numBytes / best
+  return out
+
+
+def formatBenchmark(results: dict[str, float]) -> str:
+  """Formats the throughputs returned by 'benchmarkBlendModes' as a
+  table in GB/s, with each mode also given as a fraction of 'copy'."""
+  copy = results.get('copy')
+  lines = ['%-10s %9s %8s' % ('mode', 'GB/s', 'copy')]
+  for name, value in results.items():
+    ratio = '%7.1f%%' % (100 * value / copy) if copy else '%8s' % '-'
+    lines.append('%-10s %9.2f %s' % (name, value / 1e9, ratio))
+  return '\n'.join(lines)
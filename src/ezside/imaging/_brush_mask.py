@@ -0,0 +1,44 @@
+"""The brushMask function returns the coverage mask of a circular brush.
+Masks are computed once per radius and hardness and shared thereafter.
+The returned arrays are read-only."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from functools import lru_cache
+from math import ceil
+
+import numpy as np
+
+
+@lru_cache(maxsize=64)
+def brushMask(radius: float,
+              hardness: float = 1.,
+              antialias: bool = True) -> np.ndarray:
+  """Returns a square float32 array of side length 2n + 1, where n is the
+  radius rounded up. Entries give the coverage of the brush at each pixel
+  between 0 and 1, with the centre of the brush at the centre entry. At
+  hardness 1 the edge is sharp, lower values fade the outer part of the
+  brush linearly towards the edge. If antialiased, the edge is blended
+  over one pixel."""
+  if radius <= 0:
+    e = """Brush radius must be positive, but received: %s!"""
+    raise ValueError(e % radius)
+  if not 0 <= hardness <= 1:
+    e = """Brush hardness must be between 0 and 1, but received: %s!"""
+    raise ValueError(e % hardness)
+  n = ceil(radius)
+  offsets = np.arange(-n, n + 1, dtype=np.float32)
+  dist = np.hypot(offsets[None, :], offsets[:, None])
+  if antialias:
+    falloff = max(radius * (1 - hardness), 1.)
+    mask = np.clip((radius + 0.5 - dist) / falloff, 0., 1.)
+  elif hardness < 1:
+    falloff = radius * (1 - hardness)
+    mask = np.clip((radius - dist) / falloff, 0., 1.)
+    mask[dist >= radius] = 0.
+  else:
+    mask = (dist < radius).astype(np.float32)
+  mask = mask.astype(np.float32)
+  mask.flags.writeable = False
+  return mask
@@ -0,0 +1,196 @@
+"""BrushStroke paints continuous strokes into an image array. Each dab
+blends the brush mask into the array with a blend kernel acting on a
+single slice, clipped at the edges of the array. Between successive
+positions, dabs are placed at regular intervals such that fast strokes
+leave no gaps.
+
+Arrays are indexed as (row, column, channel). Floating point and integer
+arrays are both supported, with the color given in the units of the
+array. Strokes may also paint into a PixelBuffer, in which case each dab
+is split by 'splitBox' and stamped into each part, such that buffers
+storing their pixels in tiles are painted without copying."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from math import hypot
+from typing import TypeAlias, Optional, Callable
+
+import numpy as np
+from worktoy.text import monoSpace
+
+from ezside.imaging import brushMask, blend, getBlendKernel, PixelBuffer
+
+Box: TypeAlias = tuple[int, int, int, int]
+
+
+def _unite(box: Optional[Box], other: Optional[Box]) -> Optional[Box]:
+  """Returns the smallest box containing both boxes."""
+  if box is None:
+    return other
+  if other is None:
+    return box
+  return (min(box[0], other[0]), min(box[1], other[1]),
+          max(box[2], other[2]), max(box[3], other[3]))
+
+
+def dabBox(array: np.ndarray,
+           x: float,
+           y: float,
+           mask: np.ndarray) -> Optional[Box]:
+  """Returns the box (left, top, right, bottom) of the pixels covered by
+  the mask centred at (x, y), clipped to the array, or None if the mask
+  falls entirely outside the array."""
+  height, width = array.shape[:2]
+  n = mask.shape[0] // 2
+  col, row = int(round(x)) - n, int(round(y)) - n
+  left, right = max(col, 0), min(col + mask.shape[1], width)
+  top, bottom = max(row, 0), min(row + mask.shape[0], height)
+  if left >= right or top >= bottom:
+    return None
+  return left, top, right, bottom
+
+
+def stampDab(array: np.ndarray,
+             x: float,
+             y: float,
+             mask: np.ndarray,
+             color: np.ndarray,
+             opacity: float = 1.,
+             flow: float = 1.,
+             mode: str = 'normal') -> Optional[Box]:
+  """Blends the color into the array by the mask centred at (x, y) using
+  the blend mode. The coverage of each pixel is the mask times the
+  opacity and the flow. Returns the box (left, top, right, bottom) of the
+  pixels changed, with right and bottom exclusive, or None if the mask
+  falls entirely outside the array."""
+  box = dabBox(array, x, y, mask)
+  if box is None:
+    return None
+  left, top, right, bottom = box
+  n = mask.shape[0] // 2
+  col, row = int(round(x)) - n, int(round(y)) - n
+  coverage = mask[top - row:bottom - row, left - col:right - col]
+  region = array[top:bottom, left:right]
+  blend(region, color, mode, opacity, flow, coverage)
+  return left, top, right, bottom
+
+
+class BrushStroke:
+  """BrushStroke paints continuous strokes into an image array or a
+  PixelBuffer. """
+
+  __target_array__ = None
+  __brush_mask__ = None
+  __brush_color__ = None
+  __opacity__ = None
+  __flow__ = 1.
+  __blend_mode__ = 'normal'
+  __spacing__ = None
+  __before_write__ = None
+  __last_point__ = None
+  __residual__ = 0.
+
+  def __init__(self,
+               array: np.ndarray | PixelBuffer,
+               radius: float,
+               color: tuple,
+               opacity: float = 1.,
+               hardness: float = 1.,
+               spacing: float = 0.25,
+               beforeWrite: Callable[[Box], None] = None,
+               flow: float = 1.,
+               mode: str = 'normal') -> None:
+    """The spacing between dabs is given as a fraction of the radius. If
+    'beforeWrite' is given, it is called with the box of each dab before
+    the dab is written to the array. Each dab is blended using the blend
+    mode with the opacity and flow given."""
+    getBlendKernel(mode)
+    self.__target_array__ = array
+    self.__before_write__ = beforeWrite
+    self.__brush_mask__ = brushMask(float(radius), float(hardness))
+    if isinstance(array, PixelBuffer):
+      channels = 4
+    elif array.ndim != 3:
+      e = """Expected an array of shape (rows, columns, channels), but
+      received an array of shape: %s!"""
+      raise ValueError(monoSpace(e % str(array.shape)))
+    else:
+      channels = array.shape[2]
+    color = np.asarray(color, dtype=np.float32)[:channels]
+    if color.size < channels:
+      e = """The color has %d channels, but the array has %d!"""
+      raise ValueError(e % (color.size, channels))
+    self.__brush_color__ = color
+    self.__opacity__ = opacity
+    self.__flow__ = flow
+    self.__blend_mode__ = mode
+    self.__spacing__ = max(radius * spacing, 1.)
+
+  def isActive(self) -> bool:
+    """Returns True if the stroke has begun and not yet ended."""
+    return False if self.__last_point__ is None else True
+
+  def begin(self, x: float, y: float) -> Optional[Box]:
+    """Begins the stroke at the given point placing the first dab."""
+    self.__last_point__ = (x, y)
+    self.__residual__ = 0.
+    return self._stamp(x, y)
+
+  def strokeTo(self, x: float, y: float) -> Optional[Box]:
+    """Continues the stroke to the given point. Dabs are placed along the
+    segment from the previous point at intervals of the spacing, carrying
+    any remaining distance over to the next segment. Returns the box
+    containing every pixel changed."""
+    if self.__last_point__ is None:
+      return self.begin(x, y)
+    x0, y0 = self.__last_point__
+    length = hypot(x - x0, y - y0)
+    self.__last_point__ = (x, y)
+    if not length:
+      return None
+    spacing = self.__spacing__
+    box = None
+    dist = spacing - self.__residual__
+    while dist <= length:
+      t = dist / length
+      box = _unite(box, self._stamp(x0 + t * (x - x0), y0 + t * (y - y0)))
+      dist += spacing
+    self.__residual__ = length - (dist - spacing)
+    return box
+
+  def end(self) -> None:
+    """Ends the stroke."""
+    self.__last_point__ = None
+    self.__residual__ = 0.
+
+  def _stamp(self, x: float, y: float) -> Optional[Box]:
+    """Places a single dab at the given point."""
+    if isinstance(self.__target_array__, PixelBuffer):
+      return self._stampParts(x, y)
+    if self.__before_write__ is not None:
+      box = dabBox(self.__target_array__, x, y, self.__brush_mask__)
+      if box is not None:
+        self.__before_write__(box)
+    return stampDab(self.__target_array__, x, y, self.__brush_mask__,
+                    self.__brush_color__, self.__opacity__,
+                    self.__flow__, self.__blend_mode__)
+
+  def _stampParts(self, x: float, y: float) -> Optional[Box]:
+    """Places a single dab at the given point of the target buffer,
+    stamping it into each part returned by 'splitBox'."""
+    buffer, mask = self.__target_array__, self.__brush_mask__
+    n = mask.shape[0] // 2
+    col, row = int(round(x)), int(round(y))
+    parts = buffer.splitBox((col - n, row - n, col - n + mask.shape[1],
+                             row - n + mask.shape[0]))
+    box = None
+    for part in parts:
+      box = _unite(box, part)
+    if box is not None and self.__before_write__ is not None:
+      self.__before_write__(box)
+    for left, top, right, bottom in parts:
+      stampDab(buffer.region((left, top, right, bottom)), col - left,
+               row - top, mask, self.__brush_color__, self.__opacity__,
+               self.__flow__, self.__blend_mode__)
+    return box
@@ -0,0 +1,151 @@
+"""The image jobs open and save images on a thread pool, keeping the
+interface responsive while large files are decoded and encoded. Each job
+carries a generation number given by the code starting it, which is
+passed back with every signal. This allows results from jobs superseded
+by newer ones to be recognized and ignored.
+
+Jobs are not deleted by the thread pool. The code starting a job must
+keep a reference to it until 'finished' is emitted, which every job
+emits last, also when cancelled or failed.
+
+The signals are emitted from the worker thread. Connections to slots on
+objects living in the main thread are therefore queued, and the slots
+run on the main thread."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from PySide6.QtCore import QObject, QRunnable, Signal, QThreadPool
+
+from ezside.imaging import PixelBuffer, TiledImage
+
+
+class ImageJobSignals(QObject):
+  """The signals emitted by image jobs. """
+
+  progress = Signal(int, float)
+  previewReady = Signal(int, object)
+  allocated = Signal(int, object)
+  rowsReady = Signal(int, int)
+  opened = Signal(int, object)
+  snapshotTaken = Signal(int)
+  saved = Signal(int, str)
+  failed = Signal(int, str)
+  finished = Signal(int)
+
+
+class _ImageJob(QRunnable):
+  """Shared implementation of the image jobs. """
+
+  __generation__ = None
+  __cancelled__ = False
+  __file_name__ = None
+
+  def __init__(self, generation: int, fid: str) -> None:
+    QRunnable.__init__(self)
+    self.setAutoDelete(False)
+    self.__generation__ = generation
+    self.__file_name__ = fid
+    self.signals = ImageJobSignals()
+
+  def getGeneration(self) -> int:
+    """Returns the generation given when the job was created."""
+    return self.__generation__
+
+  def getFileName(self) -> str:
+    """Returns the name of the file opened or saved."""
+    return self.__file_name__
+
+  def cancel(self) -> None:
+    """Requests that the job stops at the next opportunity. A cancelled
+    job emits no result."""
+    self.__cancelled__ = True
+
+  def isCancelled(self) -> bool:
+    """Returns True if the job has been cancelled."""
+    return True if self.__cancelled__ else False
+
+  def start(self, pool: QThreadPool = None) -> None:
+    """Starts the job on the given pool, by default the global pool."""
+    pool = QThreadPool.globalInstance() if pool is None else pool
+    pool.start(self)
+
+  def run(self) -> None:
+    """Runs the job, emitting 'failed' if an exception is raised. Emits
+    'finished' when the job no longer uses its own state."""
+    try:
+      self._runJob()
+    except Exception as exception:
+      if not self.isCancelled():
+        self.signals.failed.emit(self.__generation__, str(exception))
+    finally:
+      self.signals.finished.emit(self.__generation__)
+
+  def _runJob(self) -> None:
+    """Subclasses implement the work here."""
+
+
+class OpenImageJob(_ImageJob):
+  """Decodes an image file into a tiled image. If progressive, a reduced
+  preview is emitted first, followed by the tiled image before its pixels
+  are loaded and the number of rows ready after each band. Rows reported
+  ready are not written again by the job. """
+
+  __progressive__ = False
+
+  def __init__(self, generation: int, fid: str,
+               progressive: bool = False) -> None:
+    _ImageJob.__init__(self, generation, fid)
+    self.__progressive__ = progressive
+
+  def _preview(self, preview: PixelBuffer) -> None:
+    """Emits the reduced preview."""
+    if not self.isCancelled():
+      self.signals.previewReady.emit(self.__generation__, preview)
+
+  def _allocated(self, image: TiledImage) -> None:
+    """Emits the tiled image before its pixels are loaded."""
+    if not self.isCancelled():
+      self.signals.allocated.emit(self.__generation__, image)
+
+  def _progress(self, rows: int, height: int) -> bool:
+    """Reports the progress and returns False once cancelled."""
+    if self.isCancelled():
+      return False
+    self.signals.progress.emit(self.__generation__, rows / height)
+    self.signals.rowsReady.emit(self.__generation__, rows)
+    return True
+
+  def _runJob(self) -> None:
+    """Decodes the file one band at a time."""
+    if self.__progressive__:
+      image = TiledImage.open(self.__file_name__, self._progress,
+                              self._preview, self._allocated)
+    else:
+      image = TiledImage.open(self.__file_name__, self._progress)
+    if image is not None and not self.isCancelled():
+      self.signals.opened.emit(self.__generation__, image)
+
+
+class SaveImageJob(_ImageJob):
+  """Saves a snapshot of a pixel buffer to a file. The pixels are first
+  copied, after which 'snapshotTaken' is emitted and the buffer may be
+  edited again while the copy is encoded. """
+
+  __pixel_buffer__ = None
+
+  def __init__(self, generation: int, fid: str, buffer: PixelBuffer) -> None:
+    _ImageJob.__init__(self, generation, fid)
+    self.__pixel_buffer__ = buffer
+
+  def _runJob(self) -> None:
+    """Copies the buffer and then encodes the copy."""
+    snapshot = self.__pixel_buffer__.copy()
+    self.__pixel_buffer__ = None
+    self.signals.snapshotTaken.emit(self.__generation__)
+    self.signals.progress.emit(self.__generation__, 0.5)
+    if self.isCancelled():
+      return
+    snapshot.save(self.__file_name__)
+    self.signals.progress.emit(self.__generation__, 1.)
+    self.signals.saved.emit(self.__generation__, self.__file_name__)
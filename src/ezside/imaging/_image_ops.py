@@ -0,0 +1,119 @@
+"""The image operations transform pixel buffers without any widgets. Each
+operation is a small picklable object, such that chains of operations can
+be sent to worker processes. Operations may modify the buffer received
+and return it, or return a new buffer."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TypeAlias, Sequence
+
+import numpy as np
+from PIL import Image
+
+from ezside.imaging import PixelBuffer, BrushStroke
+
+Box: TypeAlias = tuple[int, int, int, int]
+RGBA: TypeAlias = tuple[int, int, int, int]
+
+
+class ImageOp(ABC):
+  """Base class for the image operations. Subclasses must implement
+  'apply', and those that do not cannot be instantiated. """
+
+  @abstractmethod
+  def apply(self, buffer: PixelBuffer) -> PixelBuffer:
+    """Applies the operation to the buffer and returns the result."""
+
+  def getName(self) -> str:
+    """Returns the name used when reporting timings."""
+    return type(self).__name__
+
+  def __call__(self, buffer: PixelBuffer) -> PixelBuffer:
+    return self.apply(buffer)
+
+
+class Resize(ImageOp):
+  """Resizes the image. If only the width is given, the height keeps the
+  aspect ratio. If 'fit' is True, the image is scaled to fit within the
+  size given, keeping its aspect ratio. """
+
+  def __init__(self, width: int, height: int = None,
+               fit: bool = False) -> None:
+    self.width, self.height, self.fit = width, height, fit
+
+  def getSize(self, width: int, height: int) -> tuple[int, int]:
+    """Returns the size of the result given the size of the image."""
+    if self.height is None:
+      return self.width, max(round(height * self.width / width), 1)
+    if self.fit:
+      scale = min(self.width / width, self.height / height)
+      return max(round(width * scale), 1), max(round(height * scale), 1)
+    return self.width, self.height
+
+  def apply(self, buffer: PixelBuffer) -> PixelBuffer:
+    """Resamples the image with a Lanczos filter."""
+    size = self.getSize(buffer.width, buffer.height)
+    if size == (buffer.width, buffer.height):
+      return buffer
+    image = buffer.toImage().resize(size, Image.Resampling.LANCZOS)
+    return PixelBuffer.fromImage(image)
+
+
+class Fill(ImageOp):
+  """Fills the box (left, top, right, bottom) with the color, or the whole
+  image if no box is given. """
+
+  def __init__(self, color: RGBA, box: Box = None) -> None:
+    self.color, self.box = tuple(color), box
+
+  def apply(self, buffer: PixelBuffer) -> PixelBuffer:
+    """Writes the color to the region."""
+    box = self.box
+    if box is None:
+      box = (0, 0, buffer.width, buffer.height)
+    buffer.writeRegion(box, self.color)
+    return buffer
+
+
+class StrokeReplay(ImageOp):
+  """Paints a brush stroke through the points given in pixels. """
+
+  def __init__(self, points: Sequence[tuple[float, float]],
+               radius: float,
+               color: RGBA,
+               opacity: float = 1.,
+               hardness: float = 1.) -> None:
+    self.points = [(float(x), float(y)) for x, y in points]
+    self.radius, self.color = radius, tuple(color)
+    self.opacity, self.hardness = opacity, hardness
+
+  def apply(self, buffer: PixelBuffer) -> PixelBuffer:
+    """Paints the stroke into the buffer."""
+    if not self.points:
+      return buffer
+    stroke = BrushStroke(buffer, self.radius, self.color,
+                         self.opacity, self.hardness)
+    stroke.begin(*self.points[0])
+    for x, y in self.points[1:]:
+      stroke.strokeTo(x, y)
+    stroke.end()
+    return buffer
+
+
+class ColorBlend(ImageOp):
+  """Moves every pixel towards the color by the opacity. The alpha channel
+  is left unchanged. """
+
+  def __init__(self, color: tuple[int, int, int], opacity: float) -> None:
+    self.color, self.opacity = tuple(color)[:3], opacity
+
+  def apply(self, buffer: PixelBuffer) -> PixelBuffer:
+    """Blends the color into the buffer one band of rows at a time."""
+    color = np.asarray(self.color, dtype=np.float32)
+    for top in range(0, buffer.height, 256):
+      for part in buffer.splitBox((0, top, buffer.width, top + 256)):
+        band = buffer.region(part)[:, :, :3]
+        band[...] = np.rint(band + self.opacity * (color - band))
+    return buffer
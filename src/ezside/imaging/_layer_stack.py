@@ -0,0 +1,332 @@
+"""LayerStack holds the layers of an image and the composite shown. Each
+layer has its own pixel buffer, opacity, blend mode and visibility.
+Edits are made to the active layer, and recompositing every layer on
+every dab would take time in proportion to the number of layers. The
+stack therefore caches the composite of the visible layers below the
+active layer and the composite of those above it. When the active layer
+changes inside a box, only the cache below, the active layer and the
+cache above are combined inside the box.
+
+Compositing layers in normal mode is associative, so the layers above
+may be combined into a single cache. Other blend modes depend on the
+pixels below them, so if any visible layer above the active layer uses
+another mode, those layers are combined individually instead. The caches
+are rebuilt only when layers other than the active one change, when
+layers are added, removed or moved, and when another layer is made
+active.
+
+A stack of a single visible layer in normal mode at full opacity has the
+layer itself as its composite, requiring no compositing at all.
+
+Layers are blended with the kernels registered in 'ezside.imaging',
+acting on the slices inside the box."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from typing import TypeAlias
+
+from worktoy.text import monoSpace, typeMsg
+
+from ezside.imaging import TiledImage, blend, getBlendKernel
+
+Box: TypeAlias = tuple[int, int, int, int]
+
+
+class Layer:
+  """Layer is a pixel buffer with an opacity, blend mode and visibility.
+  Layers held by a stack should be changed through the stack, such that
+  the cached composites are updated. """
+
+  __pixel_buffer__ = None
+  __layer_name__ = None
+  __opacity__ = 1.
+  __blend_mode__ = 'normal'
+  __visible__ = True
+
+  def __init__(self, buffer: TiledImage, name: str) -> None:
+    self.__pixel_buffer__ = buffer
+    self.__layer_name__ = name
+
+  def getBuffer(self) -> TiledImage:
+    """Returns the pixel buffer of the layer."""
+    return self.__pixel_buffer__
+
+  def getName(self) -> str:
+    """Returns the name of the layer."""
+    return self.__layer_name__
+
+  def getOpacity(self) -> float:
+    """Returns the opacity of the layer between 0 and 1."""
+    return self.__opacity__
+
+  def getBlendMode(self) -> str:
+    """Returns the name of the blend mode of the layer."""
+    return self.__blend_mode__
+
+  def isVisible(self) -> bool:
+    """Returns True if the layer is visible."""
+    return True if self.__visible__ else False
+
+  def setOpacity(self, opacity: float) -> None:
+    """Sets the opacity of the layer between 0 and 1."""
+    if isinstance(opacity, bool) or not isinstance(opacity, (int, float)):
+      e = typeMsg('opacity', opacity, float)
+      raise TypeError(e)
+    if not 0. <= opacity <= 1.:
+      e = """The opacity must be between 0 and 1, but received: %s!"""
+      raise ValueError(e % str(opacity))
+    self.__opacity__ = float(opacity)
+
+  def setBlendMode(self, mode: str) -> None:
+    """Sets the blend mode of the layer to the registered mode of the
+    name given."""
+    if not isinstance(mode, str):
+      e = typeMsg('mode', mode, str)
+      raise TypeError(e)
+    getBlendKernel(mode)
+    self.__blend_mode__ = mode
+
+  def setVisible(self, visible: bool) -> None:
+    """Shows or hides the layer."""
+    if not isinstance(visible, bool):
+      e = typeMsg('visible', visible, bool)
+      raise TypeError(e)
+    self.__visible__ = visible
+
+  def isPassThrough(self) -> bool:
+    """Returns True if the layer is visible in normal mode at full
+    opacity, in which case compositing it over nothing yields the layer
+    itself."""
+    if self.__visible__ and self.__blend_mode__ == 'normal':
+      return True if self.__opacity__ >= 1. else False
+    return False
+
+
+class LayerStack:
+  """LayerStack holds the layers of an image and caches the composites
+  of the layers below and above the active layer. """
+
+  __band_height__ = 256
+  __layers__ = None
+  __active_index__ = 0
+  __composite__ = None
+  __below_cache__ = None
+  __above_cache__ = None
+  __above_layers__ = None
+
+  def __init__(self, base: TiledImage, name: str = None) -> None:
+    """The base becomes the bottom layer and the active layer."""
+    self.__layers__ = [Layer(base, 'Background' if name is None else name)]
+    self.__active_index__ = 0
+    self.invalidate()
+
+  def __len__(self) -> int:
+    return len(self.__layers__)
+
+  def getWidth(self) -> int:
+    """Returns the width of the layers."""
+    return self.__layers__[0].getBuffer().width
+
+  def getHeight(self) -> int:
+    """Returns the height of the layers."""
+    return self.__layers__[0].getBuffer().height
+
+  def getLayer(self, index: int) -> Layer:
+    """Returns the layer at the index, counted from the bottom."""
+    self._validateIndex(index)
+    return self.__layers__[index]
+
+  def getLayers(self) -> list[Layer]:
+    """Returns the layers from the bottom up."""
+    return [*self.__layers__, ]
+
+  def getActiveIndex(self) -> int:
+    """Returns the index of the active layer."""
+    return self.__active_index__
+
+  def getActiveLayer(self) -> Layer:
+    """Returns the active layer."""
+    return self.__layers__[self.__active_index__]
+
+  def getActiveBuffer(self) -> TiledImage:
+    """Returns the pixel buffer of the active layer."""
+    return self.getActiveLayer().getBuffer()
+
+  def contains(self, buffer: TiledImage) -> bool:
+    """Returns True if the buffer belongs to a layer of the stack."""
+    for layer in self.__layers__:
+      if layer.getBuffer() is buffer:
+        return True
+    return False
+
+  def getComposite(self) -> TiledImage:
+    """Returns the composite of the visible layers. The composite is
+    replaced when the layers change such that a separate composite
+    becomes required or no longer required."""
+    return self.__composite__
+
+  def _validateIndex(self, index: int) -> None:
+    """Raises IndexError if the index does not refer to a layer."""
+    if not 0 <= index < len(self.__layers__):
+      e = """Expected a layer index from 0 to %d, but received: %d!"""
+      raise IndexError(e % (len(self.__layers__) - 1, index))
+
+  def setActiveIndex(self, index: int) -> None:
+    """Makes the layer at the index active."""
+    self._validateIndex(index)
+    if index != self.__active_index__:
+      self.__active_index__ = index
+      self.invalidate()
+
+  def addLayer(self, name: str = None,
+               buffer: TiledImage = None) -> Layer:
+    """Adds a layer above the active layer and makes it active. Unless a
+    buffer is given, the layer is transparent."""
+    width, height = self.getWidth(), self.getHeight()
+    if buffer is None:
+      buffer = TiledImage(width, height, (0, 0, 0, 0))
+    if (buffer.width, buffer.height) != (width, height):
+      e = """The layer must be of size (%d, %d), but received a buffer of
+      size (%d, %d)!"""
+      args = (width, height, buffer.width, buffer.height)
+      raise ValueError(monoSpace(e % args))
+    name = 'Layer %d' % len(self.__layers__) if name is None else name
+    layer = Layer(buffer, name)
+    self.__active_index__ += 1
+    self.__layers__.insert(self.__active_index__, layer)
+    self.invalidate()
+    return layer
+
+  def removeLayer(self, index: int) -> Layer:
+    """Removes the layer at the index. The last layer cannot be
+    removed."""
+    self._validateIndex(index)
+    if len(self.__layers__) == 1:
+      e = """The last layer of the stack cannot be removed!"""
+      raise ValueError(e)
+    layer = self.__layers__.pop(index)
+    if index < self.__active_index__ or self.__active_index__ == len(self):
+      self.__active_index__ -= 1
+    self.invalidate()
+    return layer
+
+  def moveLayer(self, index: int, newIndex: int) -> None:
+    """Moves the layer at the index to the new index. The active layer
+    remains active."""
+    self._validateIndex(index)
+    self._validateIndex(newIndex)
+    active = self.getActiveLayer()
+    self.__layers__.insert(newIndex, self.__layers__.pop(index))
+    self.__active_index__ = self.__layers__.index(active)
+    self.invalidate()
+
+  def setLayerOpacity(self, index: int, opacity: float) -> None:
+    """Sets the opacity of the layer at the index."""
+    self._validateIndex(index)
+    self.__layers__[index].setOpacity(opacity)
+    self.invalidate()
+
+  def setLayerBlendMode(self, index: int, mode: str) -> None:
+    """Sets the blend mode of the layer at the index."""
+    self._validateIndex(index)
+    self.__layers__[index].setBlendMode(mode)
+    self.invalidate()
+
+  def setLayerVisible(self, index: int, visible: bool) -> None:
+    """Shows or hides the layer at the index."""
+    self._validateIndex(index)
+    self.__layers__[index].setVisible(visible)
+    self.invalidate()
+
+  def _allocate(self) -> None:
+    """Allocates the composite and the caches required by the current
+    layers. Buffers already of the right kind are kept."""
+    layers, active = self.__layers__, self.__active_index__
+    below = [layer for layer in layers[:active] if layer.isVisible()]
+    above = [layer for layer in layers[active + 1:] if layer.isVisible()]
+    width, height, clear = self.getWidth(), self.getHeight(), (0, 0, 0, 0)
+    activeLayer = layers[active]
+    if not below and not above and activeLayer.isPassThrough():
+      self.__composite__ = activeLayer.getBuffer()
+    elif self.__composite__ is None or self.contains(self.__composite__):
+      self.__composite__ = TiledImage(width, height, clear)
+    if not below:
+      self.__below_cache__ = None
+    elif self.__below_cache__ is None:
+      self.__below_cache__ = TiledImage(width, height, clear)
+    if not above:
+      self.__above_cache__, self.__above_layers__ = None, []
+    elif all(layer.getBlendMode() == 'normal' for layer in above):
+      self.__above_layers__ = []
+      if self.__above_cache__ is None:
+        self.__above_cache__ = TiledImage(width, height, clear)
+    else:
+      self.__above_cache__, self.__above_layers__ = None, above
+
+  def _refreshBox(self, box: Box) -> None:
+    """Rebuilds the caches inside the box and then the composite. The
+    buffers share the same tiles, so each part of the box is a region of
+    every buffer."""
+    layers, active = self.__layers__, self.__active_index__
+    for cache, cacheLayers in ((self.__below_cache__, layers[:active]),
+                               (self.__above_cache__, layers[active + 1:])):
+      if cache is None:
+        continue
+      for part in cache.splitBox(box):
+        out = cache.region(part)
+        out[...] = 0
+        for layer in cacheLayers:
+          if layer.isVisible():
+            src = layer.getBuffer().region(part)
+            blend(out, src, layer.getBlendMode(), layer.getOpacity())
+    self.update(box)
+
+  def invalidate(self, box: Box = None) -> None:
+    """Rebuilds the caches and the composite inside the box. This is
+    required when layers other than the active layer change. If no box is
+    given, the layers may have been added, removed, reordered or
+    changed in appearance, and the entire image is rebuilt one band at a
+    time."""
+    if box is not None:
+      return self._refreshBox(self._clip(box))
+    self._allocate()
+    width, height = self.getWidth(), self.getHeight()
+    for top in range(0, height, self.__band_height__):
+      bottom = min(top + self.__band_height__, height)
+      self._refreshBox((0, top, width, bottom))
+
+  def _clip(self, box: Box) -> Box:
+    """Returns the box clipped to the layers."""
+    left, top = max(box[0], 0), max(box[1], 0)
+    right = min(box[2], self.getWidth())
+    bottom = min(box[3], self.getHeight())
+    return left, top, max(right, left), max(bottom, top)
+
+  def update(self, box: Box) -> None:
+    """Recomposites the box after the active layer changed inside it.
+    Only the cache below, the active layer and the cache above are
+    combined."""
+    composite = self.__composite__
+    activeLayer = self.getActiveLayer()
+    if composite is activeLayer.getBuffer():
+      return
+    left, top, right, bottom = self._clip(box)
+    if left >= right or top >= bottom:
+      return
+    for part in composite.splitBox((left, top, right, bottom)):
+      out = composite.region(part)
+      if self.__below_cache__ is None:
+        out[...] = 0
+      else:
+        out[...] = self.__below_cache__.region(part)
+      if activeLayer.isVisible():
+        src = activeLayer.getBuffer().region(part)
+        blend(out, src, activeLayer.getBlendMode(),
+              activeLayer.getOpacity())
+      if self.__above_cache__ is not None:
+        blend(out, self.__above_cache__.region(part), 'normal')
+      for layer in self.__above_layers__:
+        src = layer.getBuffer().region(part)
+        blend(out, src, layer.getBlendMode(), layer.getOpacity())
+    composite.markDirty((left, top, right, bottom))
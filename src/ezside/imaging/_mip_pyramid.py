@@ -0,0 +1,124 @@
+"""MipPyramid provides downsampled levels of a pixel buffer. Level k has
+half the width and height of level k - 1, with level 0 being the buffer
+itself. Levels are tiled images created at first use, and tiles are
+computed from the level below only when requested. Edits to the buffer
+invalidate only the tiles covering the box edited on each level."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from math import log2, floor
+from typing import TypeAlias, Optional
+
+import numpy as np
+
+from ezside.imaging import PixelBuffer, TiledImage
+
+Box: TypeAlias = tuple[int, int, int, int]
+
+
+def _downsample(array: np.ndarray) -> np.ndarray:
+  """Returns the array halved in both dimensions by averaging each square
+  of four pixels. Odd dimensions repeat the last row or column."""
+  if array.shape[0] % 2:
+    array = np.concatenate((array, array[-1:]), axis=0)
+  if array.shape[1] % 2:
+    array = np.concatenate((array, array[:, -1:]), axis=1)
+  out = array[0::2, 0::2].astype(np.uint16)
+  out += array[1::2, 0::2]
+  out += array[0::2, 1::2]
+  out += array[1::2, 1::2]
+  out += 2
+  out >>= 2
+  return out.astype(np.uint8)
+
+
+def _scaleBox(box: Box, level: int) -> Box:
+  """Returns the smallest box on the given level covering the box on
+  level 0."""
+  left, top, right, bottom = box
+  n = 1 << level
+  return left // n, top // n, -(-right // n), -(-bottom // n)
+
+
+class MipPyramid:
+  """MipPyramid provides downsampled levels of a pixel buffer. """
+
+  __base_buffer__ = None
+  __levels__ = None
+  __valid_tiles__ = None
+
+  def __init__(self, base: PixelBuffer) -> None:
+    self.__base_buffer__ = base
+    self.__levels__ = {}
+    self.__valid_tiles__ = {}
+
+  def getLevelCount(self) -> int:
+    """Returns the number of levels including level 0. The last level fits
+    within a single tile."""
+    longest = max(self.__base_buffer__.width, self.__base_buffer__.height)
+    count = 1
+    while longest > TiledImage.__tile_size__:
+      longest = -(-longest // 2)
+      count += 1
+    return count
+
+  def levelFor(self, zoom: float) -> int:
+    """Returns the level best suited for painting at the given zoom. This
+    is the smallest level having at least as many pixels as the screen
+    area painted."""
+    if zoom >= 1:
+      return 0
+    return min(floor(log2(1 / zoom)), self.getLevelCount() - 1)
+
+  def _getLevel(self, level: int) -> TiledImage:
+    """Returns the tiled image of the level, creating it if required."""
+    if level not in self.__levels__:
+      n = 1 << level
+      width = -(-self.__base_buffer__.width // n)
+      height = -(-self.__base_buffer__.height // n)
+      levelImage = TiledImage(width, height)
+      self.__levels__[level] = levelImage
+      rows, cols = levelImage.getTileCount()
+      self.__valid_tiles__[level] = np.zeros((rows, cols), dtype=bool)
+    return self.__levels__[level]
+
+  def invalidate(self, box: Optional[Box]) -> None:
+    """Marks the tiles covering the box on level 0 as outdated on every
+    level created."""
+    if box is None:
+      return
+    for level, levelImage in self.__levels__.items():
+      for row, col in levelImage.getTilesIn(_scaleBox(box, level)):
+        self.__valid_tiles__[level][row, col] = False
+
+  def invalidateAll(self) -> None:
+    """Marks every tile on every level as outdated."""
+    for valid in self.__valid_tiles__.values():
+      valid[...] = False
+
+  def getLevel(self, level: int, box: Box = None) -> PixelBuffer:
+    """Returns the buffer of the given level. Tiles overlapping the box,
+    given in the coordinates of the level, are brought up to date first.
+    If no box is given, every tile is brought up to date."""
+    if not level:
+      return self.__base_buffer__
+    levelImage = self._getLevel(level)
+    if box is None:
+      box = (0, 0, levelImage.width, levelImage.height)
+    valid = self.__valid_tiles__[level]
+    tiles = [t for t in levelImage.getTilesIn(box) if not valid[t]]
+    if not tiles:
+      return levelImage
+    boxes = [levelImage.getTileBox(tile) for tile in tiles]
+    sourceBox = (2 * min(b[0] for b in boxes), 2 * min(b[1] for b in boxes),
+                 2 * max(b[2] for b in boxes), 2 * max(b[3] for b in boxes))
+    source = self.getLevel(level - 1, sourceBox)
+    for tile, (left, top, right, bottom) in zip(tiles, boxes):
+      sourceRegion = source.readRegion((2 * left, 2 * top,
+                                        min(2 * right, source.width),
+                                        min(2 * bottom, source.height)))
+      levelImage.region((left, top, right, bottom))[...] = _downsample(
+          sourceRegion)
+      valid[tile] = True
+    return levelImage
@@ -0,0 +1,136 @@
+"""Pipeline applies a chain of image operations to many files without
+any widgets. Images are loaded into pixel buffers, passed through the
+operations and saved. The work is spread across a process pool with a
+bounded number of images in flight, such that memory use does not grow
+with the number of files. The time spent in each stage is recorded for
+every image and can be summarized across a run."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterable, Iterator, TypeAlias
+
+from ezside.imaging import PixelBuffer, ImageOp
+
+Timings: TypeAlias = dict[str, float]
+
+
+def _stageNames(ops: list[ImageOp]) -> list[str]:
+  """Returns the names of the stages in order. Operations of the same
+  type are numbered to keep their names apart."""
+  names = ['load']
+  for index, op in enumerate(ops):
+    names.append('%d:%s' % (index, op.getName()))
+  return [*names, 'save']
+
+
+def _processImage(ops: list[ImageOp], src: str, dst: str) -> Timings:
+  """Loads the source, applies the operations and saves the result to
+  the destination. Returns the time spent in each stage."""
+  names = iter(_stageNames(ops))
+  timings = {}
+  t0 = time.perf_counter()
+  buffer = PixelBuffer.open(src)
+  t1 = time.perf_counter()
+  timings[next(names)] = t1 - t0
+  for op in ops:
+    buffer = op.apply(buffer)
+    t0, t1 = t1, time.perf_counter()
+    timings[next(names)] = t1 - t0
+  directory = os.path.dirname(os.path.abspath(dst))
+  os.makedirs(directory, exist_ok=True)
+  buffer.save(dst)
+  timings[next(names)] = time.perf_counter() - t1
+  return timings
+
+
+class Pipeline:
+  """Pipeline applies a chain of image operations to many files. """
+
+  __image_ops__ = None
+  __max_workers__ = None
+  __max_pending__ = None
+
+  def __init__(self, *ops: ImageOp, workers: int = None,
+               maxPending: int = None) -> None:
+    """The number of workers defaults to the number of processors. At most
+    'maxPending' images are in flight at once, by default twice the
+    number of workers."""
+    for op in ops:
+      if not isinstance(op, ImageOp):
+        e = """Expected instances of ImageOp, but received: %s!"""
+        raise TypeError(e % type(op).__name__)
+    self.__image_ops__ = [*ops, ]
+    self.__max_workers__ = workers or os.cpu_count() or 1
+    self.__max_pending__ = maxPending or 2 * self.__max_workers__
+
+  def then(self, op: ImageOp) -> Pipeline:
+    """Appends the operation to the chain and returns the pipeline."""
+    if not isinstance(op, ImageOp):
+      e = """Expected an instance of ImageOp, but received: %s!"""
+      raise TypeError(e % type(op).__name__)
+    self.__image_ops__.append(op)
+    return self
+
+  def getStageNames(self) -> list[str]:
+    """Returns the names of the stages timed for each image."""
+    return _stageNames(self.__image_ops__)
+
+  def processOne(self, src: str, dst: str) -> Timings:
+    """Processes a single image in the current process."""
+    return _processImage(self.__image_ops__, src, dst)
+
+  def iterRun(self, jobs: Iterable[tuple[str, str]],
+              ) -> Iterator[tuple[str, str, Timings]]:
+    """Processes each pair of source and destination files on the
+    process pool. Yields the source, destination and timings of each
+    image as it completes, which need not be the order given. Exceptions
+    raised while processing an image are raised here."""
+    jobs = iter(jobs)
+    ops = self.__image_ops__
+    with ProcessPoolExecutor(self.__max_workers__) as executor:
+      pending = {}
+      while True:
+        while len(pending) < self.__max_pending__:
+          job = next(jobs, None)
+          if job is None:
+            break
+          src, dst = job
+          pending[executor.submit(_processImage, ops, src, dst)] = job
+        if not pending:
+          return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+          src, dst = pending.pop(future)
+          yield src, dst, future.result()
+
+  def run(self, jobs: Iterable[tuple[str, str]]) -> list[Timings]:
+    """Processes every pair of source and destination files and returns
+    the timings of each image in order of completion."""
+    return [timings for _, _, timings in self.iterRun(jobs)]
+
+  def summarize(self, results: list[Timings]) -> Timings:
+    """Returns the total time spent in each stage across the results."""
+    out = {name: 0. for name in self.getStageNames()}
+    for timings in results:
+      for name, value in timings.items():
+        out[name] = out.get(name, 0.) + value
+    return out
+
+  def formatSummary(self, results: list[Timings], wallTime: float = None,
+                    ) -> str:
+    """Returns a table of the total and mean time of each stage. If the
+    wall time of the run is given, the throughput is included."""
+    totals = self.summarize(results)
+    count = max(len(results), 1)
+    lines = ['%-24s %10s %10s' % ('stage', 'total [s]', 'mean [ms]')]
+    for name, total in totals.items():
+      lines.append('%-24s %10.3f %10.2f' % (name, total,
+                                           1000 * total / count))
+    if wallTime is not None:
+      lines.append('%d images in %.3f s, %.1f images/s' % (
+          len(results), wallTime, len(results) / max(wallTime, 1e-9)))
+    return '\n'.join(lines)
@@ -0,0 +1,229 @@
+"""PixelBuffer owns the pixels of an image as a numpy array of shape
+(height, width, 4) holding 8-bit RGBA values. The QImage returned by
+'asQImage' wraps the memory of the array directly, such that edits made
+to the array are visible to the image without copying. The buffer keeps
+both the array and the image, which keeps the memory alive for as long as
+the image is in use.
+
+Code that must also work on buffers storing their pixels in other ways,
+such as TiledImage, accesses them through 'splitBox', 'region',
+'readRegion' and 'writeRegion' rather than through the array. The box
+(left, top, right, bottom) given to 'region' must then be one of the
+parts returned by 'splitBox', and the view returned may be edited in
+place.
+
+Conversion to and from torch tensors is supported for code requiring
+them. Tensors are float32 of shape (channels, height, width) with values
+between 0 and 1. The torch module is imported only when a tensor is
+requested."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, TypeAlias
+
+import numpy as np
+from PIL import Image
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QImage
+from worktoy.desc import Field
+from worktoy.meta import BaseObject
+from worktoy.text import monoSpace
+
+if TYPE_CHECKING:
+  from torch import Tensor
+
+Box: TypeAlias = tuple[int, int, int, int]
+
+
+class PixelBuffer(BaseObject):
+  """PixelBuffer owns the pixels of an image as an RGBA numpy array. """
+
+  __pixel_array__ = None
+  __q_image__ = None
+  __width__ = None
+  __height__ = None
+
+  array = Field()
+  width = Field()
+  height = Field()
+  size = Field()
+
+  def __init__(self, width: int, height: int, fill: tuple = None) -> None:
+    """Creates a buffer of the given size filled with the given RGBA
+    color, which defaults to opaque white."""
+    BaseObject.__init__(self)
+    if width < 1 or height < 1:
+      e = """The size of the buffer must be positive, but received:
+      (%d, %d)!"""
+      raise ValueError(monoSpace(e % (width, height)))
+    fill = (255, 255, 255, 255) if fill is None else fill
+    self.__width__, self.__height__ = width, height
+    self._allocate(width, height)
+    self._fill(fill)
+
+  def _allocate(self, width: int, height: int) -> None:
+    """Allocates the uninitialized array holding the pixels. Subclasses
+    may reimplement this method, along with '_fill', 'region' and
+    'splitBox', to provide other storage."""
+    self.__pixel_array__ = np.empty((height, width, 4), dtype=np.uint8)
+
+  def _fill(self, fill: tuple) -> None:
+    """Fills every pixel with the given RGBA color."""
+    self.__pixel_array__[...] = fill
+
+  @classmethod
+  def fromArray(cls, array: np.ndarray) -> PixelBuffer:
+    """Creates a buffer from an array of shape (height, width) or (height,
+    width, channels) with 1, 3 or 4 channels. Floating point arrays are
+    understood to hold values between 0 and 1. The values are copied."""
+    if array.ndim == 2:
+      array = array[:, :, None]
+    if array.ndim != 3 or array.shape[2] not in (1, 3, 4):
+      e = """Expected an array of shape (height, width, channels) with 1,
+      3 or 4 channels, but received an array of shape: %s!"""
+      raise ValueError(monoSpace(e % str(array.shape)))
+    if np.issubdtype(array.dtype, np.floating):
+      array = np.rint(np.clip(array, 0., 1.) * 255.)
+    height, width, channels = array.shape
+    out = cls(width, height)
+    for top in range(0, height, 256):
+      band = array[top:top + 256]
+      if channels == 4:
+        pixels = band
+      else:
+        pixels = np.full((*band.shape[:2], 4), 255, dtype=np.uint8)
+        pixels[:, :, :3] = band
+      out.writeRegion((0, top, width, top + band.shape[0]), pixels)
+    return out
+
+  @classmethod
+  def fromImage(cls, image: Image.Image) -> PixelBuffer:
+    """Creates a buffer from a PIL image."""
+    return cls.fromArray(np.asarray(image.convert('RGBA')))
+
+  @classmethod
+  def open(cls, fid: str) -> PixelBuffer:
+    """Creates a buffer from the image file."""
+    with Image.open(fid) as image:
+      return cls.fromImage(image)
+
+  @classmethod
+  def fromTensor(cls, tensor: Tensor) -> PixelBuffer:
+    """Creates a buffer from a tensor of shape (channels, height, width)
+    with values between 0 and 1."""
+    array = tensor.detach().cpu().numpy()
+    if array.ndim == 2:
+      array = array[None, :, :]
+    return cls.fromArray(array.transpose(1, 2, 0))
+
+  def toTensor(self, alpha: bool = False) -> Tensor:
+    """Returns a float32 tensor of shape (channels, height, width) with
+    values between 0 and 1. The alpha channel is included only if
+    'alpha' is True. The values are copied."""
+    import torch
+    channels = 4 if alpha else 3
+    array = self.readRegion(self.getBox())[:, :, :channels]
+    array = array.transpose(2, 0, 1)
+    array = np.ascontiguousarray(array, dtype=np.float32) / 255.
+    return torch.from_numpy(array)
+
+  def copy(self) -> PixelBuffer:
+    """Returns a buffer of the same type holding a copy of the pixels. The
+    pixels are copied in bands of rows, one part at a time."""
+    out = type(self)(self.width, self.height)
+    for top in range(0, self.height, 256):
+      for box in self.splitBox((0, top, self.width, top + 256)):
+        out.region(box)[...] = self.region(box)
+    return out
+
+  def toImage(self, ) -> Image.Image:
+    """Returns a copy of the pixels as a PIL image."""
+    return Image.fromarray(self.readRegion(self.getBox()), 'RGBA')
+
+  def asQImage(self) -> QImage:
+    """Returns the QImage sharing memory with the array. The image is
+    created once and reused."""
+    if self.__q_image__ is None:
+      array = self.__pixel_array__
+      height, width = array.shape[:2]
+      fmt = QImage.Format.Format_RGBA8888
+      self.__q_image__ = QImage(array.data, width, height,
+                                array.strides[0], fmt)
+    return self.__q_image__
+
+  def getBox(self) -> Box:
+    """Returns the box (0, 0, width, height) covering every pixel."""
+    return 0, 0, self.__width__, self.__height__
+
+  def splitBox(self, box: Box) -> list[Box]:
+    """Returns the box clipped to the buffer and divided into parts, such
+    that 'region' returns a view of each part. The buffer holds its
+    pixels in a single array, so the clipped box is the only part. Empty
+    boxes have no parts."""
+    left, top = max(box[0], 0), max(box[1], 0)
+    right = min(box[2], self.__width__)
+    bottom = min(box[3], self.__height__)
+    if left >= right or top >= bottom:
+      return []
+    return [(left, top, right, bottom)]
+
+  def region(self, box: Box) -> np.ndarray:
+    """Returns a view of the pixels in the box (left, top, right, bottom)
+    with right and bottom exclusive."""
+    left, top, right, bottom = box
+    return self.__pixel_array__[top:bottom, left:right]
+
+  def readRegion(self, box: Box) -> np.ndarray:
+    """Returns a copy of the pixels in the box, which must lie inside the
+    buffer, as an array of shape (height, width, 4)."""
+    left, top, right, bottom = box
+    out = np.empty((bottom - top, right - left, 4), dtype=np.uint8)
+    for l, t, r, b in self.splitBox(box):
+      out[t - top:b - top, l - left:r - left] = self.region((l, t, r, b))
+    return out
+
+  def writeRegion(self, box: Box, pixels: np.ndarray) -> None:
+    """Writes the pixels to the box, which must lie inside the buffer.
+    The pixels are either an array of shape (height, width, 4) matching
+    the box or a single RGBA color."""
+    left, top = box[:2]
+    pixels = np.asarray(pixels)
+    for l, t, r, b in self.splitBox(box):
+      if pixels.ndim == 3:
+        self.region((l, t, r, b))[...] = pixels[t - top:b - top,
+                                                l - left:r - left]
+      else:
+        self.region((l, t, r, b))[...] = pixels
+
+  def save(self, fid: str) -> None:
+    """Saves the pixels to the file. The format is given by the file
+    extension."""
+    if not self.asQImage().save(fid):
+      e = """Unable to save image to: '%s'!"""
+      raise OSError(e % fid)
+
+  @array.GET
+  def _getArray(self) -> np.ndarray:
+    """Getter-function for the pixel array. Buffers storing their pixels
+    in other ways have no such array."""
+    if self.__pixel_array__ is None:
+      e = """%s does not hold its pixels in a single array! Use 'splitBox'
+      and 'region' instead."""
+      raise TypeError(monoSpace(e % type(self).__name__))
+    return self.__pixel_array__
+
+  @width.GET
+  def _getWidth(self) -> int:
+    """Getter-function for the width"""
+    return self.__width__
+
+  @height.GET
+  def _getHeight(self) -> int:
+    """Getter-function for the height"""
+    return self.__height__
+
+  @size.GET
+  def _getSize(self) -> QSize:
+    """Getter-function for the size"""
+    return QSize(self.width, self.height)
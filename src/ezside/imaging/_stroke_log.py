@@ -0,0 +1,296 @@
+"""StrokeLog records brush strokes as they are painted, such that they
+can be replayed deterministically without any widgets. Each point of a
+stroke is stored as a record of timestamp, position, radius, color and
+stroke number in a growable numpy structured array. Records are 28 bytes
+each. The index of the layer painted on, the blend mode and the flow are
+the same for every point of a stroke, and are stored once per stroke.
+
+The log stores the size of the image the strokes were painted on, along
+with the opacity, hardness and spacing of the brush. Replaying onto an
+image of a different size scales positions and radii accordingly.
+
+Files begin with a fixed header followed by the raw records and then the
+raw settings of each stroke, allowing logs to be written and read
+without parsing each record."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import struct
+import time
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from worktoy.text import monoSpace
+
+from ezside.imaging import PixelBuffer, BrushStroke, getBlendKernel
+
+StrokeRecord = np.dtype([
+    ('t', '<f8'),
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('r', '<f4'),
+    ('rgba', 'u1', (4,)),
+    ('stroke', '<u4'),
+])
+
+StrokeInfo = np.dtype([
+    ('stroke', '<u4'),
+    ('layer', '<u4'),
+    ('flow', '<f4'),
+    ('mode', 'S16'),
+])
+
+_Magic = b'EZSTROKE'
+_Version = 2
+_Header = struct.Struct('<8sHIIfffQQ')
+
+
+class StrokeLog:
+  """StrokeLog records brush strokes for deterministic replay. """
+
+  __records__ = None
+  __count__ = 0
+  __stroke_id__ = 0
+  __stroke_info__ = None
+  __redo_records__ = None
+  __start_time__ = None
+  __image_width__ = 0
+  __image_height__ = 0
+  __opacity__ = 1.
+  __hardness__ = 1.
+  __spacing__ = 0.25
+
+  def __init__(self, width: int = 0, height: int = 0,
+               opacity: float = 1., hardness: float = 1.,
+               spacing: float = 0.25) -> None:
+    """The size given is that of the image painted on. The opacity,
+    hardness and spacing are those of the brush."""
+    self.reset(width, height, opacity, hardness, spacing)
+
+  def reset(self, width: int, height: int, opacity: float = None,
+            hardness: float = None, spacing: float = None) -> None:
+    """Removes every record and sets the size of the image painted on.
+    Brush settings not given are kept."""
+    self.__records__ = np.zeros(256, dtype=StrokeRecord)
+    self.__count__ = 0
+    self.__stroke_id__ = 0
+    self.__stroke_info__ = {}
+    self.__redo_records__ = []
+    self.__start_time__ = time.monotonic()
+    self.__image_width__, self.__image_height__ = width, height
+    if opacity is not None:
+      self.__opacity__ = opacity
+    if hardness is not None:
+      self.__hardness__ = hardness
+    if spacing is not None:
+      self.__spacing__ = spacing
+
+  def __len__(self) -> int:
+    return self.__count__
+
+  def getRecords(self) -> np.ndarray:
+    """Returns a view of the records in the order recorded."""
+    return self.__records__[:self.__count__]
+
+  def getStrokeCount(self) -> int:
+    """Returns the number of strokes recorded, excluding those undone."""
+    strokes = self.getRecords()['stroke']
+    if not len(strokes):
+      return 0
+    return int(np.count_nonzero(np.diff(strokes))) + 1
+
+  def getImageSize(self) -> tuple[int, int]:
+    """Returns the size of the image the strokes were painted on."""
+    return self.__image_width__, self.__image_height__
+
+  def _reserve(self, count: int) -> None:
+    """Grows the array to hold at least the given number of records. The
+    capacity is doubled, such that appending takes constant amortized
+    time."""
+    capacity = len(self.__records__)
+    if count <= capacity:
+      return
+    while capacity < count:
+      capacity *= 2
+    records = np.zeros(capacity, dtype=StrokeRecord)
+    records[:self.__count__] = self.__records__[:self.__count__]
+    self.__records__ = records
+
+  def getStrokeInfo(self, stroke: int) -> tuple[int, str, float]:
+    """Returns the index of the layer, the blend mode and the flow of the
+    stroke having the number given."""
+    return self.__stroke_info__.get(stroke, (0, 'normal', 1.))
+
+  def beginStroke(self, layer: int = 0, mode: str = 'normal',
+                  flow: float = 1.) -> None:
+    """Begins a new stroke painted on the layer at the index with the
+    blend mode and flow given. Strokes undone are kept until the stroke
+    is committed, such that a stroke discarded does not prevent redoing
+    them."""
+    getBlendKernel(mode)
+    if len(mode.encode('ascii')) > StrokeInfo['mode'].itemsize:
+      e = """The name of the blend mode must be at most %d characters, but
+      received: '%s'!"""
+      raise ValueError(monoSpace(e % (StrokeInfo['mode'].itemsize, mode)))
+    self.__stroke_id__ += 1
+    self.__stroke_info__[self.__stroke_id__] = (layer, mode, float(flow))
+
+  def commitStroke(self) -> None:
+    """Keeps the current stroke, discarding the strokes undone."""
+    for records in self.__redo_records__:
+      self.__stroke_info__.pop(int(records['stroke'][0]), None)
+    self.__redo_records__ = []
+
+  def addPoint(self, x: float, y: float, radius: float, rgba: tuple,
+               t: float = None) -> None:
+    """Appends a point to the current stroke. The timestamp defaults to
+    the seconds passed since the log was reset."""
+    if not self.__stroke_id__:
+      self.beginStroke()
+    t = time.monotonic() - self.__start_time__ if t is None else t
+    self._reserve(self.__count__ + 1)
+    self.__records__[self.__count__] = (t, x, y, radius, tuple(rgba),
+                                        self.__stroke_id__)
+    self.__count__ += 1
+
+  def _lastStrokeStart(self) -> int:
+    """Returns the index of the first record of the last stroke."""
+    records = self.getRecords()
+    if not len(records):
+      return 0
+    last = records['stroke'][-1]
+    return int(np.searchsorted(records['stroke'], last))
+
+  def discardStroke(self) -> None:
+    """Removes the records of the current stroke, leaving the strokes
+    undone in place."""
+    records = self.getRecords()
+    if len(records) and records['stroke'][-1] == self.__stroke_id__:
+      self.__count__ = self._lastStrokeStart()
+    self.__stroke_info__.pop(self.__stroke_id__, None)
+
+  def undoStroke(self) -> bool:
+    """Moves the records of the last stroke aside, such that they are
+    not replayed. Returns False if no stroke is recorded."""
+    if not self.__count__:
+      return False
+    start = self._lastStrokeStart()
+    self.__redo_records__.append(self.getRecords()[start:].copy())
+    self.__count__ = start
+    return True
+
+  def redoStroke(self) -> bool:
+    """Restores the records of the stroke most recently undone. Returns
+    False if no stroke has been undone."""
+    if not self.__redo_records__:
+      return False
+    records = self.__redo_records__.pop()
+    self._reserve(self.__count__ + len(records))
+    self.__records__[self.__count__:self.__count__ + len(records)] = records
+    self.__count__ += len(records)
+    return True
+
+  def iterStrokes(self) -> Iterator[np.ndarray]:
+    """Yields the records of each stroke in the order painted."""
+    records = self.getRecords()
+    if not len(records):
+      return
+    breaks = np.flatnonzero(np.diff(records['stroke'])) + 1
+    yield from np.split(records, breaks)
+
+  def replay(self, target: PixelBuffer | Sequence[PixelBuffer],
+             ) -> PixelBuffer | Sequence[PixelBuffer]:
+    """Paints every stroke onto the target, which is either a single
+    buffer receiving every stroke or the buffers of the layers from the
+    bottom up, in which case each stroke is painted on the buffer of its
+    layer. If the buffers differ in size from the image the strokes were
+    painted on, positions are scaled to the buffers and radii by the mean
+    of the horizontal and vertical scales. Each stroke uses the radius
+    and color of its first point."""
+    buffers = [target] if isinstance(target, PixelBuffer) else target
+    width, height = buffers[0].width, buffers[0].height
+    sx = width / (self.__image_width__ or width)
+    sy = height / (self.__image_height__ or height)
+    scale = (sx + sy) / 2
+    for records in self.iterStrokes():
+      first = records[0]
+      layer, mode, flow = self.getStrokeInfo(int(first['stroke']))
+      if isinstance(target, PixelBuffer):
+        buffer = target
+      elif layer < len(buffers):
+        buffer = buffers[layer]
+      else:
+        e = """The stroke was painted on layer %d, but only %d buffers were
+        given!"""
+        raise IndexError(monoSpace(e % (layer, len(buffers))))
+      stroke = BrushStroke(buffer, max(float(first['r']) * scale, .5),
+                           tuple(first['rgba']), self.__opacity__,
+                           self.__hardness__, self.__spacing__,
+                           flow=flow, mode=mode)
+      xs, ys = records['x'] * sx, records['y'] * sy
+      stroke.begin(float(xs[0]), float(ys[0]))
+      for x, y in zip(xs[1:].tolist(), ys[1:].tolist()):
+        stroke.strokeTo(x, y)
+      stroke.end()
+    return target
+
+  def _getInfoArray(self) -> np.ndarray:
+    """Returns the settings of the strokes having records."""
+    strokes = np.unique(self.getRecords()['stroke']).tolist()
+    out = np.zeros(len(strokes), dtype=StrokeInfo)
+    for index, stroke in enumerate(strokes):
+      layer, mode, flow = self.getStrokeInfo(stroke)
+      out[index] = (stroke, layer, flow, mode.encode('ascii'))
+    return out
+
+  def toBytes(self) -> bytes:
+    """Returns the header followed by the raw records and the raw
+    settings of each stroke."""
+    info = self._getInfoArray()
+    header = _Header.pack(_Magic, _Version, self.__image_width__,
+                          self.__image_height__, self.__opacity__,
+                          self.__hardness__, self.__spacing__,
+                          self.__count__, len(info))
+    return header + self.getRecords().tobytes() + info.tobytes()
+
+  @classmethod
+  def fromBytes(cls, data: bytes) -> StrokeLog:
+    """Creates a log from bytes returned by 'toBytes'."""
+    if len(data) < _Header.size:
+      e = """Stroke log data is too short to hold a header!"""
+      raise ValueError(e)
+    values = _Header.unpack_from(data)
+    magic, version, width, height, opacity, hardness, spacing = values[:7]
+    count, infoCount = values[7:]
+    if magic != _Magic:
+      e = """Data does not begin with the stroke log header!"""
+      raise ValueError(e)
+    if version != _Version:
+      e = """Unsupported stroke log version: %d!"""
+      raise ValueError(e % version)
+    out = cls(width, height, opacity, hardness, spacing)
+    records = np.frombuffer(data, StrokeRecord, count, _Header.size)
+    offset = _Header.size + count * StrokeRecord.itemsize
+    for info in np.frombuffer(data, StrokeInfo, infoCount, offset):
+      mode = info['mode'].decode('ascii')
+      out.__stroke_info__[int(info['stroke'])] = (
+          int(info['layer']), mode, float(info['flow']))
+    out._reserve(count)
+    out.__records__[:count] = records
+    out.__count__ = count
+    if count:
+      out.__stroke_id__ = int(records['stroke'][-1])
+    return out
+
+  def save(self, fid: str) -> None:
+    """Writes the log to the file."""
+    with open(fid, 'wb') as file:
+      file.write(self.toBytes())
+
+  @classmethod
+  def load(cls, fid: str) -> StrokeLog:
+    """Reads the log from the file."""
+    with open(fid, 'rb') as file:
+      return cls.fromBytes(file.read())
@@ -0,0 +1,345 @@
+"""TiledImage is a PixelBuffer for images too large to hold in memory.
+The pixels are stored tile by tile in an array memory mapped to a scratch
+file, such that each tile of 256 by 256 pixels occupies a single run of
+the file and only the tiles in use occupy memory. Views of single tiles
+are available from 'region', and 'splitBox' divides larger boxes into
+parts each inside a single tile. Each tile has its own QImage sharing the
+memory of the tile, which lets the widgets draw only the tiles in view.
+
+Images are opened one band of rows, a tile high, at a time. Files holding
+their pixels uncompressed in a single run, such as BMP, PPM and TGA files
+and uncompressed TIFF files, are read band by band directly from the
+file. Other formats are decoded by Pillow, after which each band is
+converted to RGBA and written to its tiles separately. The reduced
+preview shown while opening is likewise sampled directly from files
+holding uncompressed pixels, and JPEG files are decoded at reduced
+scale.
+
+PNG files are saved by writing each band as it is read from the tiles.
+Other formats are saved by first assembling the rows in a second scratch
+file, from which the encoder then reads them."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+import zlib
+from math import ceil
+from threading import Lock
+from typing import TypeAlias, Optional, Callable, BinaryIO, Iterator
+
+import numpy as np
+from PIL import Image
+from PySide6.QtGui import QImage
+from worktoy.text import monoSpace
+
+from ezside.imaging import PixelBuffer
+
+Box: TypeAlias = tuple[int, int, int, int]
+Tile: TypeAlias = tuple[int, int]
+Progress: TypeAlias = Callable[[int, int], bool]
+RawLayout: TypeAlias = tuple[int, str, int, int]
+
+_openLock = Lock()
+
+
+def _pngChunk(kind: bytes, data: bytes) -> bytes:
+  """Returns the PNG chunk of the given kind holding the data."""
+  crc = zlib.crc32(data, zlib.crc32(kind))
+  return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', crc)
+
+
+class TiledImage(PixelBuffer):
+  """TiledImage stores the pixels of large images tile by tile in an
+  array memory mapped to a scratch file, and tracks edits by tile. """
+
+  __tile_size__ = 256
+  __scratch_dir__ = None
+  __scratch_file__ = None
+  __tile_array__ = None
+  __tile_images__ = None
+  __dirty_tiles__ = None
+
+  def __init__(self, width: int, height: int, fill: tuple = None) -> None:
+    self.__dirty_tiles__ = set()
+    self.__tile_images__ = {}
+    PixelBuffer.__init__(self, width, height, fill)
+
+  def _allocate(self, width: int, height: int) -> None:
+    """Allocates the tiles in an array of shape (rows, columns, size,
+    size, 4) mapped to an anonymous scratch file. The file is removed by
+    the operating system when it is closed."""
+    n = self.__tile_size__
+    rows, cols = max(-(-height // n), 1), max(-(-width // n), 1)
+    self.__scratch_file__ = tempfile.TemporaryFile(dir=self.__scratch_dir__)
+    self.__tile_array__ = np.memmap(self.__scratch_file__, dtype=np.uint8,
+                                    mode='w+', shape=(rows, cols, n, n, 4))
+
+  def _fill(self, fill: tuple) -> None:
+    """Fills every tile one row of tiles at a time. The scratch file
+    reads as zeros until written, so filling with zeros writes nothing."""
+    if any(fill):
+      for row in range(self.__tile_array__.shape[0]):
+        self.__tile_array__[row] = fill
+
+  def region(self, box: Box) -> np.ndarray:
+    """Returns a view of the pixels in the box (left, top, right, bottom).
+    The box must lie inside a single tile, as do the parts returned by
+    'splitBox'."""
+    left, top, right, bottom = box
+    if left >= right or top >= bottom:
+      shape = (max(bottom - top, 0), max(right - left, 0), 4)
+      return np.empty(shape, dtype=np.uint8)
+    n = self.__tile_size__
+    row, col = top // n, left // n
+    if (bottom - 1) // n != row or (right - 1) // n != col:
+      e = """The box %s spans several tiles! Use 'splitBox' to divide it
+      into parts inside single tiles, or 'readRegion' for a copy."""
+      raise ValueError(monoSpace(e % str(box)))
+    top, bottom, left, right = top - row * n, bottom - row * n, \
+      left - col * n, right - col * n
+    return self.__tile_array__[row, col, top:bottom, left:right]
+
+  def splitBox(self, box: Box) -> list[Box]:
+    """Returns the parts of the box inside each tile it overlaps, clipped
+    to the image, in row major order."""
+    out = []
+    for tile in self.getTilesIn(box):
+      left, top, right, bottom = self.getTileBox(tile)
+      out.append((max(left, box[0]), max(top, box[1]),
+                  min(right, box[2]), min(bottom, box[3])))
+    return out
+
+  def tileImage(self, tile: Tile) -> QImage:
+    """Returns the QImage sharing memory with the tile, clipped to the
+    image. The image is created once for each tile and reused."""
+    if tile not in self.__tile_images__:
+      left, top, right, bottom = self.getTileBox(tile)
+      data = self.__tile_array__[tile]
+      self.__tile_images__[tile] = QImage(data.data, right - left,
+                                          bottom - top, data.strides[0],
+                                          QImage.Format.Format_RGBA8888)
+    return self.__tile_images__[tile]
+
+  def asQImage(self) -> QImage:
+    """Returns a QImage holding a copy of every pixel. Use 'tileImage' to
+    draw the image without copying."""
+    array = self.readRegion(self.getBox())
+    image = QImage(array.data, self.width, self.height, array.strides[0],
+                   QImage.Format.Format_RGBA8888)
+    return image.copy()
+
+  def flush(self) -> None:
+    """Writes pending changes to the scratch file."""
+    self.__tile_array__.flush()
+
+  @staticmethod
+  def _openFile(fid: str) -> Image.Image:
+    """Opens the image file without limiting the number of pixels."""
+    with _openLock:
+      maxPixels = Image.MAX_IMAGE_PIXELS
+      Image.MAX_IMAGE_PIXELS = None
+      try:
+        return Image.open(fid)
+      finally:
+        Image.MAX_IMAGE_PIXELS = maxPixels
+
+  @staticmethod
+  def _getRawLayout(image: Image.Image) -> Optional[RawLayout]:
+    """Returns the offset, raw mode, row stride and orientation of images
+    held uncompressed in a single run of the file, or None for images
+    that must be decoded."""
+    if len(image.tile) != 1:
+      return None
+    tile = image.tile[0]
+    if tile.codec_name != 'raw' or tile.extents != (0, 0, *image.size):
+      return None
+    args = (tile.args,) if isinstance(tile.args, str) else tuple(tile.args)
+    rawMode, stride, orientation = (*args, *(None, 0, 1)[len(args):])
+    if not stride:
+      try:
+        row = Image.new(image.mode, (image.width, 1))
+        stride = len(row.tobytes('raw', rawMode))
+      except (ValueError, OSError):
+        return None
+    return tile.offset, rawMode, stride, orientation
+
+  @staticmethod
+  def _readRawBand(file: BinaryIO, image: Image.Image, layout: RawLayout,
+                   top: int, bottom: int) -> Image.Image:
+    """Returns the rows from top to bottom of the image read directly
+    from the file in the layout given."""
+    offset, rawMode, stride, orientation = layout
+    first = top if orientation >= 0 else image.height - bottom
+    file.seek(offset + first * stride)
+    data = file.read((bottom - top) * stride)
+    band = Image.frombytes(image.mode, (image.width, bottom - top), data,
+                           'raw', rawMode, stride, orientation)
+    if image.palette is not None:
+      paletteMode, palette = image.palette.getdata()
+      band.putpalette(palette, paletteMode)
+    band.info = image.info
+    return band
+
+  @classmethod
+  def _samplePreview(cls, file: BinaryIO, image: Image.Image,
+                     layout: RawLayout, factor: int) -> PixelBuffer:
+    """Returns every pixel of every row at intervals of the factor, read
+    directly from the file in the layout given."""
+    rows = []
+    for y in range(0, image.height, factor):
+      row = cls._readRawBand(file, image, layout, y, y + 1)
+      rows.append(np.asarray(row.convert('RGBA'))[:, ::factor])
+    return PixelBuffer.fromArray(np.concatenate(rows))
+
+  @classmethod
+  def _decodePreview(cls, fid: str, file: BinaryIO, image: Image.Image,
+                     layout: Optional[RawLayout],
+                     previewSize: int) -> PixelBuffer:
+    """Returns a reduced copy of the image about the given size along its
+    longest side. JPEG files are decoded again at reduced scale, which is
+    much faster than decoding at full scale, and may be up to twice the
+    size given. Files holding uncompressed pixels are sampled from the
+    file without decoding the image. Other formats are reduced from the
+    full decode, which the bands then reuse."""
+    width, height = image.size
+    scale = previewSize / max(width, height)
+    factor = max(ceil(1 / scale), 1)
+    if image.format == 'JPEG':
+      with cls._openFile(fid) as draftImage:
+        draftSize = (max(int(width * scale), 1), max(int(height * scale), 1))
+        draftImage.draft('RGB', draftSize)
+        return PixelBuffer.fromImage(draftImage)
+    if layout is not None:
+      return cls._samplePreview(file, image, layout, factor)
+    return PixelBuffer.fromImage(image.reduce(factor))
+
+  @classmethod
+  def open(cls, fid: str,
+           progress: Progress = None,
+           preview: Callable[[PixelBuffer], None] = None,
+           allocated: Callable[[TiledImage], None] = None,
+           previewSize: int = 1024) -> Optional[TiledImage]:
+    """Creates a tiled image from the image file one band of rows, a tile
+    high, at a time. Each band is converted to RGBA and written to its
+    tiles separately.
+
+    If given, 'preview' is called first with a reduced copy of the image
+    about 'previewSize' along its longest side. Then 'allocated' is
+    called with the tiled image before any pixels are loaded. Rows of the
+    tiled image are final once reported by 'progress', which is called
+    with the number of rows loaded and the total number of rows after
+    each band. If 'progress' returns False, loading stops and None is
+    returned."""
+    n = cls.__tile_size__
+    with cls._openFile(fid) as image, open(fid, 'rb') as file:
+      width, height = image.size
+      layout = cls._getRawLayout(image)
+      if preview is not None:
+        preview(cls._decodePreview(fid, file, image, layout, previewSize))
+      out = cls(width, height, (0, 0, 0, 0))
+      if allocated is not None:
+        allocated(out)
+      for top in range(0, height, n):
+        bottom = min(top + n, height)
+        if layout is None:
+          band = image.crop((0, top, width, bottom))
+        else:
+          band = cls._readRawBand(file, image, layout, top, bottom)
+        out.writeRegion((0, top, width, bottom),
+                        np.asarray(band.convert('RGBA')))
+        if progress is not None and not progress(bottom, height):
+          return None
+    out.flush()
+    return out
+
+  def _iterBands(self) -> Iterator[np.ndarray]:
+    """Yields each band of rows, a tile high, as a row major array."""
+    n = self.__tile_size__
+    for top in range(0, self.height, n):
+      yield self.readRegion((0, top, self.width, min(top + n, self.height)))
+
+  def _savePNG(self, fid: str) -> None:
+    """Writes the image to a PNG file one band at a time. Each row is
+    stored with the 'Sub' filter, which subtracts the pixel to the left
+    of each pixel."""
+    header = struct.pack('>IIBBBBB', self.width, self.height, 8, 6, 0, 0, 0)
+    compressor = zlib.compressobj(6)
+    with open(fid, 'wb') as file:
+      file.write(b'\x89PNG\r\n\x1a\n' + _pngChunk(b'IHDR', header))
+      for band in self._iterBands():
+        rows = band.reshape(band.shape[0], -1)
+        filtered = np.empty((rows.shape[0], rows.shape[1] + 1), np.uint8)
+        filtered[:, 0] = 1
+        filtered[:, 1:5] = rows[:, :4]
+        np.subtract(rows[:, 4:], rows[:, :-4], out=filtered[:, 5:])
+        data = compressor.compress(filtered.tobytes())
+        if data:
+          file.write(_pngChunk(b'IDAT', data))
+      file.write(_pngChunk(b'IDAT', compressor.flush()))
+      file.write(_pngChunk(b'IEND', b''))
+
+  def save(self, fid: str) -> None:
+    """Saves the image to the file. PNG files are written one band at a
+    time. For other formats, the rows are assembled in a scratch file
+    from which the encoder reads them. Formats without transparency are
+    written without the alpha channel."""
+    ext = os.path.splitext(fid)[1].lower()
+    if ext == '.png':
+      return self._savePNG(fid)
+    n = self.__tile_size__
+    with tempfile.TemporaryFile(dir=self.__scratch_dir__) as scratch:
+      rows = np.memmap(scratch, dtype=np.uint8, mode='w+',
+                       shape=(max(self.height, 1), max(self.width, 1), 4))
+      for top, band in zip(range(0, self.height, n), self._iterBands()):
+        rows[top:top + band.shape[0], :self.width] = band
+      mode = 'RGBX' if ext in ('.jpg', '.jpeg') else 'RGBA'
+      image = Image.frombuffer(mode, (self.width, self.height), rows,
+                               'raw', mode, 0, 1)
+      image.save(fid)
+      del image, rows
+
+  def getTileSize(self) -> int:
+    """Returns the side length of the tiles."""
+    return self.__tile_size__
+
+  def getTileCount(self) -> Tile:
+    """Returns the number of rows and columns of tiles."""
+    n = self.__tile_size__
+    return -(-self.height // n), -(-self.width // n)
+
+  def getTileBox(self, tile: Tile) -> Box:
+    """Returns the box (left, top, right, bottom) covered by the tile. The
+    tiles in the last row and column are clipped to the image."""
+    n = self.__tile_size__
+    row, col = tile
+    left, top = col * n, row * n
+    return left, top, min(left + n, self.width), min(top + n, self.height)
+
+  def getTilesIn(self, box: Box) -> list[Tile]:
+    """Returns the tiles overlapping the box (left, top, right, bottom) in
+    row major order. Right and bottom are exclusive."""
+    n = self.__tile_size__
+    left, top = max(box[0], 0), max(box[1], 0)
+    right, bottom = min(box[2], self.width), min(box[3], self.height)
+    if left >= right or top >= bottom:
+      return []
+    rows = range(top // n, (bottom - 1) // n + 1)
+    cols = range(left // n, (right - 1) // n + 1)
+    return [(row, col) for row in rows for col in cols]
+
+  def markDirty(self, box: Optional[Box]) -> None:
+    """Marks the tiles overlapping the box as dirty."""
+    if box is not None:
+      self.__dirty_tiles__.update(self.getTilesIn(box))
+
+  def getDirtyTiles(self) -> set[Tile]:
+    """Returns the tiles edited since the dirty tiles were last taken."""
+    return set(self.__dirty_tiles__)
+
+  def takeDirtyTiles(self) -> set[Tile]:
+    """Returns the dirty tiles and marks every tile clean."""
+    dirtyTiles, self.__dirty_tiles__ = self.__dirty_tiles__, set()
+    return dirtyTiles
@@ -0,0 +1,186 @@
+"""UndoStack keeps the history of brush strokes applied to pixel buffers.
+Only the pixels touched by a stroke are stored. While a stroke is in
+progress, each small tile is copied the first time the stroke is about
+to write to it. When the stroke ends, the tiles before and after the
+stroke are compressed and stored as one entry. Undo and redo decompress
+and write back only those tiles, taking time in proportion to the area
+of the stroke rather than the size of the image.
+
+The compressed entries share a memory budget. When it is exceeded, the
+oldest entries are discarded first. The most recent entry is always
+kept."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import zlib
+from typing import TypeAlias, Optional
+
+import numpy as np
+
+from ezside.imaging import PixelBuffer
+
+Box: TypeAlias = tuple[int, int, int, int]
+
+
+def _unite(box: Optional[Box], other: Box) -> Box:
+  """Returns the smallest box containing both boxes."""
+  if box is None:
+    return other
+  return (min(box[0], other[0]), min(box[1], other[1]),
+          max(box[2], other[2]), max(box[3], other[3]))
+
+
+class _StrokeDelta:
+  """The compressed tiles changed by a single stroke."""
+
+  __pixel_buffer__ = None
+  __tiles__ = None
+  __bounding_box__ = None
+  __num_bytes__ = 0
+
+  def __init__(self, buffer: PixelBuffer, before: dict) -> None:
+    self.__pixel_buffer__ = buffer
+    self.__tiles__ = []
+    for box, pixels in before.items():
+      after = buffer.readRegion(box)
+      if np.array_equal(pixels, after):
+        continue
+      beforeData = zlib.compress(pixels.tobytes(), 1)
+      afterData = zlib.compress(after.tobytes(), 1)
+      self.__tiles__.append((box, beforeData, afterData))
+      self.__num_bytes__ += len(beforeData) + len(afterData)
+      self.__bounding_box__ = _unite(self.__bounding_box__, box)
+
+  def isEmpty(self) -> bool:
+    """Returns True if the stroke changed no pixels."""
+    return False if self.__tiles__ else True
+
+  def getNumBytes(self) -> int:
+    """Returns the size of the compressed tiles."""
+    return self.__num_bytes__
+
+  def apply(self, redo: bool) -> Box:
+    """Writes the tiles from before the stroke, or after it if 'redo' is
+    True, back to the buffer. Returns the box covering the tiles."""
+    for box, beforeData, afterData in self.__tiles__:
+      left, top, right, bottom = box
+      data = zlib.decompress(afterData if redo else beforeData)
+      pixels = np.frombuffer(data, np.uint8)
+      self.__pixel_buffer__.writeRegion(box, pixels.reshape(
+          (bottom - top, right - left, 4)))
+    return self.__bounding_box__
+
+
+class UndoStack:
+  """UndoStack keeps the history of brush strokes applied to pixel
+  buffers. """
+
+  __tile_size__ = 64
+  __memory_budget__ = 64 * 1024 * 1024
+  __undo_entries__ = None
+  __redo_entries__ = None
+  __pixel_buffer__ = None
+  __captured_tiles__ = None
+
+  def __init__(self, budget: int = None) -> None:
+    """The budget gives the largest number of bytes used by the stored
+    strokes."""
+    if budget is not None:
+      self.setMemoryBudget(budget)
+    self.__undo_entries__ = []
+    self.__redo_entries__ = []
+
+  def getMemoryBudget(self) -> int:
+    """Returns the largest number of bytes used by the stored strokes."""
+    return self.__memory_budget__
+
+  def setMemoryBudget(self, budget: int) -> None:
+    """Sets the largest number of bytes used by the stored strokes.
+    Entries exceeding the new budget are discarded immediately."""
+    if budget < 0:
+      e = """The memory budget must be non-negative, but received: %d!"""
+      raise ValueError(e % budget)
+    self.__memory_budget__ = budget
+    if self.__undo_entries__ is not None:
+      self._evict()
+
+  def getMemoryUsage(self) -> int:
+    """Returns the number of bytes used by the stored strokes."""
+    entries = [*self.__undo_entries__, *self.__redo_entries__]
+    return sum(entry.getNumBytes() for entry in entries)
+
+  def canUndo(self) -> bool:
+    """Returns True if a stroke can be undone."""
+    return True if self.__undo_entries__ else False
+
+  def canRedo(self) -> bool:
+    """Returns True if a stroke can be redone."""
+    return True if self.__redo_entries__ else False
+
+  def clear(self) -> None:
+    """Removes every stored stroke."""
+    self.__undo_entries__ = []
+    self.__redo_entries__ = []
+    self.__pixel_buffer__ = None
+    self.__captured_tiles__ = None
+
+  def beginStroke(self, buffer: PixelBuffer) -> None:
+    """Begins recording a stroke applied to the buffer."""
+    self.__pixel_buffer__ = buffer
+    self.__captured_tiles__ = {}
+
+  def capture(self, box: Box) -> None:
+    """Copies the tiles overlapping the box that the stroke has not yet
+    touched. This must be called before the stroke writes to the box."""
+    if self.__captured_tiles__ is None:
+      return
+    n = self.__tile_size__
+    buffer = self.__pixel_buffer__
+    left, top = max(box[0], 0), max(box[1], 0)
+    right, bottom = min(box[2], buffer.width), min(box[3], buffer.height)
+    for y in range(top // n * n, bottom, n):
+      for x in range(left // n * n, right, n):
+        tile = (x, y, min(x + n, buffer.width), min(y + n, buffer.height))
+        if tile not in self.__captured_tiles__:
+          self.__captured_tiles__[tile] = buffer.readRegion(tile)
+
+  def endStroke(self) -> bool:
+    """Ends the stroke and stores it, unless it changed no pixels. Any
+    undone strokes are discarded. Returns True if the stroke is stored."""
+    if self.__captured_tiles__ is None:
+      return False
+    entry = _StrokeDelta(self.__pixel_buffer__, self.__captured_tiles__)
+    self.__captured_tiles__ = None
+    self.__pixel_buffer__ = None
+    if entry.isEmpty():
+      return False
+    self.__undo_entries__.append(entry)
+    self.__redo_entries__ = []
+    self._evict()
+    return True
+
+  def _evict(self) -> None:
+    """Discards the oldest entries until the budget is met. The newest
+    entry is always kept."""
+    usage = self.getMemoryUsage()
+    while usage > self.__memory_budget__ and len(self.__undo_entries__) > 1:
+      usage -= self.__undo_entries__.pop(0).getNumBytes()
+
+  def undo(self) -> Optional[Box]:
+    """Reverts the most recent stroke. Returns the box changed or None if
+    no stroke is stored."""
+    if not self.__undo_entries__:
+      return None
+    entry = self.__undo_entries__.pop()
+    self.__redo_entries__.append(entry)
+    return entry.apply(False)
+
+  def redo(self) -> Optional[Box]:
+    """Reapplies the most recently undone stroke. Returns the box changed
+    or None if no stroke has been undone."""
+    if not self.__redo_entries__:
+      return None
+    entry = self.__redo_entries__.pop()
+    self.__undo_entries__.append(entry)
+    return entry.apply(True)
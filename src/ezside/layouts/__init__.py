@@ -11,6 +11,11 @@ from __future__ import annotations
 
 from ._layout_index import LayoutIndex
 from ._layout_item import LayoutItem
+from ._flex_axis import FlexAxis
+from ._layout_geometry import LayoutGeometry
+from ._prefix_index import PrefixIndex
 from ._abstract_layout import AbstractLayout
 from ._vertical_layout import VerticalLayout
 from ._horizontal_layout import HorizontalLayout
+from ._scroll_layout import ScrollLayout
+from ._virtual_grid_layout import VirtualGridLayout
@@ -4,17 +4,22 @@ subclasses of QLayout are too difficult to manage. """
 #  Copyright (c) 2024 Asger Jon Vistisen
 from __future__ import annotations
 
+from contextlib import contextmanager
+from typing import Optional, TypeAlias, Union, Iterator
+
 from PySide6.QtCore import (QRectF, QSizeF, QPointF, QSize, QMarginsF,
                             QPoint, \
                             QRect, QEvent)
 from PySide6.QtGui import QColor, QPaintEvent, QPainter, QMouseEvent, \
-  QEnterEvent, QEventPoint
+  QEnterEvent, QEventPoint, QWheelEvent, QResizeEvent
 from icecream import ic
 from worktoy.desc import AttriBox, Field
 from worktoy.text import typeMsg
 
-from ezside.layouts import LayoutItem, LayoutIndex
-from ezside.basewidgets import BoxWidget
+from ezside.layouts import LayoutItem, LayoutIndex, LayoutGeometry
+from ezside.basewidgets import BoxModel, BoxWidget
+
+Rect: TypeAlias = Union[QRect, QRectF]
 
 ic.configureOutput(includeContext=True)
 
@@ -39,7 +44,16 @@ class AbstractLayout(BoxWidget):
   __press_position__ = None
   __mouse_region__ = None
   __layout_items__ = None
+  __layout_geometry__ = None
+  __hover_item__ = None
   __iter_contents__ = None
+  __update_depth__ = 0
+  __pending_size__ = False
+  __pending_adjust__ = False
+  __pending_repaint__ = False
+  __shrink_content__ = True
+  __arranged_size__ = None
+  __paint_size__ = None
 
   spacing = AttriBox[int](0)
 
@@ -48,6 +62,7 @@ class AbstractLayout(BoxWidget):
   mouseRegion = Field()
   rowCount = Field()
   colCount = Field()
+  gridGeometry = Field()
 
   @pressPosition.GET
   def _getPressPosition(self) -> QPointF:
@@ -101,24 +116,69 @@ class AbstractLayout(BoxWidget):
     e = typeMsg('mouseRegion', self.__mouse_region__, QRectF)
     raise TypeError(e)
 
+  @gridGeometry.GET
+  def _getGridGeometry(self, ) -> LayoutGeometry:
+    """Getter-function for the cached grid geometry. The geometry is
+    recomputed here only if it has been invalidated since last access.
+    If only the size of the layout has changed, the space is distributed
+    again without measuring the items."""
+    if self.__layout_geometry__ is None:
+      self.__layout_geometry__ = LayoutGeometry(self.__shrink_content__)
+    geometry, size = self.__layout_geometry__, self.getLayoutSize()
+    if size != self.__arranged_size__ or not geometry.isValid():
+      self.__arranged_size__ = size
+      geometry.setAvailableSize(self.getAvailableSize())
+    if not geometry.isValid():
+      geometry.update(self.getItems(), self.allMargins)
+    return geometry
+
+  def getLayoutSize(self) -> QSizeF:
+    """Returns the size the layout is painted at. A layout painted by
+    its parent layout through 'paintMeLike' is never resized, so the size
+    of the rectangle it was last painted in is used instead of its own
+    size, until it is resized."""
+    if self.__paint_size__ is None:
+      return QSizeF(self.size())
+    return QSizeF(self.__paint_size__)
+
+  def getAvailableSize(self) -> QSizeF:
+    """Returns the space inside the box model available to the rows and
+    columns."""
+    return self.getLayoutSize().shrunkBy(self.allMargins)
+
+  def rearrange(self) -> None:
+    """Distributes the space available between the rows and columns
+    again, without measuring the items. Call this method when the space
+    available changes other than by resizing the layout."""
+    geometry = self.__layout_geometry__
+    if geometry is not None and geometry.isValid():
+      geometry.setAvailableSize(self.getAvailableSize())
+
+  def invalidateSize(self) -> None:
+    """Reimplementation invalidating the cached grid geometry before
+    notifying the parent layout. Since the items may have moved, the
+    entire layout is scheduled for repaint. During a batch of updates,
+    only the geometry is invalidated, and the rest is postponed until the
+    batch ends."""
+    if self.__layout_geometry__ is not None:
+      self.__layout_geometry__.invalidate()
+    if self.__update_depth__:
+      self.__pending_size__ = True
+      return
+    BoxWidget.invalidateSize(self)
+    self.update()
+
   def getColRight(self, col: int) -> float:
     """Return the right of the given column."""
     return self.getColLeft(col) + self.getColWidth(col)
 
   def getColLeft(self, col: int) -> float:
     """Return the left of the given column."""
-    if col:
-      return self.getColLeft(col - 1) + self.getColWidth(col - 1)
-    return self.allMargins.left()
+    return self.gridGeometry.getColLeft(col)
 
   def getColWidth(self, col: int) -> float:
     """Return the width of the given column."""
-    out = 0
-    for item in self.getItems():
-      if item.index.col == col:
-        if item.index.colSpan == 1:
-          out = max(out, item.width)
-    return out
+    return self.gridGeometry.getColWidth(col)
 
   def getRowBottom(self, row: int) -> float:
     """Return the bottom of the given row."""
@@ -126,18 +186,11 @@ class AbstractLayout(BoxWidget):
 
   def getRowTop(self, row: int) -> float:
     """Return the top of the given row."""
-    if row:
-      return self.getRowTop(row - 1) + self.getRowHeight(row - 1)
-    return self.allMargins.top()
+    return self.gridGeometry.getRowTop(row)
 
   def getRowHeight(self, row: int) -> float:
     """Return the width of the given row."""
-    out = 0
-    for item in self.getItems():
-      if item.index.row == row:
-        if item.index.rowSpan == 1:
-          out = max(out, item.height)
-    return out
+    return self.gridGeometry.getRowHeight(row)
 
   def getItemsInRow(self, row: int) -> list[LayoutItem]:
     """Return the items in the given row."""
@@ -163,16 +216,129 @@ class AbstractLayout(BoxWidget):
     """Getter-function for the items"""
     return self.__layout_items__ or []
 
-  def addWidget(self, widget: BoxWidget, row: int, col: int, *args) -> None:
-    """Subclasses are required to implement this method. After adding the
-    widget, the widget should be returned. """
+  def update(self, *args) -> None:
+    """Reimplementation postponing repaints until the end of a batch of
+    updates, at which point the entire layout is repainted once."""
+    if self.__update_depth__:
+      self.__pending_repaint__ = True
+      return
+    BoxWidget.update(self, *args)
+
+  def adjustSize(self) -> None:
+    """Reimplementation postponing the adjustment until the end of a
+    batch of updates, as it requires the grid geometry."""
+    if self.__update_depth__:
+      self.__pending_adjust__ = True
+      return
+    BoxWidget.adjustSize(self)
+
+  def beginUpdate(self) -> None:
+    """Begins a batch of updates. Until the matching call to
+    'endUpdate', changes to the items and to the box model do not
+    recompute the grid geometry, inform the parent layout or repaint.
+    Batches may be nested, in which case only the outermost batch
+    applies the changes when it ends."""
+    self.__update_depth__ += 1
+
+  def endUpdate(self) -> None:
+    """Ends a batch of updates. When the outermost batch ends, the
+    changes made during it are applied at once, requiring a single pass
+    over the items to recompute the grid geometry and a single repaint."""
+    if not self.__update_depth__:
+      e = """'endUpdate' was called without a matching 'beginUpdate'!"""
+      raise RuntimeError(e)
+    self.__update_depth__ -= 1
+    if self.__update_depth__:
+      return
+    pendingSize, self.__pending_size__ = self.__pending_size__, False
+    pendingAdjust, self.__pending_adjust__ = self.__pending_adjust__, False
+    pendingRepaint = self.__pending_repaint__
+    self.__pending_repaint__ = False
+    if pendingSize:
+      self.invalidateSize()
+    if pendingAdjust:
+      self.adjustSize()
+    if pendingRepaint and not pendingSize:
+      self.update()
+
+  def isUpdating(self) -> bool:
+    """Returns True during a batch of updates."""
+    return True if self.__update_depth__ else False
+
+  @contextmanager
+  def batchUpdate(self) -> Iterator[AbstractLayout]:
+    """Context manager wrapping the statements inside it in a batch of
+    updates. The batch ends even if an exception is raised."""
+    self.beginUpdate()
+    try:
+      yield self
+    finally:
+      self.endUpdate()
+
+  def addWidget(self, widget: BoxModel, row: int, col: int, *args) -> None:
+    """Adds the widget at the given row and column, optionally followed
+    by the row span and column span. Items that are only painted by the
+    layout should subclass the lightweight BoxItem rather than
+    BoxWidget. """
     widget.parentLayout = self
     rowSpan, colSpan = [*args, 1, 1, ][:2]
     layoutIndex = LayoutIndex(row, col, rowSpan, colSpan)
     layoutItem = LayoutItem(widget, layoutIndex)
     widget.parentLayoutItem = layoutItem
-    existing = self.__layout_items__ or []
-    self.__layout_items__ = [*existing, layoutItem]
+    if self.__layout_items__ is None:
+      self.__layout_items__ = []
+    self.__layout_items__.append(layoutItem)
+    self.invalidateSize()
+
+  def addWidgets(self, *entries: tuple) -> None:
+    """Adds each widget in a single batch. Each entry is a tuple of the
+    arguments to 'addWidget'."""
+    with self.batchUpdate():
+      for entry in entries:
+        self.addWidget(*entry)
+
+  def _getItemOf(self, widget: BoxModel) -> LayoutItem:
+    """Returns the layout item holding the widget. Raises KeyError if the
+    widget is not in this layout."""
+    item = widget.parentLayoutItem
+    if widget.parentLayout is not self or item is None:
+      e = """The widget '%s' is not in this layout!"""
+      raise KeyError(e % type(widget).__name__)
+    return item
+
+  def _detach(self, item: LayoutItem) -> None:
+    """Clears the references between the widget of the item and this
+    layout. If the item is under the cursor, it receives a leave event
+    first. The item must still be in the layout, as the widget may
+    request a repaint when it is left."""
+    if item is self.__hover_item__:
+      self._setHoverItem(None)
+    widget = item.widgetItem
+    widget.parentLayoutItem = None
+    widget.parentLayout = None
+
+  def removeWidget(self, widget: BoxModel) -> None:
+    """Removes the widget from the layout."""
+    item = self._getItemOf(widget)
+    self._detach(item)
+    self.__layout_items__.remove(item)
+    self.invalidateSize()
+
+  def moveWidget(self, widget: BoxModel, row: int, col: int, *args) -> None:
+    """Moves the widget to the given row and column, optionally followed
+    by the row span and column span. The widget keeps its place in the
+    painting order."""
+    item = self._getItemOf(widget)
+    rowSpan, colSpan = [*args, 1, 1, ][:2]
+    item.index = LayoutIndex(row, col, rowSpan, colSpan)
+    self.invalidateSize()
+
+  def clear(self) -> None:
+    """Removes every widget from the layout."""
+    for item in self.getItems():
+      self._detach(item)
+    self.__layout_items__ = []
+    self.invalidateSize()
 
   def __init__(self, *args) -> None:
     """This method initializes the layout. """
@@ -186,17 +352,13 @@ class AbstractLayout(BoxWidget):
 
   def getHeight(self, item: LayoutItem) -> float:
     """Getter-function for the height at given grid"""
-    height = 0
-    for row in range(item.index.row, item.index.row + item.index.rowSpan):
-      height += self.getRowHeight(row)
-    return height
+    row, rowSpan = item.index.row, item.index.rowSpan
+    return self.getRowTop(row + rowSpan) - self.getRowTop(row)
 
   def getWidth(self, item: LayoutItem) -> float:
     """Getter-function for the width at given grid"""
-    width = 0
-    for col in range(item.index.col, item.index.col + item.index.colSpan):
-      width += self.getColWidth(col)
-    return width
+    col, colSpan = item.index.col, item.index.colSpan
+    return self.getColLeft(col + colSpan) - self.getColLeft(col)
 
   def getSize(self, item: LayoutItem) -> QSizeF:
     """Getter-function for the size at given grid"""
@@ -206,80 +368,116 @@ class AbstractLayout(BoxWidget):
 
   def getRect(self, item: LayoutItem) -> QRectF:  # this name lol
     """Getter-function for the layout rectangle. """
-    col = item.index.col
-    row = item.index.row
-    left = self.getColLeft(col)
-    top = self.getRowTop(row)
-    size = self.getSize(item)
-    reqSize = item.widgetItem.requiredSize()
-    width = max(size.width(), reqSize.width())
-    height = max(size.height(), reqSize.height())
-    size = QSizeF(width, height)
-    return QRectF(QPointF(left, top), size)
+    return self.gridGeometry.getRect(item)
 
   def paintEvent(self, event: QPaintEvent) -> None:
     """Reimplementation first painting self using parent method,
     then painting each widget. """
     painter = QPainter()
     painter.begin(self)
-    viewRect = painter.viewport()
+    region = event.region()
+    painter.setClipRegion(region)
     reqRect = self.requiredRect()
     BoxWidget.paintMeLike(self, reqRect, painter)
-    for item in self.getItems():
+    dirtyRect = QRect.toRectF(region.boundingRect())
+    for item in self.gridGeometry.itemsIn(dirtyRect):
       rect = self.getRect(item)
-      item.widgetItem.paintMeLike(rect, painter)
+      if region.intersects(QRectF.toAlignedRect(rect)):
+        item.widgetItem.paintMeLike(rect, painter)
     painter.end()
 
+  def paintMeLike(self, rect: Rect, painter: QPainter) -> None:
+    """Reimplementation painting the box model and then the items when
+    the layout is itself an item in another layout. The rows and columns
+    share the space inside the given rectangle."""
+    rect = rect if isinstance(rect, QRectF) else QRect.toRectF(rect)
+    self.__paint_size__ = rect.size()
+    BoxWidget.paintMeLike(self, rect, painter)
+    shift, dirtyRect = rect.topLeft(), rect
+    if painter.hasClipping():
+      dirtyRect = rect.intersected(painter.clipBoundingRect())
+    for item in self.gridGeometry.itemsIn(dirtyRect.translated(-shift)):
+      item.widgetItem.paintMeLike(self.getRect(item).translated(shift),
+                                  painter)
+
+  def resizeEvent(self, event: QResizeEvent) -> None:
+    """Reimplementation sharing out the size of the layout once it is
+    resized, rather than the size it was last painted at."""
+    self.__paint_size__ = None
+    BoxWidget.resizeEvent(self, event)
+
+  def requestRepaint(self, item: LayoutItem, rect: Rect = None) -> None:
+    """Schedules a repaint of the given item only. If a rectangle is
+    given, it is understood relative to the top left corner of the item
+    and only the part of the item inside it is repainted. During a batch
+    of updates, the entire layout is repainted when the batch ends."""
+    if self.__update_depth__:
+      return self.update()
+    itemRect = self.getRect(item)
+    if rect is not None:
+      rect = rect if isinstance(rect, QRectF) else QRect.toRectF(rect)
+      dirtyRect = rect.translated(itemRect.topLeft()).intersected(itemRect)
+    else:
+      dirtyRect = itemRect
+    if not dirtyRect.isEmpty():
+      self.update(QRectF.toAlignedRect(dirtyRect))
+
   def requiredSize(self) -> QSizeF:
     """Return the required size. """
     return self.requiredRect().size()
 
   def requiredRect(self) -> QRectF:
-    """Return the required rectangle. """
-    out = QRectF()
-    for item in self.getItems():
-      size = item.widgetItem.requiredSize()
-      topLeft = self.getRect(item).topLeft()
-      out = out.united(QRectF(topLeft, size))
-    return out + self.allMargins
+    """Return the required rectangle, which fits the rows and columns at
+    their natural sizes. """
+    return self.gridGeometry.getNaturalRect() + self.allMargins
 
   def minimumSizeHint(self) -> QSize:
     """Return the minimum size hint. """
     return QSizeF.toSize(self.requiredRect().size())
 
+  def itemAt(self, point: QPointF) -> Optional[LayoutItem]:
+    """Returns the item at the given point or None if no item is there."""
+    return self.gridGeometry.itemAt(point)
+
+  def _setHoverItem(self, item: Optional[LayoutItem]) -> None:
+    """Sets the item under the cursor. Only the items entered and left
+    receive events. """
+    oldItem = self.__hover_item__
+    if oldItem is item:
+      return
+    self.__hover_item__ = item
+    if oldItem is not None:
+      oldItem.underMouse = False
+      oldItem.widgetItem.leaveEvent(QEvent(TypeLeave))
+    if item is not None:
+      item.underMouse = True
+      rect = self.getRect(item)
+      relPos = QPointF(self.cursorPosition - rect.topLeft())
+      item.widgetItem.enterEvent(QEnterEvent(relPos, relPos, relPos))
+
   def leaveEvent(self, event: QEvent) -> None:
     """This method handles the leave event."""
     self.__cursor_position__ = QPointF(-1, -1)
-    self.update()
+    self._setHoverItem(None)
 
   def enterEvent(self, event: QEnterEvent) -> None:
     """This method handles the enter event."""
     self.__cursor_position__ = event.localPos()
-    self.update()
 
   def mouseMoveEvent(self, event: QMouseEvent) -> None:
-    """This method handles the mouse move event."""
+    """This method handles the mouse move event. Only the item under the
+    cursor receives the event."""
     point = (event.points() or [None, ]).pop()
     if isinstance(point, QEventPoint):
       self.cursorPosition = QEventPoint.lastPosition(point)
     else:
       self.cursorPosition = QPointF(-1, -1)
-    for item in self.getItems():
+    item = self.itemAt(self.cursorPosition)
+    self._setHoverItem(item)
+    if item is not None:
       rect = self.getRect(item)
-      relPos = QPointF(self.cursorPosition - rect.topLeft()).toPoint()
-      if rect.contains(self.cursorPosition):
-        newEnter = QEnterEvent(relPos, relPos, relPos)
-        btn = event.buttons()
-        mdf = event.modifiers()
-        newMove = QMouseEvent(TypeMouseMove, relPos, btn, btn, mdf)
-        if not item.widgetItem.underMouse:
-          item.widgetItem.enterEvent(newEnter)
-        item.widgetItem.mouseMoveEvent(newMove)
-      else:
-        if item.widgetItem.underMouse:
-          newLeave = QEvent(TypeLeave)
-          item.widgetItem.leaveEvent(newLeave)
-    self.update()
+      relPos = QPointF(self.cursorPosition - rect.topLeft())
+      item.widgetItem.mouseMoveAt(relPos, event)
 
   def mousePressEvent(self, event: QMouseEvent) -> None:
     """This method handles the mouse press event."""
@@ -288,18 +486,16 @@ class AbstractLayout(BoxWidget):
       self.pressPosition = QEventPoint.lastPosition(point)
     else:
       self.pressPosition = QPointF(-1, -1)
-    for item in self.getItems():
-      rect = self.getRect(item)
-      if rect.contains(self.pressPosition):
-        relPos = QPointF(self.pressPosition - rect.topLeft())
-        btn = event.buttons()
-        mdf = event.modifiers()
-        newPress = QMouseEvent(TypePress, relPos, btn, btn, mdf)
-        item.widgetItem.mousePressEvent(newPress)
-        break
-    else:
+    item = self.itemAt(self.pressPosition)
+    if item is None:
       BoxWidget.mousePressEvent(self, event)
-    self.update()
+    else:
+      rect = self.getRect(item)
+      relPos = QPointF(self.pressPosition - rect.topLeft())
+      btn = event.buttons()
+      mdf = event.modifiers()
+      newPress = QMouseEvent(TypePress, relPos, btn, btn, mdf)
+      item.widgetItem.mousePressEvent(newPress)
 
   def mouseReleaseEvent(self, event: QMouseEvent) -> None:
     """This method handles the mouse release event."""
@@ -308,14 +504,35 @@ class AbstractLayout(BoxWidget):
       p = QEventPoint.lastPosition(point)
     else:
       p = QPointF(-1, -1)
-    for item in self.getItems():
-      rect = self.getRect(item)
-      if rect.contains(p):
-        relPos = QPointF(p - rect.topLeft())
-        newRelease = QMouseEvent(TypeRelease, relPos, event.buttons(),
-                                 event.button(), event.modifiers())
-        item.widgetItem.mouseReleaseEvent(newRelease)
-        break
-    else:
+    item = self.itemAt(p)
+    if item is None:
       BoxWidget.mouseReleaseEvent(self, event)
-    self.update()
+    else:
+      rect = self.getRect(item)
+      relPos = QPointF(p - rect.topLeft())
+      newRelease = QMouseEvent(TypeRelease, relPos, event.buttons(),
+                               event.button(), event.modifiers())
+      item.widgetItem.mouseReleaseEvent(newRelease)
+
+  def _routeWheel(self, event: QWheelEvent) -> bool:
+    """Sends the wheel event to the item under the cursor with the
+    position relative to the item. Returns True if the item accepted the
+    event, and False if it ignored it or there is no item."""
+    p = event.position()
+    item = self.itemAt(p)
+    if item is None:
+      return False
+    rect = self.getRect(item)
+    relPos = QPointF(p - rect.topLeft())
+    newWheel = QWheelEvent(relPos, event.globalPosition(),
+                           event.pixelDelta(), event.angleDelta(),
+                           event.buttons(), event.modifiers(),
+                           event.phase(), event.inverted())
+    item.widgetItem.wheelEvent(newWheel)
+    return True if newWheel.isAccepted() else False
+
+  def wheelEvent(self, event: QWheelEvent) -> None:
+    """This method handles the wheel event. Only the item under the cursor
+    receives the event. If it ignores the event, so does the layout."""
+    if not self._routeWheel(event):
+      BoxWidget.wheelEvent(self, event)
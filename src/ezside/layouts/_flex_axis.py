@@ -0,0 +1,169 @@
+"""FlexAxis distributes the space along one axis of a grid layout between
+its rows or columns, here called tracks. Each track has a natural size,
+which is the least size fitting the items in it, and the rules of those
+items decide how the track responds when the space available differs.
+
+Space beyond the natural sizes goes to the tracks of the highest growth
+class present, expanding tracks before preferring tracks, in proportion
+to their stretch weights. Tracks holding only fixed or contracting items
+never grow. When the space available is less than the natural sizes, only
+the tracks holding nothing but contracting items shrink, as every other
+rule requires at least the required size. Each loses a fraction of its
+natural size proportional to its stretch weight, and no track shrinks
+below zero.
+
+Items spanning several tracks are accounted for once the single track
+items have set the natural sizes. If the spanned tracks are too small
+for the item, the shortfall goes to the spanned tracks of the highest
+growth class, weighted the same way as surplus space.
+
+Collecting the natural sizes and the rules is separate from
+distributing the space, such that a change to the space available
+requires only the distribution. Both are linear in the number of tracks
+and the cells covered by the items, except that the distinct stretch
+weights of the shrinking tracks are sorted."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+
+class FlexAxis:
+  """FlexAxis distributes the space along one axis of a grid layout
+  between its rows or columns. """
+
+  FIXED = 0
+  PREFER = 1
+  EXPAND = 2
+
+  __natural_sizes__ = None
+  __growth__ = None
+  __weights__ = None
+  __pinned__ = None
+  __available__ = None
+  __sizes__ = None
+  __can_shrink__ = True
+
+  def __init__(self, canShrink: bool = True) -> None:
+    self.__can_shrink__ = True if canShrink else False
+    self.reset()
+
+  def __len__(self) -> int:
+    return len(self.__natural_sizes__)
+
+  def reset(self, ) -> None:
+    """Removes every track."""
+    self.__natural_sizes__ = []
+    self.__growth__ = []
+    self.__weights__ = []
+    self.__pinned__ = []
+    self.__sizes__ = None
+
+  def _extend(self, count: int) -> None:
+    """Adds empty tracks until there are at least the given number."""
+    while len(self.__natural_sizes__) < count:
+      self.__natural_sizes__.append(0.)
+      self.__growth__.append(self.FIXED)
+      self.__weights__.append(0.)
+      self.__pinned__.append(False)
+
+  def constrain(self, start: int, span: int, growth: int, shrinks: bool,
+                stretch: float) -> None:
+    """Applies the rule of an item to the tracks it spans. The growth
+    class of each track is the highest of its items, and its weight is
+    the highest stretch among the items of that class. An item unable to
+    shrink prevents its tracks from shrinking."""
+    self._extend(start + span)
+    self.__sizes__ = None
+    growthClasses, weights = self.__growth__, self.__weights__
+    for track in range(start, start + span):
+      if growth > growthClasses[track]:
+        growthClasses[track], weights[track] = growth, stretch
+      elif growth == growthClasses[track]:
+        weights[track] = max(weights[track], stretch)
+      if not shrinks:
+        self.__pinned__[track] = True
+
+  def require(self, start: int, span: int, size: float) -> None:
+    """Makes the tracks spanned fit the size. Items spanning a single
+    track must be required before items spanning several tracks."""
+    self._extend(start + span)
+    self.__sizes__ = None
+    naturalSizes = self.__natural_sizes__
+    if span == 1:
+      naturalSizes[start] = max(naturalSizes[start], size)
+      return
+    tracks = range(start, start + span)
+    shortfall = size - sum(naturalSizes[track] for track in tracks)
+    if shortfall > 0:
+      for track, share in self._share(tracks):
+        naturalSizes[track] += shortfall * share
+
+  def _share(self, tracks: range) -> list[tuple[int, float]]:
+    """Returns the fraction of surplus space going to each of the given
+    tracks receiving any. The tracks of the highest growth class present
+    share it in proportion to their weights, or evenly if the weights are
+    all zero. If none of the tracks grow, they share the space evenly."""
+    growthClasses, weights = self.__growth__, self.__weights__
+    top = max(growthClasses[track] for track in tracks)
+    if top == self.FIXED:
+      return [(track, 1 / len(tracks)) for track in tracks]
+    receiving = [track for track in tracks if growthClasses[track] == top]
+    total = sum(weights[track] for track in receiving)
+    if total <= 0:
+      return [(track, 1 / len(receiving)) for track in receiving]
+    return [(track, weights[track] / total) for track in receiving]
+
+  def getNaturalSize(self, track: int) -> float:
+    """Returns the natural size of the track."""
+    return self.__natural_sizes__[track]
+
+  def getNaturalTotal(self) -> float:
+    """Returns the sum of the natural sizes."""
+    return sum(self.__natural_sizes__)
+
+  def _shrink(self, deficit: float) -> list[float]:
+    """Returns the sizes of the tracks after removing the deficit from
+    the natural sizes. A shrinking track of natural size s and weight w
+    loses s * min(1, l * w), where l is the same for every track and is
+    found by passing through the distinct weights from the highest,
+    at which point the tracks of that weight have shrunk to zero."""
+    naturalSizes, weights = self.__natural_sizes__, self.__weights__
+    totals = {}
+    for size, weight, pinned in zip(naturalSizes, weights, self.__pinned__):
+      if not pinned and size > 0 and weight > 0:
+        totals[weight] = totals.get(weight, 0.) + size
+    saturated = 0.
+    linear = sum(weight * total for weight, total in totals.items())
+    scale = float('inf')
+    for weight in sorted(totals, reverse=True):
+      candidate = (deficit - saturated) / linear
+      if candidate * weight <= 1:
+        scale = candidate
+        break
+      saturated += totals[weight]
+      linear -= weight * totals[weight]
+    out = []
+    for size, weight, pinned in zip(naturalSizes, weights, self.__pinned__):
+      if pinned or weight <= 0:
+        out.append(size)
+      else:
+        out.append(size * (1. - min(1., scale * weight)))
+    return out
+
+  def distribute(self, available: float = None) -> list[float]:
+    """Returns the size of each track given the space available. If no
+    space is given, the tracks have their natural sizes. The result is
+    kept until the space available or the tracks change."""
+    if self.__sizes__ is not None and available == self.__available__:
+      return self.__sizes__
+    self.__available__ = available
+    sizes = [*self.__natural_sizes__, ]
+    extra = 0. if available is None else available - sum(sizes)
+    if extra > 0 and sizes:
+      for track, share in self._share(range(len(sizes))):
+        if self.__growth__[track] > self.FIXED:
+          sizes[track] += extra * share
+    elif extra < 0 and self.__can_shrink__:
+      sizes = self._shrink(-extra)
+    self.__sizes__ = sizes
+    return sizes
@@ -6,7 +6,7 @@ from __future__ import annotations
 
 from worktoy.parse import maybe
 
-from ezside.layouts import AbstractLayout, LayoutItem
+from ezside.layouts import AbstractLayout, LayoutItem, LayoutIndex
 from ezside.basewidgets import BoxWidget
 
 
@@ -30,7 +30,39 @@ class HorizontalLayout(AbstractLayout):
 
   def addWidget(self, widget: BoxWidget) -> BoxWidget:
     """Adds all basewidgets to the same row. """
-    existing = self.getWidgets()
-    widgetItem = LayoutItem(widget, 0, len(self))
-    self.__layout_items__ = [*existing, widgetItem]
+    AbstractLayout.addWidget(self, widget, 0, len(self))
     return widget
+
+  def addWidgets(self, *widgets: BoxWidget) -> None:
+    """Adds each widget to the end of the row in a single batch."""
+    with self.batchUpdate():
+      for widget in widgets:
+        self.addWidget(widget)
+
+  def _reindex(self, start: int) -> None:
+    """Moves the items from the start onwards to the column given by
+    their place in the row."""
+    items = self.getWidgets()
+    for col in range(start, len(items)):
+      items[col].index = LayoutIndex(0, col)
+
+  def removeWidget(self, widget: BoxWidget) -> None:
+    """Removes the widget and closes the gap it leaves in the row."""
+    col = self.getWidgets().index(self._getItemOf(widget))
+    with self.batchUpdate():
+      AbstractLayout.removeWidget(self, widget)
+      self._reindex(col)
+
+  def moveWidget(self, widget: BoxWidget, col: int) -> None:
+    """Moves the widget to the given column, shifting the widgets
+    between its old and new columns by one."""
+    items = self.getWidgets()
+    item = self._getItemOf(widget)
+    if not 0 <= col < len(items):
+      e = """Expected a column from 0 to %d, but received: %d!"""
+      raise IndexError(e % (len(items) - 1, col))
+    oldCol = items.index(item)
+    items.insert(col, items.pop(oldCol))
+    with self.batchUpdate():
+      self._reindex(min(col, oldCol))
+      self.invalidateSize()
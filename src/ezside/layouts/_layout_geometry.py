@@ -0,0 +1,323 @@
+"""LayoutGeometry computes and caches the grid geometry of a layout. The
+natural row heights and column widths, together with the size rules and
+stretch weights of the items, are collected in a single pass over the
+layout items. The results are kept until the owning layout invalidates
+them, which it does when the item set or the required size of a child
+changes. The space available to the layout is then distributed between
+the rows and columns by a FlexAxis for each direction, after which the
+prefix offsets and the rectangles of the items are found. When only the
+space available changes, the distribution is repeated without measuring
+the items again. The same pass builds an index from grid cells to the
+items overlapping them, allowing the item under a point to be found by
+bisecting the row and column offsets.
+
+Within its cell, an item unable to grow keeps its required size and an
+item unable to shrink keeps at least its required size. Items are placed
+at the top left corner of their cells."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from bisect import bisect_right
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from PySide6.QtCore import QRectF, QMarginsF, QPointF, QSizeF, QSize
+from worktoy.text import typeMsg
+
+from ezside.layouts import FlexAxis
+from ezside.tools import SizeRule
+
+if TYPE_CHECKING:
+  from ezside.layouts import LayoutItem
+
+Flags = tuple[int, bool]
+
+
+@lru_cache(maxsize=32)
+def _ruleFlags(rule: SizeRule) -> tuple[Flags, Flags]:
+  """Returns the growth class and whether the item may shrink for the
+  horizontal and the vertical components of the rule. Only contracting
+  items may be given less than their required size. Reading the
+  components of a rule is slow, so the flags are cached."""
+  out = []
+  for base in (rule.horizontal, rule.vertical):
+    name = base.name.lower()
+    if name == 'expand':
+      out.append((FlexAxis.EXPAND, False))
+    elif name == 'prefer':
+      out.append((FlexAxis.PREFER, False))
+    elif name == 'contract':
+      out.append((FlexAxis.FIXED, True))
+    else:
+      out.append((FlexAxis.FIXED, False))
+  return out[0], out[1]
+
+
+class LayoutGeometry:
+  """LayoutGeometry computes and caches the grid geometry of a layout. """
+
+  __is_valid__ = False
+  __row_heights__ = None
+  __col_widths__ = None
+  __row_tops__ = None
+  __col_lefts__ = None
+  __item_rects__ = None
+  __content_rect__ = None
+  __cell_items__ = None
+  __item_order__ = None
+  __entries__ = None
+  __margins__ = None
+  __available__ = None
+  __row_axis__ = None
+  __col_axis__ = None
+
+  def __init__(self, canShrink: bool = True) -> None:
+    """If 'canShrink' is False, the rows and columns keep at least their
+    natural sizes however little space is available."""
+    self.__row_axis__ = FlexAxis(canShrink)
+    self.__col_axis__ = FlexAxis(canShrink)
+    self.__entries__ = []
+    self.__margins__ = QMarginsF()
+    self.__row_heights__ = []
+    self.__col_widths__ = []
+    self.__row_tops__ = [0.]
+    self.__col_lefts__ = [0.]
+    self.__item_rects__ = {}
+    self.__content_rect__ = QRectF()
+    self.__cell_items__ = {}
+    self.__item_order__ = {}
+
+  def isValid(self) -> bool:
+    """Returns True if the cached geometry is up-to-date."""
+    return True if self.__is_valid__ else False
+
+  def invalidate(self) -> None:
+    """Marks the cached geometry as outdated. The next call to 'update'
+    recomputes it."""
+    self.__is_valid__ = False
+
+  @staticmethod
+  def _getItemSize(item: LayoutItem) -> QSizeF:
+    """Returns the required size of the item as an instance of QSizeF."""
+    size = item.size
+    if isinstance(size, QSizeF):
+      return size
+    if isinstance(size, QSize):
+      return QSize.toSizeF(size)
+    e = typeMsg('size', size, QSizeF)
+    raise TypeError(e)
+
+  @staticmethod
+  def _prefixSum(start: float, values: list[float]) -> list[float]:
+    """Returns the offsets of each entry given the start offset. The
+    returned list has one more entry than the values received, the last
+    being the end of the final entry."""
+    out = [start]
+    for value in values:
+      out.append(out[-1] + value)
+    return out
+
+  @staticmethod
+  def _getCell(offsets: list[float], value: float) -> int:
+    """Returns the index of the cell containing the value given the
+    offsets of the cells. Values before the first cell return -1 and
+    values after the last cell return the index of the last cell."""
+    if len(offsets) < 2:
+      return -1
+    return min(bisect_right(offsets, value) - 1, len(offsets) - 2)
+
+  def _indexRect(self, item: LayoutItem, rect: QRectF) -> None:
+    """Registers the item in every cell touched by the rectangle. Since
+    rectangles contain their edges, cells sharing only an edge with the
+    rectangle are included."""
+    rowTops, colLefts = self.__row_tops__, self.__col_lefts__
+    row0 = max(self._getCell(rowTops, rect.top()), 0)
+    row1 = self._getCell(rowTops, rect.bottom())
+    col0 = max(self._getCell(colLefts, rect.left()), 0)
+    col1 = self._getCell(colLefts, rect.right())
+    for row in range(row0, row1 + 1):
+      for col in range(col0, col1 + 1):
+        self.__cell_items__.setdefault((row, col), []).append(item)
+
+  def update(self, items: list[LayoutItem], margins: QMarginsF) -> None:
+    """Recomputes the geometry from the given items. Each item is measured
+    exactly once."""
+    rowAxis, colAxis = self.__row_axis__, self.__col_axis__
+    rowAxis.reset()
+    colAxis.reset()
+    entries, spanned = [], []
+    for item in items:
+      index, widget = item.index, item.widgetItem
+      row, col = index.row, index.col
+      rowSpan, colSpan = index.rowSpan, index.colSpan
+      size = self._getItemSize(item)
+      hFlags, vFlags = _ruleFlags(widget.sizeRule)
+      stretch = widget.stretch
+      entries.append((item, row, col, rowSpan, colSpan, size, hFlags, vFlags))
+      rowAxis.constrain(row, rowSpan, *vFlags, stretch)
+      colAxis.constrain(col, colSpan, *hFlags, stretch)
+      if rowSpan == 1:
+        rowAxis.require(row, 1, size.height())
+      if colSpan == 1:
+        colAxis.require(col, 1, size.width())
+      if rowSpan > 1 or colSpan > 1:
+        spanned.append((row, col, rowSpan, colSpan, size))
+    for row, col, rowSpan, colSpan, size in spanned:
+      if rowSpan > 1:
+        rowAxis.require(row, rowSpan, size.height())
+      if colSpan > 1:
+        colAxis.require(col, colSpan, size.width())
+    self.__entries__ = entries
+    self.__margins__ = QMarginsF(margins)
+    self._arrange()
+    self.__is_valid__ = True
+
+  def setAvailableSize(self, size: Optional[QSizeF]) -> bool:
+    """Sets the space available to the rows and columns, excluding the
+    margins. If None, the rows and columns have their natural sizes. If
+    the geometry is valid, the space is distributed again, but the items
+    are not measured again. Returns True if the rectangles may have
+    changed."""
+    if size is not None:
+      size = QSizeF(max(size.width(), 0.), max(size.height(), 0.))
+    if size == self.__available__:
+      return False
+    self.__available__ = size
+    if self.__is_valid__:
+      self._arrange()
+    return True
+
+  def getAvailableSize(self) -> Optional[QSizeF]:
+    """Returns the space available to the rows and columns."""
+    if self.__available__ is None:
+      return None
+    return QSizeF(self.__available__)
+
+  def _arrange(self) -> None:
+    """Distributes the space available between the rows and columns and
+    places the items."""
+    margins, available = self.__margins__, self.__available__
+    width = None if available is None else available.width()
+    height = None if available is None else available.height()
+    rowHeights = self.__row_axis__.distribute(height)
+    colWidths = self.__col_axis__.distribute(width)
+    rowTops = self._prefixSum(margins.top(), rowHeights)
+    colLefts = self._prefixSum(margins.left(), colWidths)
+    itemRects = {}
+    contentRect = QRectF()
+    for item, row, col, rowSpan, colSpan, size, hFlags, vFlags in (
+        self.__entries__):
+      left, top = colLefts[col], rowTops[row]
+      width = self._fit(colLefts[col + colSpan] - left, size.width(), hFlags)
+      height = self._fit(rowTops[row + rowSpan] - top, size.height(), vFlags)
+      rect = QRectF(QPointF(left, top), QSizeF(width, height))
+      itemRects[id(item)] = rect
+      contentRect = contentRect.united(rect)
+    self.__row_heights__ = rowHeights
+    self.__col_widths__ = colWidths
+    self.__row_tops__ = rowTops
+    self.__col_lefts__ = colLefts
+    self.__item_rects__ = itemRects
+    self.__content_rect__ = contentRect
+    self.__cell_items__ = {}
+    self.__item_order__ = {}
+    for order, (item, *_) in enumerate(self.__entries__):
+      self.__item_order__[id(item)] = order
+      self._indexRect(item, itemRects[id(item)])
+
+  @staticmethod
+  def _fit(cell: float, required: float, flags: Flags) -> float:
+    """Returns the extent of an item in a cell of the given extent."""
+    growth, shrinks = flags
+    if growth == FlexAxis.FIXED:
+      cell = min(cell, required)
+    if not shrinks:
+      cell = max(cell, required)
+    return cell
+
+  def getRowCount(self) -> int:
+    """Returns the number of rows spanned by the grid."""
+    return len(self.__row_heights__)
+
+  def getColCount(self) -> int:
+    """Returns the number of columns spanned by the grid."""
+    return len(self.__col_widths__)
+
+  def getRowHeight(self, row: int) -> float:
+    """Returns the height of the given row."""
+    if 0 <= row < len(self.__row_heights__):
+      return self.__row_heights__[row]
+    return 0.
+
+  def getColWidth(self, col: int) -> float:
+    """Returns the width of the given column."""
+    if 0 <= col < len(self.__col_widths__):
+      return self.__col_widths__[col]
+    return 0.
+
+  def getRowTop(self, row: int) -> float:
+    """Returns the top of the given row."""
+    if row < len(self.__row_tops__):
+      return self.__row_tops__[max(row, 0)]
+    return self.__row_tops__[-1]
+
+  def getColLeft(self, col: int) -> float:
+    """Returns the left of the given column."""
+    if col < len(self.__col_lefts__):
+      return self.__col_lefts__[max(col, 0)]
+    return self.__col_lefts__[-1]
+
+  def getRect(self, item: LayoutItem) -> QRectF:
+    """Returns the rectangle occupied by the given item."""
+    rect = self.__item_rects__.get(id(item), None)
+    if rect is None:
+      e = """The item '%s' is not part of the layout geometry!""" % item
+      raise KeyError(e)
+    return QRectF(rect)
+
+  def getContentRect(self) -> QRectF:
+    """Returns the union of the rectangles of every item, excluding the
+    margins of the layout."""
+    return QRectF(self.__content_rect__)
+
+  def getNaturalRect(self) -> QRectF:
+    """Returns the rectangle of the rows and columns at their natural
+    sizes, excluding the margins of the layout. This is the least space
+    fitting every item."""
+    topLeft = QPointF(self.__margins__.left(), self.__margins__.top())
+    width = self.__col_axis__.getNaturalTotal()
+    height = self.__row_axis__.getNaturalTotal()
+    return QRectF(topLeft, QSizeF(width, height))
+
+  def itemAt(self, point: QPointF) -> Optional[LayoutItem]:
+    """Returns the first item whose rectangle contains the point or None
+    if no such item exists. The lookup bisects the row and column offsets
+    and then checks only the items overlapping the cell found."""
+    row = self._getCell(self.__row_tops__, point.y())
+    col = self._getCell(self.__col_lefts__, point.x())
+    if row < 0 or col < 0:
+      return None
+    for item in self.__cell_items__.get((row, col), []):
+      if self.__item_rects__[id(item)].contains(point):
+        return item
+
+  def itemsIn(self, rect: QRectF) -> list[LayoutItem]:
+    """Returns the items whose rectangles intersect the given rectangle in
+    the order they were added. Only the items indexed in the cells
+    overlapping the rectangle are considered."""
+    rowTops, colLefts = self.__row_tops__, self.__col_lefts__
+    row0 = max(self._getCell(rowTops, rect.top()), 0)
+    row1 = self._getCell(rowTops, rect.bottom())
+    col0 = max(self._getCell(colLefts, rect.left()), 0)
+    col1 = self._getCell(colLefts, rect.right())
+    found = {}
+    for row in range(row0, row1 + 1):
+      for col in range(col0, col1 + 1):
+        for item in self.__cell_items__.get((row, col), []):
+          if id(item) in found:
+            continue
+          if self.__item_rects__[id(item)].intersects(rect):
+            found[id(item)] = item
+    order = self.__item_order__
+    return sorted(found.values(), key=lambda item: order[id(item)])
@@ -10,7 +10,7 @@ from worktoy.meta import BaseObject, overload
 from worktoy.text import typeMsg
 
 from ezside.layouts import LayoutIndex
-from ezside.basewidgets import BoxWidget
+from ezside.basewidgets import BoxModel
 
 
 class LayoutItem(BaseObject):
@@ -42,7 +42,7 @@ class LayoutItem(BaseObject):
   @size.GET
   def _getSizeF(self) -> QSizeF:
     """Getter-function for the sizeF"""
-    out = self.widgetItem.requiredSize()
+    out = self.widgetItem.getRequiredSize()
     if isinstance(out, QSizeF):
       return out
     if isinstance(out, QSize):
@@ -61,74 +61,72 @@ class LayoutItem(BaseObject):
     return self.size.width()
 
   @widgetItem.SET
-  def _setWidgetItem(self, widgetItem: BoxWidget) -> None:
-    """Setter-function for the widget item"""
-    if not isinstance(widgetItem, BoxWidget):
-      e = typeMsg('widgetItem', widgetItem, BoxWidget)
+  def _setWidgetItem(self, widgetItem: BoxModel) -> None:
+    """Setter-function for the widget item. Both BoxWidget and the
+    lightweight BoxItem are accepted."""
+    if not isinstance(widgetItem, BoxModel):
+      e = typeMsg('widgetItem', widgetItem, BoxModel)
       raise TypeError(e)
     self.__widget_item__ = widgetItem
 
   @widgetItem.GET
-  def _getWidgetItem(self) -> BoxWidget:
+  def _getWidgetItem(self) -> BoxModel:
     """Getter-function for the widget item"""
     if self.__widget_item__ is None:
       e = """The widget item has not been set!"""
       raise AttributeError(e)
-    if not isinstance(self.__widget_item__, BoxWidget):
-      e = typeMsg('widgetItem', self.__widget_item__, BoxWidget)
-      raise TypeError(e)
     return self.__widget_item__
 
-  @overload(LayoutIndex, BoxWidget)
-  def __init__(self, index: LayoutIndex, widgetItem: BoxWidget) -> None:
+  @overload(LayoutIndex, BoxModel)
+  def __init__(self, index: LayoutIndex, widgetItem: BoxModel) -> None:
     """Constructor for the LayoutItem class."""
     self.index = index
     self.widgetItem = widgetItem
 
-  @overload(BoxWidget, LayoutIndex)
-  def __init__(self, widgetItem: BoxWidget, index: LayoutIndex) -> None:
+  @overload(BoxModel, LayoutIndex)
+  def __init__(self, widgetItem: BoxModel, index: LayoutIndex) -> None:
     """Constructor for the LayoutItem class."""
     self.index = index
     self.widgetItem = widgetItem
 
-  @overload(int, int, BoxWidget)
-  def __init__(self, row: int, col: int, widgetItem: BoxWidget) -> None:
+  @overload(int, int, BoxModel)
+  def __init__(self, row: int, col: int, widgetItem: BoxModel) -> None:
     """Constructor for the LayoutItem class."""
     self.index = LayoutIndex(row, col)
     self.widgetItem = widgetItem
 
-  @overload(BoxWidget, int, int)
-  def __init__(self, widgetItem: BoxWidget, row: int, col: int) -> None:
+  @overload(BoxModel, int, int)
+  def __init__(self, widgetItem: BoxModel, row: int, col: int) -> None:
     """Constructor for the LayoutItem class."""
     self.index = LayoutIndex(row, col)
     self.widgetItem = widgetItem
 
-  @overload(int, BoxWidget, int)
-  def __init__(self, row: int, widgetItem: BoxWidget, col: int) -> None:
+  @overload(int, BoxModel, int)
+  def __init__(self, row: int, widgetItem: BoxModel, col: int) -> None:
     """Constructor for the LayoutItem class."""
     self.index = LayoutIndex(row, col)
     self.widgetItem = widgetItem
 
-  @overload(tuple, BoxWidget)
-  def __init__(self, index: tuple, widgetItem: BoxWidget) -> None:
+  @overload(tuple, BoxModel)
+  def __init__(self, index: tuple, widgetItem: BoxModel) -> None:
     """Constructor for the LayoutItem class."""
     self.index = LayoutIndex(index)
     self.widgetItem = widgetItem
 
-  @overload(BoxWidget, tuple)
-  def __init__(self, widgetItem: BoxWidget, index: tuple) -> None:
+  @overload(BoxModel, tuple)
+  def __init__(self, widgetItem: BoxModel, index: tuple) -> None:
     """Constructor for the LayoutItem class."""
     self.index = LayoutIndex(index)
     self.widgetItem = widgetItem
 
-  @overload(list, BoxWidget)
-  def __init__(self, index: list, widgetItem: BoxWidget) -> None:
+  @overload(list, BoxModel)
+  def __init__(self, index: list, widgetItem: BoxModel) -> None:
     """Constructor for the LayoutItem class."""
     self.index = LayoutIndex(index)
     self.widgetItem = widgetItem
 
-  @overload(BoxWidget, list)
-  def __init__(self, widgetItem: BoxWidget, index: list) -> None:
+  @overload(BoxModel, list)
+  def __init__(self, widgetItem: BoxModel, index: list) -> None:
     """Constructor for the LayoutItem class."""
     self.index = LayoutIndex(index)
     self.widgetItem = widgetItem
@@ -0,0 +1,125 @@
+"""PrefixIndex holds the sizes of a long sequence of rows or columns and
+finds the offset of any entry, or the entry at any offset, in
+logarithmic time. Every entry has the estimated size until a measured
+size is set. Until then the offsets follow from the estimate alone and
+no memory is used for the entries at all. The first measured size
+differing from the estimate allocates a Fenwick tree holding the
+differences from the estimate, after which changing a size, finding an
+offset and finding the entry at an offset each visit a logarithmic
+number of nodes. The tree and the differences take 12 bytes per entry,
+such that a million rows of varying height take 12 MB."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import numpy as np
+
+
+class PrefixIndex:
+  """PrefixIndex holds the sizes of a long sequence of rows or columns
+  and finds offsets and entries in logarithmic time. """
+
+  __entry_count__ = 0
+  __estimate__ = 1.
+  __tree__ = None
+  __deltas__ = None
+
+  def __init__(self, count: int = 0, estimate: float = 1.) -> None:
+    self.reset(count, estimate)
+
+  def __len__(self) -> int:
+    return self.__entry_count__
+
+  def reset(self, count: int, estimate: float = None) -> None:
+    """Sets the number of entries, optionally changes the estimate and
+    forgets every measured size."""
+    if count < 0:
+      e = """The number of entries must be non-negative, but received: %d!"""
+      raise ValueError(e % count)
+    if estimate is not None:
+      if estimate <= 0:
+        e = """The estimated size must be positive, but received: %s!"""
+        raise ValueError(e % str(estimate))
+      self.__estimate__ = float(estimate)
+    self.__entry_count__ = int(count)
+    self.__tree__ = None
+    self.__deltas__ = None
+
+  def getEstimate(self) -> float:
+    """Returns the size of entries not yet measured."""
+    return self.__estimate__
+
+  def isUniform(self) -> bool:
+    """Returns True if every entry has the estimated size."""
+    return True if self.__tree__ is None else False
+
+  def _validateIndex(self, index: int) -> None:
+    """Raises IndexError if the index does not refer to an entry."""
+    if not 0 <= index < self.__entry_count__:
+      e = """Expected an index from 0 to %d, but received: %d!"""
+      raise IndexError(e % (self.__entry_count__ - 1, index))
+
+  def getSize(self, index: int) -> float:
+    """Returns the size of the entry at the index."""
+    self._validateIndex(index)
+    if self.__deltas__ is None:
+      return self.__estimate__
+    return self.__estimate__ + float(self.__deltas__[index])
+
+  def setSize(self, index: int, size: float) -> None:
+    """Sets the measured size of the entry at the index."""
+    self._validateIndex(index)
+    if size <= 0:
+      e = """The size of an entry must be positive, but received: %s!"""
+      raise ValueError(e % str(size))
+    if float(size) == self.getSize(index):
+      return
+    if self.__tree__ is None:
+      self.__tree__ = np.zeros(self.__entry_count__ + 1, dtype=np.float64)
+      self.__deltas__ = np.zeros(self.__entry_count__, dtype=np.float32)
+    target = np.float32(float(size) - self.__estimate__)
+    delta = float(target) - float(self.__deltas__[index])
+    self.__deltas__[index] = target
+    tree, node = self.__tree__, index + 1
+    while node <= self.__entry_count__:
+      tree[node] += delta
+      node += node & -node
+
+  def getStart(self, index: int) -> float:
+    """Returns the offset at which the entry at the index begins. The
+    index may equal the number of entries, in which case the total size
+    is returned."""
+    index = min(max(index, 0), self.__entry_count__)
+    out = index * self.__estimate__
+    if self.__tree__ is None:
+      return out
+    tree, node = self.__tree__, index
+    while node > 0:
+      out += tree[node]
+      node -= node & -node
+    return float(out)
+
+  def getTotal(self) -> float:
+    """Returns the sum of the sizes of every entry."""
+    return self.getStart(self.__entry_count__)
+
+  def indexAt(self, offset: float) -> int:
+    """Returns the index of the entry containing the offset. Offsets
+    before the first entry return 0 and offsets after the last entry
+    return the index of the last entry. If there are no entries, -1 is
+    returned."""
+    count, estimate = self.__entry_count__, self.__estimate__
+    if not count:
+      return -1
+    if self.__tree__ is None:
+      return min(max(int(offset // estimate), 0), count - 1)
+    tree, index, remaining = self.__tree__, 0, offset
+    step = 1 << (count.bit_length() - 1)
+    while step:
+      node = index + step
+      if node <= count:
+        size = step * estimate + tree[node]
+        if size <= remaining:
+          index, remaining = node, remaining - size
+      step >>= 1
+    return min(index, count - 1)
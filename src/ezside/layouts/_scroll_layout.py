@@ -0,0 +1,336 @@
+"""ScrollLayout is a layout showing only part of its content through a
+view the size of the layout. Unlike the other layouts, it does not grow
+to fit its items. The items are placed in the grid exactly as in
+AbstractLayout, and the view is moved across the grid by the scroll
+offset. Painting translates the painter by the offset and paints only
+the items inside the view, found through the cell index of the layout
+geometry, such that painting and hit testing cost only as much as the
+items on screen.
+
+The rectangles returned by 'getRect' and the points received by
+'itemAt' are relative to the top left corner of the layout, like the
+positions of mouse events. The mouse events are thus routed to the item
+under the cursor with positions relative to the item, wherever the view
+has been scrolled to.
+
+Scrolling is pixel-precise. Devices reporting distances in pixels scroll
+by exactly that distance. Each step of a wheel, and each drag released
+while moving, starts a kinetic scroll, which moves the view with a
+velocity decaying exponentially at the rate given by 'friction'. The
+distance travelled by a kinetic scroll depends only on its initial
+velocity, not on the rate at which it is animated. Dragging with the
+middle button, or with the left button where there are no items, moves
+the content with the cursor. Wheel events go to the item under the
+cursor first, and scroll the view only if the item ignores them.
+
+The scroll offset is kept inside the content when the layout is resized
+and when its items change, never while painting, as moving the view
+changes the item under the cursor."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import math
+import time
+from typing import Optional
+
+from PySide6.QtCore import QRectF, QPointF, QSizeF, QRect, QTimer, Qt
+from PySide6.QtGui import QPainter, QPaintEvent, QMouseEvent, \
+  QWheelEvent, QResizeEvent
+from worktoy.desc import AttriBox, Field
+
+from ezside.layouts import AbstractLayout, LayoutItem
+from ezside.basewidgets import BoxWidget
+
+
+class ScrollLayout(AbstractLayout):
+  """ScrollLayout is a layout showing only part of its content through a
+  view the size of the layout. """
+
+  __scroll_x__ = 0.
+  __scroll_y__ = 0.
+  __velocity_x__ = 0.
+  __velocity_y__ = 0.
+  __kinetic_timer__ = None
+  __kinetic_time__ = None
+  __drag_samples__ = None
+  __view_size__ = None
+  __min_speed__ = 8.
+  __sample_window__ = .1
+  __shrink_content__ = False
+  __clamp_pending__ = False
+
+  friction = AttriBox[float](6.)
+  wheelStep = AttriBox[float](64.)
+
+  scrollOffset = Field()
+  isScrolling = Field()
+
+  @scrollOffset.GET
+  def _getScrollOffset(self) -> QPointF:
+    """Getter-function for the offset of the view into the content."""
+    return QPointF(self.__scroll_x__, self.__scroll_y__)
+
+  @scrollOffset.SET
+  def _setScrollOffset(self, offset: QPointF) -> None:
+    """Setter-function for the offset of the view into the content."""
+    self.scrollTo(offset.x(), offset.y())
+
+  @isScrolling.GET
+  def _getIsScrolling(self) -> bool:
+    """Getter-function for the flag indicating a kinetic scroll or drag
+    in progress."""
+    if self.__drag_samples__ is not None:
+      return True
+    return True if self.__kinetic_timer__.isActive() else False
+
+  def getViewRect(self) -> QRectF:
+    """Returns the rectangle inside the box model through which the
+    content is shown, relative to the top left corner of the layout."""
+    size = self.__view_size__
+    if size is None:
+      size = QSizeF(self.size())
+    return QRectF(QPointF(0, 0), size).marginsRemoved(self.allMargins)
+
+  def getAvailableSize(self) -> QSizeF:
+    """Reimplementation offering the view to the rows and columns. They
+    grow to fill the view, but do not shrink when the content is larger
+    than the view."""
+    return self.getViewRect().size()
+
+  def getRect(self, item: LayoutItem) -> QRectF:
+    """Reimplementation returning the rectangle of the item relative to
+    the top left corner of the layout at the current scroll offset. """
+    rect = self.gridGeometry.getRect(item)
+    return rect.translated(-self.__scroll_x__, -self.__scroll_y__)
+
+  def itemAt(self, point: QPointF) -> Optional[LayoutItem]:
+    """Reimplementation finding the item at the point relative to the top
+    left corner of the layout. Points outside the view have no item."""
+    if not self.getViewRect().contains(point):
+      return None
+    offset = QPointF(self.__scroll_x__, self.__scroll_y__)
+    return self.gridGeometry.itemAt(point + offset)
+
+  def requestRepaint(self, item: LayoutItem, rect: QRectF = None) -> None:
+    """Reimplementation ignoring the parts of the item outside the
+    view."""
+    if self.__update_depth__:
+      return self.update()
+    itemRect = self.getRect(item)
+    if rect is not None:
+      rect = rect if isinstance(rect, QRectF) else QRect.toRectF(rect)
+      dirtyRect = rect.translated(itemRect.topLeft()).intersected(itemRect)
+    else:
+      dirtyRect = itemRect
+    dirtyRect = dirtyRect.intersected(self.getViewRect())
+    if not dirtyRect.isEmpty():
+      self.update(QRectF.toAlignedRect(dirtyRect))
+
+  def requiredRect(self) -> QRectF:
+    """Reimplementation requiring room only for the box model, as the
+    view may show any part of the content."""
+    return QRectF(QPointF(0, 0), QSizeF(0, 0)) + self.allMargins
+
+  def getMaximumOffset(self) -> QPointF:
+    """Returns the scroll offset at which the view reaches the right and
+    bottom edges of the content."""
+    view = self.getViewRect()
+    content = self.gridGeometry.getContentRect()
+    return QPointF(max(content.right() - view.right(), 0.),
+                   max(content.bottom() - view.bottom(), 0.))
+
+  def _clampOffset(self, x: float, y: float) -> tuple[float, float]:
+    """Returns the offset clamped such that the view does not scroll past
+    the content."""
+    maxOffset = self.getMaximumOffset()
+    x = max(min(float(x), maxOffset.x()), 0.)
+    y = max(min(float(y), maxOffset.y()), 0.)
+    return x, y
+
+  def scrollTo(self, x: float, y: float) -> None:
+    """Scrolls the view to the given offset into the content. The offset
+    is clamped such that the view does not scroll past the content."""
+    x, y = self._clampOffset(x, y)
+    if x == self.__scroll_x__ and y == self.__scroll_y__:
+      return
+    self.__scroll_x__, self.__scroll_y__ = x, y
+    self.update()
+    cursor = self.cursorPosition
+    if self.getViewRect().contains(cursor):
+      self._setHoverItem(self.itemAt(cursor))
+
+  def scrollBy(self, dx: float, dy: float) -> None:
+    """Scrolls the view by the given distance in pixels."""
+    self.scrollTo(self.__scroll_x__ + dx, self.__scroll_y__ + dy)
+
+  def ensureVisible(self, item: LayoutItem) -> None:
+    """Scrolls the least distance that brings the item fully into
+    view."""
+    view, rect = self.getViewRect(), self.gridGeometry.getRect(item)
+    x = min(max(self.__scroll_x__, rect.right() - view.right()),
+            rect.left() - view.left())
+    y = min(max(self.__scroll_y__, rect.bottom() - view.bottom()),
+            rect.top() - view.top())
+    self.scrollTo(x, y)
+
+  def flick(self, velocityX: float, velocityY: float) -> None:
+    """Starts a kinetic scroll with the given velocity in pixels per
+    second. The view travels the velocity divided by the friction before
+    coming to rest."""
+    self.__velocity_x__ = float(velocityX)
+    self.__velocity_y__ = float(velocityY)
+    if math.hypot(velocityX, velocityY) < self.__min_speed__:
+      return self.stopScrolling()
+    self.__kinetic_time__ = time.perf_counter()
+    if not self.__kinetic_timer__.isActive():
+      self.__kinetic_timer__.start()
+
+  def stopScrolling(self) -> None:
+    """Stops any kinetic scroll in progress."""
+    self.__velocity_x__, self.__velocity_y__ = 0., 0.
+    self.__kinetic_timer__.stop()
+
+  def _kineticStep(self) -> None:
+    """Advances the kinetic scroll by the time passed since the last
+    step. The velocity decays exponentially, and the distance travelled
+    is integrated exactly, such that the path is independent of the
+    timing of the steps. Scrolling stops at the edges of the content."""
+    now = time.perf_counter()
+    dt, self.__kinetic_time__ = now - self.__kinetic_time__, now
+    friction = max(self.friction, 1e-3)
+    decay = math.exp(-friction * dt)
+    travel = (1. - decay) / friction
+    vx, vy = self.__velocity_x__, self.__velocity_y__
+    x = self.__scroll_x__ + vx * travel
+    y = self.__scroll_y__ + vy * travel
+    self.scrollTo(x, y)
+    vx = vx * decay if self.__scroll_x__ == x else 0.
+    vy = vy * decay if self.__scroll_y__ == y else 0.
+    self.__velocity_x__, self.__velocity_y__ = vx, vy
+    if math.hypot(vx, vy) < self.__min_speed__:
+      self.stopScrolling()
+
+  def paintEvent(self, event: QPaintEvent) -> None:
+    """Reimplementation painting the view through 'paintMeLike'."""
+    painter = QPainter()
+    painter.begin(self)
+    painter.setClipRegion(event.region())
+    self.paintMeLike(QRectF(self.rect()), painter)
+    painter.end()
+
+  def paintMeLike(self, rect: QRectF, painter: QPainter) -> None:
+    """Paints the box model and then the items inside the view, which is
+    also inside the clip region of the painter. The items are painted
+    with the painter clipped to the view. A layout painted by its parent
+    layout in a rectangle of another size has its view resized, and its
+    offset is clamped to the content without any further effect."""
+    rect = rect if isinstance(rect, QRectF) else QRect.toRectF(rect)
+    if self.__view_size__ != rect.size():
+      self.__view_size__ = rect.size()
+      self.rearrange()
+      x, y = self._clampOffset(self.__scroll_x__, self.__scroll_y__)
+      self.__scroll_x__, self.__scroll_y__ = x, y
+    BoxWidget.paintMeLike(self, rect, painter)
+    view = self.getViewRect().translated(rect.topLeft())
+    if painter.hasClipping():
+      view = view.intersected(painter.clipBoundingRect())
+    if view.isEmpty():
+      return
+    painter.save()
+    painter.setClipRect(view, Qt.ClipOperation.IntersectClip)
+    shift = rect.topLeft() - self.scrollOffset
+    for item in self.gridGeometry.itemsIn(view.translated(-shift)):
+      itemRect = self.gridGeometry.getRect(item).translated(shift)
+      item.widgetItem.paintMeLike(itemRect, painter)
+    painter.restore()
+
+  def resizeEvent(self, event: QResizeEvent) -> None:
+    """Fits the content to the new view and keeps the scroll offset
+    inside it."""
+    self.__view_size__ = QSizeF(event.size())
+    self.rearrange()
+    self.scrollTo(self.__scroll_x__, self.__scroll_y__)
+
+  def invalidateSize(self) -> None:
+    """Reimplementation keeping the scroll offset inside the content once
+    the items have changed. The offset is clamped when control returns
+    to the event loop, such that many changes in a row cost a single
+    pass over the items."""
+    AbstractLayout.invalidateSize(self)
+    if self.__clamp_pending__ or self.isUpdating():
+      return
+    if self.__scroll_x__ or self.__scroll_y__:
+      self.__clamp_pending__ = True
+      QTimer.singleShot(0, self, self._clampToContent)
+
+  def _clampToContent(self) -> None:
+    """Scrolls the view back inside the content if the content has
+    shrunk past it."""
+    self.__clamp_pending__ = False
+    self.scrollTo(self.__scroll_x__, self.__scroll_y__)
+
+  def _startsDrag(self, event: QMouseEvent) -> bool:
+    """Returns True if the press begins dragging the content."""
+    if event.button() == Qt.MouseButton.MiddleButton:
+      return True
+    if event.button() == Qt.MouseButton.LeftButton:
+      return True if self.itemAt(event.position()) is None else False
+    return False
+
+  def mousePressEvent(self, event: QMouseEvent) -> None:
+    """Begins dragging the content or routes the press to the item
+    under the cursor."""
+    self.stopScrolling()
+    if not self._startsDrag(event):
+      return AbstractLayout.mousePressEvent(self, event)
+    self.__drag_samples__ = [(time.perf_counter(), event.position())]
+
+  def mouseMoveEvent(self, event: QMouseEvent) -> None:
+    """Moves the content with the cursor while dragging and routes the
+    event to the item under the cursor otherwise."""
+    if self.__drag_samples__ is None:
+      return AbstractLayout.mouseMoveEvent(self, event)
+    now, point = time.perf_counter(), event.position()
+    delta = self.__drag_samples__[-1][1] - point
+    self.scrollBy(delta.x(), delta.y())
+    self.__drag_samples__.append((now, point))
+    while now - self.__drag_samples__[0][0] > self.__sample_window__:
+      self.__drag_samples__.pop(0)
+
+  def mouseReleaseEvent(self, event: QMouseEvent) -> None:
+    """Releases a drag with the velocity of the cursor during the most
+    recent samples, or routes the release to the item under the
+    cursor."""
+    if self.__drag_samples__ is None:
+      return AbstractLayout.mouseReleaseEvent(self, event)
+    samples, self.__drag_samples__ = self.__drag_samples__, None
+    (t0, p0), (t1, p1) = samples[0], samples[-1]
+    if time.perf_counter() - t1 > self.__sample_window__ or t1 <= t0:
+      return
+    velocity = (p0 - p1) / (t1 - t0)
+    self.flick(velocity.x(), velocity.y())
+
+  def wheelEvent(self, event: QWheelEvent) -> None:
+    """Routes the event to the item under the cursor, and scrolls the
+    view if the item ignores it. Pixel distances are applied at once,
+    while each step of a wheel adds a kinetic scroll of 'wheelStep'
+    pixels."""
+    if self._routeWheel(event):
+      return
+    event.accept()
+    pixels = event.pixelDelta()
+    if not pixels.isNull():
+      self.stopScrolling()
+      return self.scrollBy(-pixels.x(), -pixels.y())
+    angle = event.angleDelta()
+    impulse = self.wheelStep * self.friction / 120
+    self.flick(self.__velocity_x__ - angle.x() * impulse,
+               self.__velocity_y__ - angle.y() * impulse)
+
+  def __init__(self, *args) -> None:
+    """This method initializes the scroll layout. """
+    AbstractLayout.__init__(self, *args)
+    self.__kinetic_timer__ = QTimer(self)
+    self.__kinetic_timer__.setInterval(16)
+    self.__kinetic_timer__.timeout.connect(self._kineticStep)
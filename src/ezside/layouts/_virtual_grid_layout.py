@@ -0,0 +1,461 @@
+"""VirtualGridLayout shows a table of any size by creating painted cells
+only for the rows and columns inside the view, extended by an overscan
+margin on every side. The table is described by a data source of three
+callbacks returning the number of rows, the number of columns and the
+value at a cell. When the view scrolls, cells leaving the window are
+returned to a pool and rebound to the cells entering it, such that the
+number of cells depends only on the size of the view.
+
+Row heights and column widths begin at their estimates. When a cell is
+bound, its required size is measured and the row and column grow to fit
+it. A row entering the window is given the height of its tallest cell,
+while rows and columns already shown only grow, which keeps them from
+changing size while scrolling. The sizes are held in a PrefixIndex,
+which finds the offset of a row or the row at an offset in logarithmic
+time. While measured sizes change the rows above the view, the scroll
+offset is adjusted so the first row shown stays in place.
+
+The layout paints itself through 'paintMeLike', so it may be shown
+directly or placed in one of the other layouts. Mouse events are routed
+to the cell under the cursor with positions relative to the cell."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from typing import Callable, Optional, TypeAlias
+
+from PySide6.QtCore import QRectF, QPointF, QSizeF, QEvent, QRect
+from PySide6.QtGui import QPainter, QPaintEvent, QMouseEvent, \
+  QEnterEvent, QWheelEvent, QResizeEvent
+from worktoy.desc import AttriBox, Field
+from worktoy.text import monoSpace
+
+from ezside.layouts import PrefixIndex
+from ezside.basewidgets import BoxWidget, BoxItem, LabelItem
+
+CellKey: TypeAlias = tuple[int, int]
+Window: TypeAlias = tuple[int, int, int, int]
+
+
+class VirtualGridLayout(BoxWidget):
+  """VirtualGridLayout shows a table of any size by creating painted
+  cells only for the rows and columns inside the view. Subclasses may
+  reimplement 'createCell' and 'bindCell' to show values with other
+  BoxItem subclasses than LabelItem. """
+
+  __row_count_source__ = None
+  __col_count_source__ = None
+  __cell_value_source__ = None
+  __row_index__ = None
+  __col_index__ = None
+  __live_cells__ = None
+  __free_cells__ = None
+  __cell_window__ = None
+  __view_size__ = None
+  __scroll_x__ = 0.
+  __scroll_y__ = 0.
+  __hover_key__ = None
+  __max_passes__ = 8
+
+  overscan = AttriBox[int](4)
+  estimatedRowHeight = AttriBox[float](32.)
+  estimatedColWidth = AttriBox[float](96.)
+  measureCells = AttriBox[bool](True)
+
+  rowCount = Field()
+  colCount = Field()
+  scrollOffset = Field()
+  contentSize = Field()
+
+  @rowCount.GET
+  def _getRowCount(self) -> int:
+    """Getter-function for the number of rows."""
+    return len(self.__row_index__)
+
+  @colCount.GET
+  def _getColCount(self) -> int:
+    """Getter-function for the number of columns."""
+    return len(self.__col_index__)
+
+  @scrollOffset.GET
+  def _getScrollOffset(self) -> QPointF:
+    """Getter-function for the offset of the view into the table."""
+    return QPointF(self.__scroll_x__, self.__scroll_y__)
+
+  @scrollOffset.SET
+  def _setScrollOffset(self, offset: QPointF) -> None:
+    """Setter-function for the offset of the view into the table."""
+    self.scrollTo(offset.x(), offset.y())
+
+  @contentSize.GET
+  def _getContentSize(self) -> QSizeF:
+    """Getter-function for the size of the entire table. Rows and columns
+    not yet shown are counted at their estimated sizes."""
+    return QSizeF(self.__col_index__.getTotal(),
+                  self.__row_index__.getTotal())
+
+  @estimatedRowHeight.ONSET
+  @estimatedColWidth.ONSET
+  def _updateEstimate(self, oldVal: float, newVal: float) -> None:
+    """Setter-hook for changes to the estimated sizes."""
+    if oldVal != newVal:
+      self.reloadData()
+
+  def setDataSource(self,
+                    rowCount: Callable[[], int],
+                    colCount: Callable[[], int],
+                    cellValue: Callable[[int, int], object]) -> None:
+    """Sets the callbacks returning the number of rows, the number of
+    columns and the value at a given row and column. The callbacks are
+    called again only by 'reloadData' and when cells are bound."""
+    for name, callMeMaybe in (('rowCount', rowCount),
+                              ('colCount', colCount),
+                              ('cellValue', cellValue)):
+      if not callable(callMeMaybe):
+        e = """Expected '%s' to be callable, but received: %s!"""
+        raise TypeError(e % (name, type(callMeMaybe).__name__))
+    self.__row_count_source__ = rowCount
+    self.__col_count_source__ = colCount
+    self.__cell_value_source__ = cellValue
+    self.reloadData()
+
+  def reloadData(self) -> None:
+    """Queries the number of rows and columns from the data source and
+    rebinds every cell shown. Measured sizes are forgotten."""
+    if self.__row_count_source__ is None:
+      rows, cols = 0, 0
+    else:
+      rows = self.__row_count_source__()
+      cols = self.__col_count_source__()
+    self.__row_index__.reset(rows, self.estimatedRowHeight)
+    self.__col_index__.reset(cols, self.estimatedColWidth)
+    for key in [*self.__live_cells__, ]:
+      self._releaseCell(key)
+    self.__cell_window__ = None
+    self.scrollTo(self.__scroll_x__, self.__scroll_y__)
+    self.update()
+
+  def rebindCells(self) -> None:
+    """Rebinds every cell shown to its current value. Call this when the
+    values have changed but the number of rows and columns has not."""
+    for (row, col), cell in self.__live_cells__.items():
+      self.bindCell(cell, row, col, self.__cell_value_source__(row, col))
+    self.update()
+
+  def createCell(self) -> BoxItem:
+    """Creates a new cell. Cells are created only when the pool of
+    recycled cells is empty."""
+    return LabelItem()
+
+  def bindCell(self, cell: BoxItem, row: int, col: int,
+               value: object) -> None:
+    """Shows the value at the given row and column in the cell. The cell
+    may previously have shown any other value."""
+    if isinstance(cell, LabelItem):
+      cell.text = str(value)
+
+  def getCell(self, row: int, col: int) -> Optional[BoxItem]:
+    """Returns the cell bound to the given row and column, or None if the
+    row and column is outside the window of cells."""
+    return self.__live_cells__.get((row, col), None)
+
+  def getCells(self) -> dict[CellKey, BoxItem]:
+    """Returns the cells currently bound by their rows and columns."""
+    return {**self.__live_cells__, }
+
+  def getViewRect(self) -> QRectF:
+    """Returns the rectangle inside the box model in which the cells are
+    shown. The rectangle is relative to the top left corner of the
+    layout."""
+    size = self.__view_size__
+    if size is None:
+      size = QSizeF(self.size())
+    return QRectF(QPointF(0, 0), size).marginsRemoved(self.allMargins)
+
+  def getCellRect(self, row: int, col: int) -> QRectF:
+    """Returns the rectangle of the given row and column relative to the
+    top left corner of the layout. The rectangle may be outside the
+    view."""
+    view = self.getViewRect()
+    left = view.left() + self.__col_index__.getStart(col) - self.__scroll_x__
+    top = view.top() + self.__row_index__.getStart(row) - self.__scroll_y__
+    width = self.__col_index__.getSize(col)
+    height = self.__row_index__.getSize(row)
+    return QRectF(left, top, width, height)
+
+  def cellAt(self, point: QPointF) -> Optional[CellKey]:
+    """Returns the row and column at the point, which is relative to the
+    top left corner of the layout, or None if no cell is there."""
+    view = self.getViewRect()
+    if not view.contains(point):
+      return None
+    x = point.x() - view.left() + self.__scroll_x__
+    y = point.y() - view.top() + self.__scroll_y__
+    if x >= self.__col_index__.getTotal():
+      return None
+    if y >= self.__row_index__.getTotal():
+      return None
+    return self.__row_index__.indexAt(y), self.__col_index__.indexAt(x)
+
+  def scrollTo(self, x: float, y: float) -> None:
+    """Scrolls the view to the given offset into the table. The offset is
+    clamped such that the view does not scroll past the table."""
+    view = self.getViewRect()
+    size = self.contentSize
+    x = max(min(float(x), size.width() - view.width()), 0.)
+    y = max(min(float(y), size.height() - view.height()), 0.)
+    self.__scroll_x__, self.__scroll_y__ = x, y
+    self._updateWindow()
+    self.update()
+
+  def scrollBy(self, dx: float, dy: float) -> None:
+    """Scrolls the view by the given distance in pixels."""
+    self.scrollTo(self.__scroll_x__ + dx, self.__scroll_y__ + dy)
+
+  def scrollToCell(self, row: int, col: int) -> None:
+    """Scrolls the least distance that brings the cell at the given row
+    and column fully into view."""
+    view = self.getViewRect()
+    left = self.__col_index__.getStart(col)
+    top = self.__row_index__.getStart(row)
+    right = left + self.__col_index__.getSize(col)
+    bottom = top + self.__row_index__.getSize(row)
+    x, y = self.__scroll_x__, self.__scroll_y__
+    x = min(max(x, right - view.width()), left)
+    y = min(max(y, bottom - view.height()), top)
+    self.scrollTo(x, y)
+
+  def _getWindow(self) -> Window:
+    """Returns the first and beyond last rows and columns that should have
+    cells bound, given the view and the overscan."""
+    rowIndex, colIndex = self.__row_index__, self.__col_index__
+    if not len(rowIndex) or not len(colIndex):
+      return 0, 0, 0, 0
+    view, n = self.getViewRect(), max(self.overscan, 0)
+    x, y = self.__scroll_x__, self.__scroll_y__
+    row0 = max(rowIndex.indexAt(y) - n, 0)
+    row1 = min(rowIndex.indexAt(y + view.height()) + n + 1, len(rowIndex))
+    col0 = max(colIndex.indexAt(x) - n, 0)
+    col1 = min(colIndex.indexAt(x + view.width()) + n + 1, len(colIndex))
+    return row0, row1, col0, col1
+
+  def _releaseCell(self, key: CellKey) -> None:
+    """Returns the cell at the key to the pool of recycled cells."""
+    cell = self.__live_cells__.pop(key)
+    if key == self.__hover_key__:
+      self.__hover_key__ = None
+      cell.leaveEvent(QEvent(QEvent.Type.Leave))
+    self.__free_cells__.append(cell)
+
+  def _updateWindow(self) -> None:
+    """Binds cells to the window until measuring the new cells no longer
+    changes it. Rows entering the window may shrink when measured, which
+    brings further rows into view, so a few passes may be needed. Rows
+    keep their measured sizes, such that the passes soon settle, but the
+    number of passes is capped should the sizes keep changing."""
+    for _ in range(self.__max_passes__):
+      if not self._bindWindow():
+        return
+
+  def _bindWindow(self) -> bool:
+    """Releases the cells outside the window and binds cells to the rows
+    and columns entering it. The new cells are then measured. Returns
+    False if the window was unchanged."""
+    window = self._getWindow()
+    if window == self.__cell_window__:
+      return False
+    row0, row1, col0, col1 = window
+    live, free = self.__live_cells__, self.__free_cells__
+    for key in [*live, ]:
+      if not (row0 <= key[0] < row1 and col0 <= key[1] < col1):
+        self._releaseCell(key)
+    newCells = []
+    for row in range(row0, row1):
+      for col in range(col0, col1):
+        if (row, col) in live:
+          continue
+        cell = free.pop() if free else self.createCell()
+        self.bindCell(cell, row, col, self.__cell_value_source__(row, col))
+        live[(row, col)] = cell
+        newCells.append((row, col, cell))
+    oldWindow = self.__cell_window__ or (0, 0, 0, 0)
+    self.__cell_window__ = window
+    if not newCells or not self.measureCells:
+      return False
+    rowIndex, y = self.__row_index__, self.__scroll_y__
+    anchorRow = rowIndex.indexAt(y)
+    anchorShift = y - rowIndex.getStart(anchorRow)
+    self._measure(newCells, oldWindow)
+    y = rowIndex.getStart(anchorRow) + anchorShift
+    view = self.getViewRect()
+    maxY = max(rowIndex.getTotal() - view.height(), 0.)
+    self.__scroll_y__ = max(min(y, maxY), 0.)
+    return True
+
+  def _measure(self, newCells: list[tuple[int, int, BoxItem]],
+               oldWindow: Window) -> None:
+    """Fits the rows and columns to the required sizes of the new cells.
+    Rows entering the window are given the height of their tallest cell,
+    while rows already in the window and every column only grow."""
+    heights, widths = {}, {}
+    for row, col, cell in newCells:
+      size = cell.getRequiredSize()
+      heights[row] = max(heights.get(row, 0.), size.height())
+      widths[col] = max(widths.get(col, 0.), size.width())
+    rowIndex, colIndex = self.__row_index__, self.__col_index__
+    oldRow0, oldRow1 = oldWindow[:2]
+    for row, height in heights.items():
+      if oldRow0 <= row < oldRow1:
+        height = max(height, rowIndex.getSize(row))
+      if height > 0:
+        rowIndex.setSize(row, height)
+    for col, width in widths.items():
+      if width > colIndex.getSize(col):
+        colIndex.setSize(col, width)
+
+  def requiredSize(self) -> QSizeF:
+    """The layout requires room for a single cell of the estimated
+    size. """
+    size = QSizeF(self.estimatedColWidth, self.estimatedRowHeight)
+    return QRectF(QPointF(0, 0), size).marginsAdded(self.allMargins).size()
+
+  def resizeEvent(self, event: QResizeEvent) -> None:
+    """Updates the window of cells to the new size."""
+    self.__view_size__ = QSizeF(event.size())
+    self.scrollTo(self.__scroll_x__, self.__scroll_y__)
+
+  def paintEvent(self, event: QPaintEvent) -> None:
+    """Paints the layout when shown directly."""
+    painter = QPainter()
+    painter.begin(self)
+    painter.setClipRegion(event.region())
+    self.paintMeLike(QRectF(self.rect()), painter)
+    painter.end()
+
+  def paintMeLike(self, rect: QRectF, painter: QPainter) -> None:
+    """Paints the box model and then the cells inside the view. Only the
+    cells intersecting the clip region of the painter are painted. """
+    rect = rect if isinstance(rect, QRectF) else QRect.toRectF(rect)
+    if self.__view_size__ is None or self.__view_size__ != rect.size():
+      self.__view_size__ = rect.size()
+      self.scrollTo(self.__scroll_x__, self.__scroll_y__)
+    BoxWidget.paintMeLike(self, rect, painter)
+    view = self.getViewRect().translated(rect.topLeft())
+    if painter.hasClipping():
+      view = view.intersected(painter.clipBoundingRect())
+    if view.isEmpty() or not self.__live_cells__:
+      return
+    painter.save()
+    painter.setClipRect(view)
+    row0, row1, col0, col1 = self.__cell_window__
+    origin = self.getCellRect(row0, col0).translated(rect.topLeft())
+    rowTops, colLefts = [origin.top()], [origin.left()]
+    for row in range(row0, row1):
+      rowTops.append(rowTops[-1] + self.__row_index__.getSize(row))
+    for col in range(col0, col1):
+      colLefts.append(colLefts[-1] + self.__col_index__.getSize(col))
+    for (row, col), cell in self.__live_cells__.items():
+      top, left = rowTops[row - row0], colLefts[col - col0]
+      bottom, right = rowTops[row - row0 + 1], colLefts[col - col0 + 1]
+      if bottom < view.top() or top > view.bottom():
+        continue
+      if right < view.left() or left > view.right():
+        continue
+      cell.paintMeLike(QRectF(left, top, right - left, bottom - top),
+                       painter)
+    painter.restore()
+
+  def _setHoverKey(self, key: Optional[CellKey], point: QPointF) -> None:
+    """Sets the cell under the cursor. Only the cells entered and left
+    receive events."""
+    oldKey = self.__hover_key__
+    if oldKey == key:
+      return
+    self.__hover_key__ = key
+    if oldKey is not None and oldKey in self.__live_cells__:
+      self.__live_cells__[oldKey].leaveEvent(QEvent(QEvent.Type.Leave))
+      self._repaintCell(oldKey)
+    if key is not None:
+      relPos = point - self.getCellRect(*key).topLeft()
+      self.__live_cells__[key].enterEvent(QEnterEvent(relPos, relPos, relPos))
+      self._repaintCell(key)
+
+  def _repaintCell(self, key: CellKey) -> None:
+    """Schedules a repaint of the cell at the key."""
+    rect = self.getCellRect(*key).intersected(self.getViewRect())
+    if not rect.isEmpty():
+      self.update(QRectF.toAlignedRect(rect))
+
+  def _routeMouse(self, event: QMouseEvent) -> Optional[CellKey]:
+    """Routes the mouse event to the cell under the cursor with the
+    position relative to the cell. Returns the key of the cell or None if
+    no cell is under the cursor."""
+    point = event.position()
+    key = self.cellAt(point)
+    if key is None or key not in self.__live_cells__:
+      return None
+    cell = self.__live_cells__[key]
+    relPos = point - self.getCellRect(*key).topLeft()
+    if event.type() == QEvent.Type.MouseMove:
+      cell.mouseMoveAt(relPos, event)
+      self._repaintCell(key)
+      return key
+    newEvent = QMouseEvent(event.type(), relPos, event.button(),
+                           event.buttons(), event.modifiers())
+    if event.type() == QEvent.Type.MouseButtonPress:
+      cell.mousePressEvent(newEvent)
+    else:
+      cell.mouseReleaseEvent(newEvent)
+    self._repaintCell(key)
+    return key
+
+  def leaveEvent(self, event: QEvent) -> None:
+    """Leaves the cell under the cursor."""
+    self._setHoverKey(None, QPointF(-1, -1))
+
+  def mouseMoveEvent(self, event: QMouseEvent) -> None:
+    """Routes the mouse move event to the cell under the cursor."""
+    point = event.position()
+    key = self.cellAt(point)
+    self._setHoverKey(key if key in self.__live_cells__ else None, point)
+    self._routeMouse(event)
+
+  def mousePressEvent(self, event: QMouseEvent) -> None:
+    """Routes the mouse press event to the cell under the cursor."""
+    if self._routeMouse(event) is None:
+      BoxWidget.mousePressEvent(self, event)
+
+  def mouseReleaseEvent(self, event: QMouseEvent) -> None:
+    """Routes the mouse release event to the cell under the cursor."""
+    if self._routeMouse(event) is None:
+      BoxWidget.mouseReleaseEvent(self, event)
+
+  def wheelEvent(self, event: QWheelEvent) -> None:
+    """Scrolls the view. Devices reporting pixel distances scroll by
+    exactly that distance, while wheels scroll three estimated rows per
+    step."""
+    pixels = event.pixelDelta()
+    if pixels.isNull():
+      angle = event.angleDelta()
+      step = 3 * self.estimatedRowHeight / 120
+      dx, dy = -angle.x() * step, -angle.y() * step
+    else:
+      dx, dy = -pixels.x(), -pixels.y()
+    self.scrollBy(dx, dy)
+
+  def __init__(self, *args) -> None:
+    """Positional callables are taken as the data source in the order
+    row count, column count and cell value."""
+    BoxWidget.__init__(self, *args)
+    self.__row_index__ = PrefixIndex(0, self.estimatedRowHeight)
+    self.__col_index__ = PrefixIndex(0, self.estimatedColWidth)
+    self.__live_cells__ = {}
+    self.__free_cells__ = []
+    self.setMouseTracking(True)
+    callbacks = [arg for arg in args if callable(arg)]
+    if len(callbacks) == 3:
+      self.setDataSource(*callbacks)
+    elif callbacks:
+      e = """Expected the data source as three callables, but received:
+      %d!"""
+      raise TypeError(monoSpace(e % len(callbacks)))
@@ -1,4 +1,5 @@
-"""This file provides functions relating to QBrush instances."""
+"""This file provides functions relating to QBrush instances. The brushes
+returned are copies of instances in the paint pool."""
 #  AGPL-3.0 license
 #  Copyright (c) 2024 Asger Jon Vistisen
 from __future__ import annotations
@@ -6,18 +7,16 @@ from __future__ import annotations
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QBrush, QColor
 
+from ezside.tools import pooledBrush
+
+_Transparent = QColor(0, 0, 0, 0, )
+
 
 def emptyBrush() -> QBrush:
   """Return a QBrush with no color."""
-  brush = QBrush()
-  brush.setStyle(Qt.BrushStyle.NoBrush)
-  brush.setColor(QColor(0, 0, 0, 0, ))
-  return brush
+  return pooledBrush(_Transparent, Qt.BrushStyle.NoBrush)
 
 
 def fillBrush(color: QColor) -> QBrush:
   """Return a QBrush filled with the specified color."""
-  brush = QBrush()
-  brush.setStyle(Qt.BrushStyle.SolidPattern)
-  brush.setColor(color)
-  return brush
+  return pooledBrush(color, Qt.BrushStyle.SolidPattern)
@@ -3,7 +3,8 @@
 #  Copyright (c) 2024 Asger Jon Vistisen
 from __future__ import annotations
 
-from typing import Callable
+from functools import lru_cache
+from typing import Callable, TypeAlias
 
 from PySide6.QtCore import QSizeF, QRectF
 from PySide6.QtGui import QColor, QFont, QPen, Qt, QPainter, QFontMetrics, \
@@ -14,10 +15,43 @@ from worktoy.meta import BaseObject
 from worktoy.parse import maybeType
 
 from ezside.tools import FontWeight, FontFamily, FontCap, Align, ColorBox
+from ezside.tools import pooledPen, paintPoolInfo
+
+FontKey: TypeAlias = tuple[
+  str, int, QFont.Weight, QFont.Capitalization, bool, bool, bool]
 
 ic.configureOutput(includeContext=True)
 
 
+@lru_cache(maxsize=256)
+def _cachedQFont(*fontKey) -> QFont:
+  """Creates the QFont matching the key for the cache. It must not be
+  returned to callers."""
+  family, size, weight, cap, italic, underline, strike = fontKey
+  out = QFont()
+  QFont.setFamily(out, family)
+  QFont.setWeight(out, weight)
+  QFont.setCapitalization(out, cap)
+  QFont.setItalic(out, italic)
+  QFont.setUnderline(out, underline)
+  QFont.setStrikeOut(out, strike)
+  QFont.setPointSize(out, size)
+  return out
+
+
+@lru_cache(maxsize=256)
+def _cachedMetrics(*fontKey) -> QFontMetricsF:
+  """Returns the QFontMetricsF for the font matching the key."""
+  return QFontMetricsF(_cachedQFont(*fontKey))
+
+
+@lru_cache(maxsize=4096)
+def _cachedBoundRect(fontKey: FontKey, text: str) -> QRectF:
+  """Returns the bounding rectangle of the text in the font matching the
+  key. Callers must copy the rectangle before changing it."""
+  return _cachedMetrics(*fontKey).boundingRect(text)
+
+
 class Font(BaseObject):
   """Font encapsulates settings for fonts and text rendering."""
 
@@ -31,6 +65,10 @@ class Font(BaseObject):
   align = AttriBox[Align](DEFAULT(Align.CENTER))
   color = ColorBox(QColor(0, 0, 0, 255))
 
+  __font_key__ = None
+  __change_callbacks__ = None
+
+  fontKey = Field()
   asQFont = Field()
   asQPen = Field()
   asQtAlign = Field()
@@ -38,13 +76,81 @@ class Font(BaseObject):
   boundSize = Field()
   boundRect = Field()
 
+  @weight.ONSET
+  @size.ONSET
+  @family.ONSET
+  @cap.ONSET
+  @italic.ONSET
+  @underline.ONSET
+  @strike.ONSET
+  def _resetKeys(self, oldVal: object, newVal: object) -> None:
+    """Setter-hook clearing the cache key whenever a setting changes."""
+    self.__font_key__ = None
+    if oldVal != newVal:
+      self._notifyChange(True)
+
+  @align.ONSET
+  @color.ONSET
+  def _updateLook(self, oldVal: object, newVal: object) -> None:
+    """Setter-hook for changes to settings not affecting the size of the
+    text."""
+    if oldVal != newVal:
+      self._notifyChange(False)
+
+  def addChangeCallback(self, callMeMaybe: Callable) -> None:
+    """Registers a callable to be called after each change to the
+    settings. It receives True if the change may affect the size of text
+    in this font, and False if it affects only how the text is painted."""
+    if self.__change_callbacks__ is None:
+      self.__change_callbacks__ = []
+    self.__change_callbacks__.append(callMeMaybe)
+
+  def removeChangeCallback(self, callMeMaybe: Callable) -> None:
+    """Removes a callable registered by 'addChangeCallback'. Callables
+    not registered are ignored."""
+    if callMeMaybe in (self.__change_callbacks__ or []):
+      self.__change_callbacks__.remove(callMeMaybe)
+
+  def _notifyChange(self, resized: bool) -> None:
+    """Calls the registered callables."""
+    for callMeMaybe in [*(self.__change_callbacks__ or []), ]:
+      callMeMaybe(resized)
+
+  @fontKey.GET
+  def _getFontKey(self) -> FontKey:
+    """Getter-function for the key identifying the QFont and the
+    QFontMetricsF in the shared caches."""
+    if self.__font_key__ is None:
+      self.__font_key__ = (self.family.value, self.size, self.weight.qt,
+                           self.cap.qt, self.italic, self.underline,
+                           self.strike)
+    return self.__font_key__
+
+  @classmethod
+  def cacheInfo(cls) -> dict[str, object]:
+    """Returns the statistics of the caches shared by every Font."""
+    return {
+        'fonts'  : _cachedQFont.cache_info(),
+        'metrics': _cachedMetrics.cache_info(),
+        'pens'   : paintPoolInfo()['pens'],
+        'text'   : _cachedBoundRect.cache_info(),
+    }
+
+  @classmethod
+  def clearCache(cls) -> None:
+    """Clears the caches shared by every Font. This is required only if
+    the available fonts change at runtime."""
+    _cachedQFont.cache_clear()
+    _cachedMetrics.cache_clear()
+    _cachedBoundRect.cache_clear()
+
   @boundSize.GET
   def _getBoundSize(self) -> Callable:
     """Getter-function for QFontMetrics"""
 
     def callMeMaybe(text: str) -> QSizeF:
       """Returns the bounding rectangle of the text"""
-      return self.metrics.boundingRect(text).size()
+      return _cachedBoundRect(self.fontKey, text).size()
 
     return callMeMaybe
 
@@ -54,31 +160,20 @@ class Font(BaseObject):
 
     def callMeMaybe(text: str) -> QRectF:
       """Returns the bounding rectangle of the text"""
-      return self.metrics.boundingRect(text)
+      return QRectF(_cachedBoundRect(self.fontKey, text))
 
     return callMeMaybe
 
   @asQFont.GET
   def _getQFont(self) -> QFont:
-    """Getter-function for QFont representation"""
-    out = QFont()
-    QFont.setFamily(out, self.family.value)
-    QFont.setWeight(out, self.weight.qt)
-    QFont.setCapitalization(out, self.cap.qt)
-    QFont.setItalic(out, self.italic)
-    QFont.setUnderline(out, self.underline)
-    QFont.setStrikeOut(out, self.strike)
-    QFont.setPointSize(out, self.size)
-    return out
+    """Getter-function for QFont representation. Returns a copy of the
+    cached QFont, which Qt shares implicitly until either is changed."""
+    return QFont(_cachedQFont(*self.fontKey))
 
   @asQPen.GET
   def _getQPen(self) -> QPen:
-    """Getter-function for QPen"""
-    pen = QPen()
-    pen.setStyle(Qt.PenStyle.SolidLine)
-    pen.setWidth(1)
-    pen.setColor(self.color)
-    return pen
+    """Getter-function for QPen in the color of the font."""
+    return pooledPen(self.color, 1, Qt.PenStyle.SolidLine)
 
   @asQtAlign.GET
   def _getQtAlign(self) -> Qt.AlignmentFlag:
@@ -100,7 +195,7 @@ class Font(BaseObject):
   @metrics.GET
   def _getMetrics(self) -> QFontMetricsF:
     """Getter-function for QFontMetrics"""
-    return QFontMetricsF(self.asQFont)
+    return _cachedMetrics(*self.fontKey)
 
   def __init__(self, *args) -> None:
     self.size = maybeType(int, *args, 12)
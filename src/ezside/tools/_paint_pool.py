@@ -0,0 +1,64 @@
+"""The paint pool provides shared instances of QPen and QBrush. Painting
+code requests the same few pens and brushes many times per frame, so
+instances are kept in bounded least recently used caches keyed on color,
+width and style. The pooled instances themselves are never handed out.
+Callers receive copies, which Qt shares implicitly with the pooled
+instance until either is changed, so a copy is cheap and changing it
+does not affect other callers."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TypeAlias
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPen, QBrush, QColor
+
+RGBA: TypeAlias = tuple[int, int, int, int]
+
+
+@lru_cache(maxsize=512)
+def _pooledPen(rgba: RGBA, width: float, style: Qt.PenStyle) -> QPen:
+  """Creates the pen for the pool. It must not be returned to callers."""
+  pen = QPen()
+  pen.setStyle(style)
+  pen.setWidthF(width)
+  pen.setColor(QColor(*rgba))
+  return pen
+
+
+@lru_cache(maxsize=512)
+def _pooledBrush(rgba: RGBA, style: Qt.BrushStyle) -> QBrush:
+  """Creates the brush for the pool. It must not be returned to
+  callers."""
+  brush = QBrush()
+  brush.setStyle(style)
+  brush.setColor(QColor(*rgba))
+  return brush
+
+
+def pooledPen(color: QColor, width: float, style: Qt.PenStyle) -> QPen:
+  """Returns a copy of the pooled pen having the given color, width and
+  style."""
+  return QPen(_pooledPen(QColor.getRgb(color), width, style))
+
+
+def pooledBrush(color: QColor, style: Qt.BrushStyle) -> QBrush:
+  """Returns a copy of the pooled brush having the given color and
+  style."""
+  return QBrush(_pooledBrush(QColor.getRgb(color), style))
+
+
+def paintPoolInfo() -> dict[str, object]:
+  """Returns the statistics of the pen and brush pools."""
+  return {
+      'pens'   : _pooledPen.cache_info(),
+      'brushes': _pooledBrush.cache_info(),
+  }
+
+
+def clearPaintPool() -> None:
+  """Removes every pen and brush from the pools."""
+  _pooledPen.cache_clear()
+  _pooledBrush.cache_clear()
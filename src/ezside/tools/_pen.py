@@ -1,4 +1,5 @@
-"""This file provides functions for creating QPen instances."""
+"""This file provides functions for creating QPen instances. The pens
+returned are copies of instances in the paint pool."""
 #  AGPL-3.0 license
 #  Copyright (c) 2024 Asger Jon Vistisen
 from __future__ import annotations
@@ -7,49 +8,39 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QPen, QColor
 from worktoy.parse import maybe
 
+from ezside.tools import pooledPen
+
+_Black = QColor(0, 0, 0, 255)
+_Transparent = QColor(0, 0, 0, 0, )
+
 
 def emptyPen() -> QPen:
   """Return a QPen with no color and width."""
-  pen = QPen()
-  pen.setStyle(Qt.PenStyle.NoPen)
-  pen.setColor(QColor(0, 0, 0, 0, ))
-  return pen
+  return pooledPen(_Transparent, 1, Qt.PenStyle.NoPen)
 
 
 def textPen(color: QColor = None) -> QPen:
   """Creates a QPen suitable for drawing text. The pen will default to
   black, but this can be overridden by passing a color argument."""
-  pen = QPen()
-  pen.setStyle(Qt.PenStyle.SolidLine)
-  pen.setColor(maybe(color, QColor(0, 0, 0, 255)))
-  return pen
+  return pooledPen(maybe(color, _Black), 1, Qt.PenStyle.SolidLine)
 
 
 def solidPen(color: QColor = None, ) -> QPen:
   """Creates a QPen suitable for drawing solid lines. The pen will default
   to black, but this can be overridden by passing a color argument."""
-  pen = QPen()
-  pen.setStyle(Qt.PenStyle.SolidLine)
-  pen.setColor(maybe(color, QColor(0, 0, 0, 255)))
-  return pen
+  return pooledPen(maybe(color, _Black), 1, Qt.PenStyle.SolidLine)
 
 
 def dashPen(color: QColor = None, ) -> QPen:
   """Creates a QPen suitable for drawing dashed lines. The pen will default
   to black, but this can be overridden by passing a color argument."""
-  pen = QPen()
-  pen.setStyle(Qt.PenStyle.DashLine)
-  pen.setColor(maybe(color, QColor(0, 0, 0, 255)))
-  return pen
+  return pooledPen(maybe(color, _Black), 1, Qt.PenStyle.DashLine)
 
 
 def dotPen(color: QColor = None) -> QPen:
   """Creates a QPen suitable for drawing dotted lines. The pen will default
   to black, but this can be overridden by passing a color argument."""
-  pen = QPen()
-  pen.setStyle(Qt.PenStyle.DotLine)
-  pen.setColor(maybe(color, QColor(0, 0, 0, 255)))
-  return pen
+  return pooledPen(maybe(color, _Black), 1, Qt.PenStyle.DotLine)
 
 
 def parsePen(*args) -> QPen:
@@ -65,11 +56,7 @@ def parsePen(*args) -> QPen:
     if color is not None and width is not None and style is not None:
       break
   else:
-    color = maybe(color, QColor(0, 0, 0, 255))
+    color = maybe(color, _Black)
     width = maybe(width, 1)
     style = maybe(style, Qt.PenStyle.SolidLine)
-  pen = QPen()
-  pen.setColor(color)
-  pen.setWidth(width)
-  pen.setStyle(style)
-  return pen
+  return pooledPen(color, width, style)
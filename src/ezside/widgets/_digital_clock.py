@@ -12,8 +12,9 @@ from PySide6.QtWidgets import QSizePolicy
 from icecream import ic
 from worktoy.desc import AttriBox, Field
 
+from ezside.tools import fillBrush
 from ezside.layouts import AbstractLayout
-from ezside.basewidgets import BoxWidget, SevenSeg
+from ezside.basewidgets import BoxWidget, BoxItem, SevenSegItem
 
 ic.configureOutput(includeContext=True)
 
@@ -29,7 +30,7 @@ class Spacer(BoxWidget):
                        QSizePolicy.Policy.Expanding)
 
 
-class Colon(BoxWidget):
+class Colon(BoxItem):
   """Colon provides a widget displaying a colon using two seven segment
   displays."""
 
@@ -40,10 +41,7 @@ class Colon(BoxWidget):
   @brush.GET
   def _getBrush(self) -> QBrush:
     """Getter-function for the brush"""
-    brush = QBrush()
-    brush.setStyle(Qt.BrushStyle.SolidPattern)
-    brush.setColor(self.color)
-    return brush
+    return fillBrush(self.color)
 
   def requiredSize(self) -> QSizeF:
     """This method returns the required size of the widget."""
@@ -63,10 +61,7 @@ class Colon(BoxWidget):
     marginRect.moveCenter(center)
     borderRect.moveCenter(center)
     paddedRect.moveCenter(center)
-    brush = QBrush()
-    brush.setStyle(Qt.BrushStyle.SolidPattern)
-    brush.setColor(QColor(255, 0, 0, 255))
-    painter.setBrush(brush)
+    painter.setBrush(self.brush)
     viewRect = QRect.toRectF(painter.viewport())
     h = viewRect.height()
     d = h / 4
@@ -107,14 +102,14 @@ class DigitalClock(AbstractLayout):
     """The constructor method for the DigitalClock widget."""
     AbstractLayout.__init__(self, *args)
     self.backgroundColor = QColor(0, 0, 0, 255)
-    self.tenHour = SevenSeg()
-    self.oneHour = SevenSeg()
+    self.tenHour = SevenSegItem()
+    self.oneHour = SevenSegItem()
     self.colon1 = Colon()
-    self.tenMin = SevenSeg()
-    self.oneMin = SevenSeg()
+    self.tenMin = SevenSegItem()
+    self.oneMin = SevenSegItem()
     self.colon2 = Colon()
-    self.tenSec = SevenSeg()
-    self.oneSec = SevenSeg()
+    self.tenSec = SevenSegItem()
+    self.oneSec = SevenSegItem()
     self.addWidget(self.tenHour, 0, 0)
     self.addWidget(self.oneHour, 0, 1)
     self.addWidget(self.colon1, 0, 2)
@@ -125,7 +120,7 @@ class DigitalClock(AbstractLayout):
     self.addWidget(self.oneSec, 0, 7)
     self.refreshTime()
 
-  def _getWidgets(self) -> list[BoxWidget]:
+  def _getWidgets(self) -> list[BoxItem]:
     """This method returns the basewidgets in the layout."""
     return [
         self.tenHour,
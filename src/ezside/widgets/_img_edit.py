@@ -4,26 +4,28 @@
 from __future__ import annotations
 
 import os
-from typing import TypeAlias, Union
+from math import floor, ceil
+from typing import TypeAlias, Union, Callable
 
-import numpy as np
-import torch
-from PIL import Image
 from PySide6.QtCore import (QSizeF, QSize, QRectF, QPointF, Slot, QEvent,
                             Qt, Signal, QRect)
 from PySide6.QtGui import QPainter, QPixmap, QImage, \
-  QMouseEvent, QEnterEvent, QColor, QContextMenuEvent
+  QMouseEvent, QEnterEvent, QColor, QContextMenuEvent, QWheelEvent
 from PySide6.QtWidgets import QMenu
 from icecream import ic
-from torchvision.transforms import ToTensor, ToPILImage
 from worktoy.desc import Field, AttriBox, THIS
 from worktoy.parse import maybe
 
 from ezside.dialogs import NewDialog
 from ezside.basewidgets import BoxWidget
+from ezside.imaging import BrushStroke, PixelBuffer, TiledImage, MipPyramid
+from ezside.imaging import UndoStack, OpenImageJob, SaveImageJob, StrokeLog
+from ezside.imaging import AutosaveJournal, LayerStack
+from ezside.tools import fillBrush, emptyPen, textPen
 from ezside.widgets import ImgContextMenu
 
 Rect: TypeAlias = Union[QRect, QRectF]
+Box: TypeAlias = tuple[int, int, int, int]
 ic.configureOutput(includeContext=True)
 
 
@@ -31,43 +33,106 @@ class ImgEdit(BoxWidget):
   """ImgEdit shows an image and allows edits. """
 
   __inner_file__ = None
-  __data_tensor__ = None
-  __pix_map__ = None
+  __pixel_buffer__ = None
+  __composite__ = None
   __left_mouse_pressed__ = None
   __under_mouse__ = None
   __paint_color__ = None
   __mouse_region__ = None
   __brush_radius__ = None
+  __brush_opacity__ = 0.25
+  __brush_flow__ = 1.
+  __brush_mode__ = 'normal'
+  __brush_stroke__ = None
+  __mip_pyramid__ = None
+  __zoom__ = 1.
+  __view_origin__ = None
+  __view_size__ = None
+  __pan_anchor__ = None
+  __min_zoom__ = 1 / 64
+  __max_zoom__ = 32.
+  __max_view_width__ = 1024
+  __max_view_height__ = 768
+  __open_generation__ = 0
+  __open_job__ = None
+  __open_jobs__ = None
+  __open_progress__ = None
+  __progressive_open__ = True
+  __preview_buffer__ = None
+  __loading_image__ = None
+  __ready_rows__ = 0
+  __save_generation__ = 0
+  __save_jobs__ = None
+  __edit_locked__ = False
+  __autosave_journal__ = None
+  __layer_stack__ = None
 
   contextMenu = AttriBox[ImgContextMenu](THIS)
+  undoStack = AttriBox[UndoStack]()
+  strokeLog = AttriBox[StrokeLog]()
 
   brushRadius = Field()
   pix = Field()
+  image = Field()
   fid = Field()
   data = Field()
+  layers = Field()
   paintColor = Field()
   leftMouse = Field()
   mouseRegion = Field()
+  zoom = Field()
+  viewOrigin = Field()
 
   requestColor = Signal()
   requestFid = Signal()
   newFid = Signal(str)
   openFid = Signal(str)
   saveFid = Signal(str)
+  ioFailed = Signal(str)
 
   @brushRadius.GET
   def _getBrushRadius(self) -> int:
     """Getter-function for brush radius"""
-    return self.__brush_radius__
+    return maybe(self.__brush_radius__, 5)
 
   @brushRadius.SET
   def _setBrushRadius(self, brushRadius: int) -> None:
     """Setter-function for brush radius"""
     self.__brush_radius__ = brushRadius
 
+  @zoom.GET
+  def _getZoom(self) -> float:
+    """Getter-function for the zoom. At zoom 1, one image pixel covers one
+    screen pixel."""
+    return self.__zoom__
+
+  @zoom.SET
+  def _setZoom(self, zoom: float) -> None:
+    """Setter-function for the zoom. The zoom is clamped to the supported
+    range and the point at the centre of the view is kept in place."""
+    viewSize = self._getViewSize()
+    center = QPointF(viewSize.width() / 2, viewSize.height() / 2)
+    self.zoomAt(zoom / self.__zoom__, center + self._viewOffset())
+
+  @viewOrigin.GET
+  def _getViewOrigin(self) -> QPointF:
+    """Getter-function for the image point shown at the top left corner
+    of the view"""
+    return QPointF(maybe(self.__view_origin__, QPointF(0, 0)))
+
+  @viewOrigin.SET
+  def _setViewOrigin(self, origin: QPointF) -> None:
+    """Setter-function for the image point shown at the top left corner
+    of the view. The view is kept over the image."""
+    self.__view_origin__ = self._clampOrigin(origin)
+    self.update()
+
   @fid.ONSET
   def _onFidSet(self, oldVal: str, newVal: str) -> None:
     """Hook to change in fid"""
+    if self.__autosave_journal__ is not None:
+      if self.__autosave_journal__.getLayerStack() is not None:
+        self.__autosave_journal__.setFileName(newVal)
     self.newFid.emit(newVal)
 
   @leftMouse.GET
@@ -86,25 +151,177 @@ class ImgEdit(BoxWidget):
     self.__paint_color__ = color
 
   @Slot(str)
-  def openImage(self, fid: str) -> None:
-    """Slot opens the given image. """
+  def openImage(self, fid: str, progressive: bool = None) -> None:
+    """Slot opens the given image. The image is decoded on the thread
+    pool while a placeholder shows the progress. If progressive, which is
+    the default, a reduced preview is shown as soon as it is decoded and
+    the rows at full resolution replace it as they are loaded. Opening
+    another image before this one is ready cancels this one. Jobs
+    cancelled are kept until they finish running. """
+    if self.__open_job__ is not None:
+      self.__open_job__.cancel()
+    self._clearProgressive()
+    self.__open_generation__ += 1
+    progressive = maybe(progressive, self.__progressive_open__)
+    job = OpenImageJob(self.__open_generation__, fid, progressive)
+    job.signals.previewReady.connect(self._onPreviewReady)
+    job.signals.allocated.connect(self._onAllocated)
+    job.signals.rowsReady.connect(self._onRowsReady)
+    job.signals.progress.connect(self._onOpenProgress)
+    job.signals.opened.connect(self._onOpened)
+    job.signals.failed.connect(self._onOpenFailed)
+    job.signals.finished.connect(self._onOpenFinished)
+    if self.__open_jobs__ is None:
+      self.__open_jobs__ = {}
+    self.__open_jobs__[self.__open_generation__] = job
+    self.__open_job__ = job
+    self.__open_progress__ = 0.
+    self.update()
+    job.start()
+
+  @Slot(int, float)
+  def _onOpenProgress(self, generation: int, progress: float) -> None:
+    """Updates the progress shown by the placeholder"""
+    if generation == self.__open_generation__:
+      self.__open_progress__ = progress
+      self.update()
+
+  def _clearProgressive(self) -> None:
+    """Removes the preview and the partially loaded image."""
+    self.__preview_buffer__ = None
+    self.__loading_image__ = None
+    self.__ready_rows__ = 0
+
+  @Slot(int, object)
+  def _onPreviewReady(self, generation: int, preview: PixelBuffer) -> None:
+    """Shows the reduced preview of the image being opened"""
+    if generation == self.__open_generation__:
+      self.__preview_buffer__ = preview
+      self.update()
+
+  @Slot(int, object)
+  def _onAllocated(self, generation: int, image: TiledImage) -> None:
+    """Receives the tiled image whose rows are being loaded"""
+    if generation == self.__open_generation__:
+      self.__loading_image__ = image
+      self.__ready_rows__ = 0
+
+  @Slot(int, int)
+  def _onRowsReady(self, generation: int, rows: int) -> None:
+    """Shows the rows loaded at full resolution"""
+    if generation == self.__open_generation__:
+      self.__ready_rows__ = rows
+      if self.__preview_buffer__ is not None:
+        self.update()
+
+  @Slot(int, object)
+  def _onOpened(self, generation: int, image: TiledImage) -> None:
+    """Shows the image decoded by the most recent open job"""
+    if generation != self.__open_generation__:
+      return
+    fid = self.__open_job__.getFileName()
+    self.__open_job__ = None
+    self.__open_progress__ = None
+    self._clearProgressive()
+    self._endStroke()
     self.fid = fid
-    image = Image.open(fid).convert("RGB")
-    aspectRatio = image.size[0] / image.size[1]
-    if aspectRatio < 1:
-      image = image.resize((256, int(256 / aspectRatio)), )
-    else:
-      image = image.resize((int(256 * aspectRatio), 256), )
-    transform = ToTensor()
-    self.__data_tensor__ = transform(image)
-    ic(self.__data_tensor__.shape)
+    self.__pixel_buffer__ = image
     self.updateImage()
+    self.update()
     self.openFid.emit(self.fid)
 
+  @Slot(int, str)
+  def _onOpenFailed(self, generation: int, message: str) -> None:
+    """Removes the placeholder after the most recent open job failed"""
+    if generation != self.__open_generation__:
+      return
+    self.__open_job__ = None
+    self.__open_progress__ = None
+    self._clearProgressive()
+    self.update()
+    self.ioFailed.emit(message)
+
+  @Slot(int)
+  def _onOpenFinished(self, generation: int) -> None:
+    """Releases the open job once it stops running"""
+    self.__open_jobs__.pop(generation, None)
+
+  @data.GET
+  def _getData(self) -> TiledImage:
+    """Getter-function for the tiled image holding the pixels of the
+    active layer"""
+    return self.__pixel_buffer__
+
+  @data.SET
+  def _setData(self, pixelBuffer: PixelBuffer) -> None:
+    """Setter-function for the tiled image holding the pixels. The image
+    replaces every layer. Other pixel buffers are copied to a tiled
+    image."""
+    if not isinstance(pixelBuffer, TiledImage):
+      pixelBuffer = TiledImage.fromArray(pixelBuffer.array)
+    self.__pixel_buffer__ = pixelBuffer
+    self.updateImage()
+
+  @layers.GET
+  def _getLayers(self) -> LayerStack:
+    """Getter-function for the layers of the image"""
+    return self.__layer_stack__
+
+  def _changeLayers(self, callMeMaybe: Callable, *args) -> None:
+    """Ends the current stroke, changes the layers by calling the
+    callable with the layer stack and the arguments, and then shows the
+    new composite."""
+    if self.__layer_stack__ is None or self.__edit_locked__:
+      return
+    self._endStroke()
+    callMeMaybe(self.__layer_stack__, *args)
+    self.__pixel_buffer__ = self.__layer_stack__.getActiveBuffer()
+    self.updateImage()
+
+  @Slot()
+  def addLayer(self, name: str = None) -> None:
+    """Adds a transparent layer above the active layer and makes it
+    active"""
+    self._changeLayers(LayerStack.addLayer, name)
+
+  @Slot(int)
+  def removeLayer(self, index: int) -> None:
+    """Removes the layer at the index"""
+    self._changeLayers(LayerStack.removeLayer, index)
+
+  @Slot(int)
+  def setActiveLayer(self, index: int) -> None:
+    """Makes the layer at the index active"""
+    self._changeLayers(LayerStack.setActiveIndex, index)
+
+  @Slot(int, float)
+  def setLayerOpacity(self, index: int, opacity: float) -> None:
+    """Sets the opacity of the layer at the index"""
+    self._changeLayers(LayerStack.setLayerOpacity, index, opacity)
+
+  @Slot(int, str)
+  def setLayerBlendMode(self, index: int, mode: str) -> None:
+    """Sets the blend mode of the layer at the index"""
+    self._changeLayers(LayerStack.setLayerBlendMode, index, mode)
+
+  @Slot(int, bool)
+  def setLayerVisible(self, index: int, visible: bool) -> None:
+    """Shows or hides the layer at the index"""
+    self._changeLayers(LayerStack.setLayerVisible, index, visible)
+
+  @image.GET
+  def _getImage(self) -> QImage:
+    """Getter-function for a copy of the image shown"""
+    if self.__composite__ is None:
+      return QImage()
+    return self.__composite__.asQImage()
+
   @pix.GET
   def _getPix(self) -> QPixmap:
     """Getter-function for pixmap"""
-    return self.__pix_map__ or QPixmap()
+    if self.__composite__ is None:
+      return QPixmap()
+    return QPixmap.fromImage(self.__composite__.asQImage())
 
   @mouseRegion.GET
   def _getMouseRegion(self) -> QRectF:
@@ -116,39 +333,235 @@ class ImgEdit(BoxWidget):
     """Setter-function for mouse region"""
     self.__mouse_region__ = mouseRegion
 
-  def updateImage(self) -> None:
-    """Updates the view"""
-    oldSize = self.parentLayout.requiredSize()
-    if self.__data_tensor__ is None:
-      return
-    pilImage = ToPILImage()(self.__data_tensor__)
-    imageArray = np.array(pilImage)
-    if pilImage.mode == "RGB":
-      fmt = QImage.Format.Format_RGB888
-    elif pilImage.mode == "RGBA":
-      fmt = QImage.Format.Format_RGBA8888
-    else:
-      raise ValueError("Unsupported PIL image mode.")
-    h, w, _ = imageArray.shape
-    qImage = QImage(imageArray.data, w, h, imageArray.strides[0], fmt)
-    self.__pix_map__ = QPixmap.fromImage(qImage)
-    rect = QRectF(QPointF(0, 0), QSizeF(w, h))
-    self.mouseRegion = rect - self.allMargins
-    newSize = self.parentLayout.requiredSize()
+  def _resizeToImage(self, oldSize: QSizeF) -> None:
+    """Grows the layout and the main window by the change in the size
+    required by the layout."""
+    self.invalidateSize()
+    newSize = self.parentLayout.getRequiredSize()
     sizeIncrease = QSizeF.toSize(newSize - oldSize)
     self.parentLayout.resize(QSizeF.toSize(newSize))
     newWindowSize = self.mainWindow.size() + sizeIncrease
     self.mainWindow.resize(newWindowSize)
     self.parentLayout.adjustSize()
 
+  def _fitZoom(self) -> float:
+    """Returns the zoom at which the image fits within the largest view
+    size. Images smaller than this are shown at zoom 1."""
+    if self.__pixel_buffer__ is None:
+      return 1.
+    w, h = self.__pixel_buffer__.width, self.__pixel_buffer__.height
+    return min(1., self.__max_view_width__ / w, self.__max_view_height__ / h)
+
+  def _getViewSize(self) -> QSizeF:
+    """Returns the size of the view as last painted."""
+    return QSizeF(maybe(self.__view_size__, self.getRequiredSize()))
+
+  def _viewOffset(self) -> QPointF:
+    """Returns the top left corner of the view relative to the widget."""
+    margins = self.allMargins
+    return QPointF(margins.left(), margins.top())
+
+  def _toImage(self, pos: QPointF) -> QPointF:
+    """Maps a point relative to the widget to image coordinates."""
+    return self.viewOrigin + (pos - self._viewOffset()) / self.__zoom__
+
+  def _clampOrigin(self, origin: QPointF) -> QPointF:
+    """Returns the origin moved such that the view stays over the image.
+    Along dimensions where the image is smaller than the view, the image
+    is centred."""
+    if self.__pixel_buffer__ is None:
+      return QPointF(0, 0)
+    viewSize = self._getViewSize() / self.__zoom__
+    out = []
+    for value, image, view in [
+        (origin.x(), self.__pixel_buffer__.width, viewSize.width()),
+        (origin.y(), self.__pixel_buffer__.height, viewSize.height())]:
+      if view >= image:
+        out.append((image - view) / 2)
+      else:
+        out.append(min(max(value, 0.), image - view))
+    return QPointF(*out)
+
+  def zoomAt(self, factor: float, pos: QPointF) -> None:
+    """Multiplies the zoom by the factor keeping the image point at the
+    given position, relative to the widget, in place."""
+    imagePoint = self._toImage(pos)
+    zoom = self.__zoom__ * factor
+    zoom = min(max(zoom, self.__min_zoom__), self.__max_zoom__)
+    self.__zoom__ = zoom
+    self.viewOrigin = imagePoint - (pos - self._viewOffset()) / zoom
+
+  def updateImage(self, box: Box = None) -> None:
+    """Updates the view. The tiles painted share memory with the
+    composite of the layers, so only repainting is required. If a box
+    (left, top, right, bottom) is given, only the pixels inside it are
+    recomposited and repainted, and only the pyramid tiles covering it
+    are invalidated. Layout and window sizes are adjusted only when the
+    dimensions of the image change. A pixel buffer not belonging to the
+    layers replaces them as a new image."""
+    if self.__pixel_buffer__ is None:
+      return
+    oldComposite = self.__composite__
+    stack = self.__layer_stack__
+    newImage = stack is None or not stack.contains(self.__pixel_buffer__)
+    if newImage:
+      stack = self.__layer_stack__ = LayerStack(self.__pixel_buffer__)
+    composite = self.__composite__ = stack.getComposite()
+    w, h = composite.width, composite.height
+    if oldComposite is None or oldComposite.size != QSize(w, h):
+      self.__mip_pyramid__ = MipPyramid(composite)
+      self._resetHistory()
+      self._beginAutosave()
+      self.__zoom__ = self._fitZoom()
+      self.__view_size__ = None
+      self.__view_origin__ = QPointF(0, 0)
+      oldSize = self.parentLayout.getRequiredSize()
+      self._resizeToImage(oldSize)
+      rect = QRectF(QPointF(0, 0), QSizeF(w, h))
+      self.mouseRegion = rect - self.allMargins
+      return self.update()
+    if newImage:
+      self._resetHistory()
+    if oldComposite is not composite:
+      self.__mip_pyramid__ = MipPyramid(composite)
+      self._beginAutosave()
+    if box is None:
+      self.__mip_pyramid__.invalidateAll()
+      return self.update()
+    stack.update(box)
+    self.__mip_pyramid__.invalidate(box)
+    left, top, right, bottom = box
+    zoom = self.__zoom__
+    topLeft = QPointF(left, top) - self.viewOrigin
+    topLeft = self._viewOffset() + topLeft * zoom
+    size = QSizeF(right - left, bottom - top) * zoom
+    viewRect = QRectF.toAlignedRect(QRectF(topLeft, size))
+    self.update(viewRect.adjusted(-2, -2, 2, 2))
+
+  def enableAutosave(self, directory: str, threshold: int = None) -> None:
+    """Enables autosaving to the directory. The image is journaled at
+    each call to 'autosave'. Journals larger than the threshold in bytes
+    are compacted into a snapshot. """
+    if self.__autosave_journal__ is not None:
+      self.__autosave_journal__.close()
+    self.__autosave_journal__ = AutosaveJournal(directory, threshold)
+    self._beginAutosave()
+
+  def _beginAutosave(self) -> None:
+    """Begins journaling the layers, unless they are already being
+    journaled."""
+    journal, stack = self.__autosave_journal__, self.__layer_stack__
+    if journal is None or stack is None:
+      return
+    if journal.getLayerStack() is stack:
+      return
+    journal.begin(stack, self.fid)
+
+  @Slot()
+  def autosave(self) -> None:
+    """Appends the tiles edited since the previous call to the autosave
+    journal."""
+    if self.__autosave_journal__ is None:
+      return
+    try:
+      self.__autosave_journal__.checkpoint()
+    except OSError as exception:
+      self.__autosave_journal__.close()
+      self.__autosave_journal__ = None
+      self.ioFailed.emit(str(exception))
+
+  def hasAutosave(self) -> bool:
+    """Returns True if autosaving is enabled and the previous session
+    left layers to restore."""
+    journal = self.__autosave_journal__
+    return False if journal is None else journal.hasSession()
+
+  def discardAutosave(self) -> None:
+    """Removes the layers autosaved by the previous session. If an image
+    is being edited, autosaving begins again from its current state."""
+    if self.__autosave_journal__ is not None:
+      self.__autosave_journal__.discard()
+      self._beginAutosave()
+
+  def restoreSession(self) -> bool:
+    """Restores the layers autosaved by the previous session. Returns
+    True if the layers were restored. Autosaving continues in the same
+    session."""
+    journal = self.__autosave_journal__
+    if journal is None or self.__open_job__ is not None:
+      return False
+    try:
+      session = journal.restore()
+    except OSError as exception:
+      self.ioFailed.emit(str(exception))
+      return False
+    if session is None:
+      return False
+    stack, fid = session
+    self._endStroke()
+    journal.resume(stack)
+    self.__layer_stack__ = stack
+    self.__pixel_buffer__ = stack.getActiveBuffer()
+    self.fid = fid
+    self.updateImage()
+    return True
+
+  def _startSave(self, fid: str, announce: bool = True) -> None:
+    """Saves the image to the file on the thread pool. Editing is paused
+    only while the pixels are copied. If 'announce' is True, 'saveFid' is
+    emitted once the file is written."""
+    if self.__pixel_buffer__ is None:
+      return
+    self._endStroke()
+    self.__save_generation__ += 1
+    composite = self.__layer_stack__.getComposite()
+    job = SaveImageJob(self.__save_generation__, fid, composite)
+    job.signals.snapshotTaken.connect(self._onSnapshotTaken)
+    job.signals.failed.connect(self._onSaveFailed)
+    job.signals.saved.connect(self._onSaved)
+    if announce:
+      job.signals.saved.connect(self._announceSaved)
+    job.signals.finished.connect(self._onSaveFinished)
+    if self.__save_jobs__ is None:
+      self.__save_jobs__ = {}
+    self.__save_jobs__[self.__save_generation__] = job
+    self.__edit_locked__ = True
+    job.start()
+
+  @Slot(int)
+  def _onSnapshotTaken(self, generation: int) -> None:
+    """Resumes editing once the pixels being saved are copied"""
+    self.__edit_locked__ = False
+
+  @Slot(int, str)
+  def _onSaved(self, generation: int, fid: str) -> None:
+    """Discards the autosaved layers once the file is written, and
+    begins autosaving again from the layers as saved"""
+    self.discardAutosave()
+
+  @Slot(int, str)
+  def _announceSaved(self, generation: int, fid: str) -> None:
+    """Announces the file saved"""
+    self.saveFid.emit(fid)
+
+  @Slot(int)
+  def _onSaveFinished(self, generation: int) -> None:
+    """Releases the save job once it stops running"""
+    self.__save_jobs__.pop(generation, None)
+
+  @Slot(int, str)
+  def _onSaveFailed(self, generation: int, message: str) -> None:
+    """Resumes editing and reports the error"""
+    self.__edit_locked__ = False
+    self.ioFailed.emit(message)
+
   @Slot(str)
   def saveImage(self, fid: str) -> None:
     """Slot saves the image to the file. """
     self.fid = fid
     if self.fid is None or os.path.basename(self.fid) == "unnamed.png":
       return self.requestFid.emit()
-    self.pix.save(self.fid)
-    self.saveFid.emit(self.fid)
+    self._startSave(self.fid)
 
   @Slot(str)
   def saveAsImage(self, fid: str = None) -> None:
@@ -156,9 +569,9 @@ class ImgEdit(BoxWidget):
     if fid is None:
       if self.fid is None:
         return self.requestFid.emit()
-      self.pix.save(self.fid)
+      return self._startSave(self.fid, False)
     self.fid = fid
-    self.pix.save(fid)
+    self._startSave(fid, False)
 
   @fid.GET
   def _getFid(self, **kwargs) -> str:
@@ -171,27 +584,93 @@ class ImgEdit(BoxWidget):
     self.__inner_file__ = fid
 
   def requiredSize(self) -> QSizeF:
-    """Return the required size. """
-    if not self.pix:
+    """Return the required size. Large images require only the largest
+    view size, as the view zooms and pans across them. """
+    if self.__pixel_buffer__ is None:
       return QSizeF(256, 256)
-    return self.pix.size()
+    size = QSize.toSizeF(self.__pixel_buffer__.size)
+    return size * self._fitZoom()
 
   def paintMeLike(self, rect: Rect, painter: QPainter) -> None:
     """Paint the image. """
     BoxWidget.paintMeLike(self, rect, painter)
-    if not self.pix:
-      return
     viewRect = rect
     center = viewRect.center()
-    pixSize = QPixmap.size(self.pix)
-    pixRect = QRectF(QPointF(0, 0), QSize.toSizeF(pixSize))
-    pixRect.moveCenter(center)
     innerRect = viewRect - self.margins
     innerRect -= self.borders
     innerRect -= self.paddings
     innerRect.moveCenter(center)
+    if self.__preview_buffer__ is not None:
+      return self._paintProgressive(innerRect, painter)
+    if self.__open_progress__ is not None:
+      return self._paintPlaceholder(innerRect, painter)
+    if self.__composite__ is None:
+      return
     self.mouseRegion = innerRect
-    painter.drawPixmap(innerRect.topLeft(), self.pix)
+    self.__view_size__ = innerRect.size()
+    zoom, origin = self.__zoom__, self.viewOrigin
+    w, h = self.__pixel_buffer__.width, self.__pixel_buffer__.height
+    visible = QRectF(origin, innerRect.size() / zoom)
+    if painter.hasClipping():
+      clip = painter.clipBoundingRect().intersected(innerRect)
+      clipOrigin = origin + (clip.topLeft() - innerRect.topLeft()) / zoom
+      visible = visible.intersected(QRectF(clipOrigin, clip.size() / zoom))
+    visible = visible.intersected(QRectF(0, 0, w, h))
+    if visible.isEmpty():
+      return
+    level = self.__mip_pyramid__.levelFor(zoom)
+    n = 1 << level
+    levelBox = (floor(visible.left() / n), floor(visible.top() / n),
+                ceil(visible.right() / n), ceil(visible.bottom() / n))
+    levelBuffer = self.__mip_pyramid__.getLevel(level, levelBox)
+    painter.save()
+    painter.setClipRect(innerRect, Qt.ClipOperation.IntersectClip)
+    for tile in levelBuffer.getTilesIn(levelBox):
+      left, top, right, bottom = levelBuffer.getTileBox(tile)
+      topLeft = (QPointF(left * n, top * n) - origin) * zoom
+      size = QSizeF(right - left, bottom - top) * n * zoom
+      target = QRectF(innerRect.topLeft() + topLeft, size)
+      painter.drawImage(target, levelBuffer.tileImage(tile))
+    painter.restore()
+
+  def _paintProgressive(self, rect: QRectF, painter: QPainter) -> None:
+    """Paints the image being opened fitted to the view. The preview is
+    scaled up to fill the image and the rows already loaded are painted
+    at full resolution over it."""
+    preview = self.__preview_buffer__
+    image = self.__loading_image__
+    size = QSizeF(QSize.toSizeF(preview.size))
+    if image is not None:
+      size = QSize.toSizeF(image.size)
+    zoom = min(1., rect.width() / size.width(), rect.height() / size.height())
+    target = QRectF(rect.topLeft(), size * zoom)
+    painter.drawImage(target, preview.asQImage())
+    rows = self.__ready_rows__
+    if image is None or not rows:
+      return
+    for tile in image.getTilesIn((0, 0, image.width, rows)):
+      left, top, right, bottom = image.getTileBox(tile)
+      source = QRectF(0, 0, right - left, min(bottom, rows) - top)
+      topLeft = rect.topLeft() + QPointF(left, top) * zoom
+      target = QRectF(topLeft, source.size() * zoom)
+      painter.drawImage(target, image.tileImage(tile), source)
+
+  def _paintPlaceholder(self, rect: QRectF, painter: QPainter) -> None:
+    """Paints the placeholder shown while an image is opened."""
+    painter.setPen(emptyPen())
+    painter.setBrush(fillBrush(QColor(223, 223, 223, 255)))
+    painter.drawRect(rect)
+    barRect = QRectF(0, 0, rect.width() * 0.6, 8)
+    barRect.moveCenter(rect.center())
+    painter.setBrush(fillBrush(QColor(191, 191, 191, 255)))
+    painter.drawRect(barRect)
+    barRect.setWidth(barRect.width() * self.__open_progress__)
+    painter.setBrush(fillBrush(QColor(63, 127, 191, 255)))
+    painter.drawRect(barRect)
+    painter.setPen(textPen())
+    textRect = rect.translated(0, 16)
+    text = 'Loading %d%%' % int(self.__open_progress__ * 100)
+    painter.drawText(textRect, Qt.AlignmentFlag.AlignCenter, text)
 
   def __init__(self, *args) -> None:
     BoxWidget.__init__(self, *args)
@@ -202,10 +681,88 @@ class ImgEdit(BoxWidget):
     """Right-click should open tool options"""
     self.contextMenu.popup(event.globalPos(), )
 
+  def _imagePoint(self, event: QMouseEvent) -> QPointF:
+    """Returns the position of the event in image coordinates."""
+    return self._toImage(event.position())
+
+  def _beginStroke(self, event: QMouseEvent) -> None:
+    """Begins a brush stroke at the position of the event."""
+    if self.__pixel_buffer__ is None or self.__edit_locked__:
+      return
+    rgb = self.paintColor
+    color = (rgb.red(), rgb.green(), rgb.blue(), rgb.alpha())
+    self.undoStack.beginStroke(self.__pixel_buffer__)
+    self.__brush_stroke__ = BrushStroke(
+        self.__pixel_buffer__, self.brushRadius, color, self.__brush_opacity__,
+        beforeWrite=self.undoStack.capture, flow=self.__brush_flow__,
+        mode=self.__brush_mode__)
+    p = self._imagePoint(event)
+    self.strokeLog.beginStroke(self.__layer_stack__.getActiveIndex(),
+                               self.__brush_mode__, self.__brush_flow__)
+    self._recordPoint(p)
+    box = self.__brush_stroke__.begin(p.x(), p.y())
+    self.__pixel_buffer__.markDirty(box)
+    if box is not None:
+      self.updateImage(box)
+
+  def _resetHistory(self) -> None:
+    """Clears the undo history and the stroke log for a new image."""
+    self.undoStack.clear()
+    buffer = self.__pixel_buffer__
+    self.strokeLog.reset(buffer.width, buffer.height, self.__brush_opacity__)
+
+  def _recordPoint(self, p: QPointF) -> None:
+    """Appends the point to the stroke log."""
+    rgb = self.paintColor
+    rgba = (rgb.red(), rgb.green(), rgb.blue(), rgb.alpha())
+    self.strokeLog.addPoint(p.x(), p.y(), self.brushRadius, rgba)
+
+  def _endStroke(self) -> None:
+    """Ends the current brush stroke."""
+    if self.__brush_stroke__ is not None:
+      self.__brush_stroke__.end()
+      if self.undoStack.endStroke():
+        self.strokeLog.commitStroke()
+      else:
+        self.strokeLog.discardStroke()
+    self.__brush_stroke__ = None
+
+  def _applyHistory(self, box: Box) -> None:
+    """Repaints the box changed by undo or redo."""
+    if box is not None:
+      self.__pixel_buffer__.markDirty(box)
+      self.__layer_stack__.invalidate(box)
+      self.updateImage(box)
+
+  @Slot()
+  def undo(self) -> None:
+    """Reverts the most recent brush stroke"""
+    if self.__edit_locked__:
+      return
+    self._endStroke()
+    box = self.undoStack.undo()
+    if box is not None:
+      self.strokeLog.undoStroke()
+    self._applyHistory(box)
+
+  @Slot()
+  def redo(self) -> None:
+    """Reapplies the most recently undone brush stroke"""
+    if self.__edit_locked__:
+      return
+    self._endStroke()
+    box = self.undoStack.redo()
+    if box is not None:
+      self.strokeLog.redoStroke()
+    self._applyHistory(box)
+
   def mousePressEvent(self, event: QMouseEvent) -> None:
     """Sets the mouse down flag"""
     if event.buttons() == Qt.MouseButton.LeftButton:
       self.__left_mouse_pressed__ = True
+      self._beginStroke(event)
+    if event.buttons() == Qt.MouseButton.MiddleButton:
+      self.__pan_anchor__ = (event.position(), self.viewOrigin)
     if event.buttons() == Qt.MouseButton.RightButton:
       contextEvent = QContextMenuEvent(QContextMenuEvent.Reason.Mouse,
                                        event.pos())
@@ -214,6 +771,8 @@ class ImgEdit(BoxWidget):
   def mouseReleaseEvent(self, event: QMouseEvent) -> None:
     """Sets the mouse down flag"""
     self.__left_mouse_pressed__ = False
+    self.__pan_anchor__ = None
+    self._endStroke()
 
   def enterEvent(self, event: QEnterEvent) -> None:
     """Sets the under mouse flag"""
@@ -223,40 +782,40 @@ class ImgEdit(BoxWidget):
     """Sets the under mouse flag"""
     self.__under_mouse__ = False
     self.__left_mouse_pressed__ = False
+    self.__pan_anchor__ = None
+    self._endStroke()
 
-  def mouseMoveEvent(self, event: QMouseEvent) -> None:
-    """Applies paint when mouse button held"""
-    if self.__data_tensor__ is None:
-      return
-    p = event.pos()
-    x, y = p.x(), p.y()
-    width, height = self.pix.size().width(), self.pix.size().height()
-    j0 = int(x / width * self.__data_tensor__.shape[2])
-    i0 = int(y / height * self.__data_tensor__.shape[1])
+  def wheelEvent(self, event: QWheelEvent) -> None:
+    """Zooms the view about the cursor"""
+    steps = event.angleDelta().y() / 120
+    if steps and self.__pixel_buffer__ is not None:
+      self.zoomAt(1.25 ** steps, event.position())
 
-    rgb = self.paintColor
-    if rgb is None:
-      self.contextMenu.popup(event.globalPos(), )
+  def mouseMoveEvent(self, event: QMouseEvent) -> None:
+    """Pans the view when the middle mouse button is held and continues
+    the brush stroke when the left mouse button is held. Dabs are
+    interpolated between successive positions."""
+    if self.__pan_anchor__ is not None:
+      if event.buttons() & Qt.MouseButton.MiddleButton:
+        anchorPos, anchorOrigin = self.__pan_anchor__
+        delta = (event.position() - anchorPos) / self.__zoom__
+        self.viewOrigin = anchorOrigin - delta
+        return
+      self.__pan_anchor__ = None
+    if self.__pixel_buffer__ is None or not self.leftMouse:
       return
-    r, g, b = float(rgb.red()), float(rgb.green()), float(rgb.blue())
-    r, g, b = r / 255, g / 255, b / 255
-    if self.leftMouse:
-      for ii in range(-5, 5):
-        for jj in range(-5, 5):
-          if i0 + ii < 0 or i0 + ii >= self.__data_tensor__.shape[1]:
-            continue
-          if ii * ii + jj * jj < 25:
-            r0 = self.__data_tensor__[0, i0 + ii, j0 + jj]
-            g0 = self.__data_tensor__[1, i0 + ii, j0 + jj]
-            b0 = self.__data_tensor__[2, i0 + ii, j0 + jj]
-            self.__data_tensor__[0, i0 + ii, j0 + jj] = 0.75 * r0 + 0.25 * r
-            self.__data_tensor__[1, i0 + ii, j0 + jj] = 0.75 * g0 + 0.25 * g
-            self.__data_tensor__[2, i0 + ii, j0 + jj] = 0.75 * b0 + 0.25 * b
-      self.updateImage()
+    if self.__brush_stroke__ is None:
+      return self._beginStroke(event)
+    p = self._imagePoint(event)
+    self._recordPoint(p)
+    box = self.__brush_stroke__.strokeTo(p.x(), p.y())
+    self.__pixel_buffer__.markDirty(box)
+    if box is not None:
+      self.updateImage(box)
 
   def newImage(self, size: QSize, fid: str = None) -> None:
     """Slot creates a new image. """
-    self.__data_tensor__ = torch.ones(3, size.height(), size.width())
+    self.__pixel_buffer__ = TiledImage(size.width(), size.height())
     if fid is None:
       here = os.path.abspath(os.path.dirname(__file__))
       root = os.path.normpath(os.path.join(here, "..", ".."))
@@ -0,0 +1,94 @@
+"""Tests of the mutation methods of AbstractLayout."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+import sys
+from unittest import TestCase
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QRectF, QSizeF, QPointF, QEvent, Qt
+from PySide6.QtGui import QImage, QPainter, QMouseEvent
+from PySide6.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+import ezside.app
+from ezside.basewidgets import Label, PushButton, LabelItem
+from ezside.layouts import AbstractLayout
+from ezside.tools import SizeRule
+
+
+class TestAbstractLayout(TestCase):
+  """Tests of the mutation methods of AbstractLayout."""
+
+  def setUp(self) -> None:
+    """Creates a layout holding a label above a push button, with the
+    cursor over the button."""
+    self.layout = AbstractLayout()
+    self.label = Label('label')
+    self.button = PushButton('button')
+    self.layout.addWidget(self.label, 0, 0)
+    self.layout.addWidget(self.button, 1, 0)
+    self.layout.gridGeometry
+    self.layout._setHoverItem(self.button.parentLayoutItem)
+
+  def test_removeHoveredAfterChange(self) -> None:
+    """Removing the hovered button after another item changed size must
+    not fail when the button repaints on leaving."""
+    self.label.text = 'a much longer text'
+    self.layout.removeWidget(self.button)
+    self.assertEqual(len(self.layout.getItems()), 1)
+    self.assertIsNone(self.button.parentLayout)
+    self.assertIsNone(self.button.parentLayoutItem)
+    self.assertFalse(self.button.underMouse)
+
+  def test_clearHoveredAfterChange(self) -> None:
+    """Clearing the layout after another item changed size must not fail
+    when the hovered button repaints on leaving."""
+    self.label.text = 'a much longer text'
+    self.layout.clear()
+    self.assertEqual(self.layout.getItems(), [])
+    self.assertIsNone(self.label.parentLayout)
+    self.assertIsNone(self.button.parentLayout)
+
+  def test_nestedLayoutSharesPaintRect(self) -> None:
+    """A layout painted by another layout shares out the rectangle it is
+    painted in rather than its own size."""
+    inner = AbstractLayout()
+    item = LabelItem('item')
+    item.sizeRule = SizeRule.EXPAND
+    inner.addWidget(item, 0, 0)
+    self.layout.addWidget(inner, 2, 0)
+    rect = QRectF(10, 10, 300, 200)
+    image = QImage(400, 300, QImage.Format.Format_ARGB32)
+    painter = QPainter()
+    painter.begin(image)
+    inner.paintMeLike(rect, painter)
+    painter.end()
+    available = QSizeF(300, 200).shrunkBy(inner.allMargins)
+    self.assertEqual(inner.getAvailableSize(), available)
+    itemRect = inner.getRect(item.parentLayoutItem)
+    self.assertEqual(itemRect.size(), available)
+
+  def test_fontChangeInPlace(self) -> None:
+    """Changing the font of a label in place must update the required
+    size of the label and of the layout."""
+    before = self.layout.requiredSize()
+    labelSize = self.label.getRequiredSize()
+    self.label.textFont.size = 40
+    self.assertGreater(self.label.getRequiredSize().height(),
+                       labelSize.height())
+    self.assertGreater(self.layout.requiredSize().height(), before.height())
+
+  def test_mouseMoveAtButton(self) -> None:
+    """The position passed by the layout becomes the cursor position of
+    the button, without the event received by the layout."""
+    noButton = Qt.MouseButton.NoButton
+    event = QMouseEvent(QEvent.Type.MouseMove, QPointF(50, 50), noButton,
+                        noButton, Qt.KeyboardModifier.NoModifier)
+    self.button.mouseMoveAt(QPointF(3, 4), event)
+    self.assertTrue(self.button.underMouse)
+    self.assertEqual(self.button.cursorPosition, QPointF(3, 4))
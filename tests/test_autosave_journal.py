@@ -0,0 +1,181 @@
+"""Tests of journaling and restoring layers with AutosaveJournal."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import json
+import os
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PySide6.QtCore import QThreadPool, QSize
+from PySide6.QtWidgets import QApplication, QMainWindow
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+import ezside.app
+from ezside.imaging import TiledImage, LayerStack, AutosaveJournal
+from ezside.layouts import AbstractLayout
+from ezside.widgets import ImgEdit
+
+
+def _wait() -> None:
+  """Waits for the snapshots written on the thread pool."""
+  QThreadPool.globalInstance().waitForDone()
+  app.processEvents()
+
+
+def _pixels(image: TiledImage) -> np.ndarray:
+  """Returns a copy of every pixel of the image."""
+  return image.readRegion(image.getBox())
+
+
+class TestAutosaveJournal(TestCase):
+  """Tests of journaling and restoring layers with AutosaveJournal."""
+
+  def setUp(self) -> None:
+    """Journals a stack of a grey background and a multiplying layer of
+    300 by 200 pixels."""
+    self.tempDir = TemporaryDirectory()
+    self.directory = os.path.join(self.tempDir.name, 'autosave')
+    self.stack = LayerStack(TiledImage(300, 200, (100, 100, 100, 255)))
+    self.stack.addLayer('tint', TiledImage(300, 200, (0, 0, 255, 128)))
+    self.stack.setLayerBlendMode(1, 'multiply')
+    self.journal = AutosaveJournal(self.directory)
+    self.journal.begin(self.stack, 'image.png')
+    _wait()
+
+  def tearDown(self) -> None:
+    _wait()
+    self.journal.close()
+    self.tempDir.cleanup()
+
+  def _paint(self, index: int, box: tuple, color: tuple) -> None:
+    """Writes the color to the box of the layer, marking it dirty."""
+    buffer = self.stack.getLayer(index).getBuffer()
+    buffer.writeRegion(box, color)
+    buffer.markDirty(box)
+
+  def _assertRestored(self) -> LayerStack:
+    """Asserts that the layers restored match the layers journaled, and
+    returns them."""
+    self.journal.close()
+    restored, fid = AutosaveJournal(self.directory).restore()
+    self.assertEqual(fid, 'image.png')
+    self.assertEqual(len(restored), len(self.stack))
+    self.assertEqual(restored.getActiveIndex(), self.stack.getActiveIndex())
+    for layer, other in zip(self.stack.getLayers(), restored.getLayers()):
+      self.assertEqual(other.getName(), layer.getName())
+      self.assertEqual(other.getOpacity(), layer.getOpacity())
+      self.assertEqual(other.getBlendMode(), layer.getBlendMode())
+      self.assertEqual(other.isVisible(), layer.isVisible())
+      self.assertTrue(np.array_equal(_pixels(other.getBuffer()),
+                                     _pixels(layer.getBuffer())))
+    return restored
+
+  def test_restoreSnapshot(self) -> None:
+    """Each layer of the snapshot is restored with its settings."""
+    self._assertRestored()
+
+  def test_restoreJournal(self) -> None:
+    """Tiles of each layer appended at checkpoints are restored on top of
+    the snapshot, also after the layers are reordered."""
+    self._paint(0, (10, 10, 40, 40), (255, 0, 0, 255))
+    self._paint(1, (250, 150, 290, 190), (0, 255, 0, 255))
+    self.assertEqual(self.journal.checkpoint(), 3)
+    self.stack.moveLayer(1, 0)
+    self.stack.setLayerOpacity(0, .5)
+    self._paint(1, (260, 10, 270, 20), (1, 2, 3, 4))
+    self.assertEqual(self.journal.checkpoint(), 1)
+    self._assertRestored()
+
+  def test_addedLayer(self) -> None:
+    """Layers added with contents are kept by a new snapshot."""
+    buffer = TiledImage(300, 200, (9, 9, 9, 255))
+    self.stack.addLayer('added', buffer)
+    self.stack.setLayerVisible(2, False)
+    self.journal.checkpoint()
+    _wait()
+    restored = self._assertRestored()
+    self.assertEqual(restored.getLayer(2).getName(), 'added')
+
+  def test_discard(self) -> None:
+    """Discarding removes the files of the session."""
+    self.assertTrue(self.journal.hasSession())
+    self.journal.discard()
+    self.assertFalse(self.journal.hasSession())
+    self.assertEqual(os.listdir(self.directory), [])
+
+
+class TestImgEditAutosave(TestCase):
+  """Tests of autosaving in ImgEdit."""
+
+  def setUp(self) -> None:
+    """Creates an editor autosaving a new image."""
+    self.tempDir = TemporaryDirectory()
+    self.directory = os.path.join(self.tempDir.name, 'autosave')
+    self.window, layout = QMainWindow(), AbstractLayout()
+    self.imgEdit = ImgEdit()
+    layout.addWidget(self.imgEdit, 0, 0)
+    self.window.setCentralWidget(layout)
+    self.imgEdit.mainWindow = self.window
+    self.imgEdit.enableAutosave(self.directory)
+    self.fid = os.path.join(self.tempDir.name, 'image.png')
+    self.imgEdit.newImage(QSize(64, 48), self.fid)
+    self.imgEdit.addLayer('top')
+    _wait()
+
+  def tearDown(self) -> None:
+    _wait()
+    self.tempDir.cleanup()
+
+  def _token(self) -> str:
+    """Returns the token of the session autosaved."""
+    fid = os.path.join(self.directory, 'session.json')
+    with open(fid, 'r', encoding='utf-8') as file:
+      return json.load(file)['token']
+
+  def test_saveDiscards(self) -> None:
+    """A successful save discards the session autosaved and begins a new
+    one from the layers saved."""
+    token = self._token()
+    buffer = self.imgEdit.data
+    buffer.writeRegion((0, 0, 8, 8), (255, 0, 0, 255))
+    buffer.markDirty((0, 0, 8, 8))
+    self.imgEdit.autosave()
+    self.imgEdit.saveImage(self.fid)
+    _wait()
+    _wait()
+    self.assertTrue(os.path.exists(self.fid))
+    self.assertNotEqual(self._token(), token)
+    journal = AutosaveJournal(self.directory)
+    stack, _ = journal.restore()
+    self.assertEqual([layer.getName() for layer in stack.getLayers()],
+                     ['Background', 'top'])
+    self.assertEqual(_pixels(stack.getLayer(1).getBuffer())[0, 0].tolist(),
+                     [255, 0, 0, 255])
+
+  def test_restoreSession(self) -> None:
+    """Another editor restores the layers when asked to, and discarding
+    them begins a new session."""
+    self.imgEdit.autosave()
+    other = ImgEdit()
+    layout = AbstractLayout()
+    layout.addWidget(other, 0, 0)
+    window = QMainWindow()
+    window.setCentralWidget(layout)
+    other.mainWindow = window
+    other.enableAutosave(self.directory)
+    self.assertTrue(other.hasAutosave())
+    self.assertIsNone(other.layers)
+    self.assertTrue(other.restoreSession())
+    self.assertEqual(len(other.layers), 2)
+    self.assertEqual(other.fid, self.fid)
+    _wait()
+    token = self._token()
+    other.discardAutosave()
+    self.assertNotEqual(self._token(), token)
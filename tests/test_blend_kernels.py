@@ -0,0 +1,62 @@
+"""Tests of the blend kernels and of blending slices of images."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from unittest import TestCase
+
+import numpy as np
+
+from ezside.imaging import blend, getBlendModes, getBlendKernel
+
+
+class TestBlend(TestCase):
+  """Tests of the alpha handling of blend."""
+
+  def test_transparentSourceOntoRGB(self) -> None:
+    """A transparent RGBA source leaves an RGB destination unchanged."""
+    dst = np.zeros((2, 3, 3), dtype=np.uint8)
+    src = np.full((2, 3, 4), 255, dtype=np.uint8)
+    src[..., 3] = 0
+    blend(dst, src)
+    self.assertFalse(dst.any())
+
+  def test_halfAlphaSourceOntoRGB(self) -> None:
+    """The alpha of an RGBA source weighs it against an RGB
+    destination."""
+    dst = np.zeros((1, 1, 3), dtype=np.uint8)
+    blend(dst, np.array([255, 255, 255, 128], dtype=np.uint8))
+    self.assertEqual(dst.tolist(), [[[128, 128, 128]]])
+
+  def test_opaqueSourceWithoutAlpha(self) -> None:
+    """A source without alpha is opaque, scaled only by the opacity."""
+    dst = np.zeros((1, 1, 4), dtype=np.uint8)
+    blend(dst, np.array([200, 100, 0], dtype=np.uint8), opacity=.5)
+    self.assertEqual(dst.tolist(), [[[200, 100, 0, 128]]])
+
+  def test_transparentSourceOntoRGBA(self) -> None:
+    """A transparent source leaves an RGBA destination unchanged."""
+    dst = np.full((2, 2, 4), 7, dtype=np.uint8)
+    src = np.full((2, 2, 4), 255, dtype=np.uint8)
+    src[..., 3] = 0
+    for mode in getBlendModes():
+      blend(dst, src, mode)
+      self.assertTrue((dst == 7).all(), mode)
+
+  def test_maskLimitsCoverage(self) -> None:
+    """Pixels where the mask is zero are left unchanged."""
+    dst = np.zeros((1, 2, 4), dtype=np.uint8)
+    mask = np.array([[1., 0.]], dtype=np.float32)
+    blend(dst, np.array([255, 0, 0, 255], dtype=np.uint8), mask=mask)
+    self.assertEqual(dst.tolist(), [[[255, 0, 0, 255], [0, 0, 0, 0]]])
+
+  def test_eraseRequiresAlpha(self) -> None:
+    """Modes changing only the alpha reject destinations without one."""
+    dst = np.zeros((1, 1, 3), dtype=np.uint8)
+    with self.assertRaises(ValueError):
+      blend(dst, np.array([0, 0, 0, 255], dtype=np.uint8), 'erase')
+
+  def test_unknownMode(self) -> None:
+    """Unknown blend modes raise KeyError."""
+    with self.assertRaises(KeyError):
+      getBlendKernel('no such mode')
@@ -0,0 +1,99 @@
+"""Tests of brushMask, stampDab and BrushStroke."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from unittest import TestCase
+
+import numpy as np
+
+from ezside.imaging import brushMask, dabBox, stampDab, BrushStroke
+
+
+class TestBrushMask(TestCase):
+  """Tests of brushMask."""
+
+  def test_shape(self) -> None:
+    """Masks are square, centred, symmetric and read-only."""
+    mask = brushMask(3.5)
+    self.assertEqual(mask.shape, (9, 9))
+    self.assertEqual(mask[4, 4], 1.)
+    self.assertEqual(mask[0, 0], 0.)
+    self.assertTrue(np.array_equal(mask, mask.T))
+    self.assertTrue(np.array_equal(mask, mask[::-1]))
+    self.assertFalse(mask.flags.writeable)
+    self.assertIs(brushMask(3.5), mask)
+
+  def test_hardness(self) -> None:
+    """Soft brushes cover less of the pixels near their edge."""
+    hard, soft = brushMask(8., 1.), brushMask(8., .2)
+    self.assertLess(soft[8, 13], hard[8, 13])
+    self.assertEqual(soft[8, 8], 1.)
+    with self.assertRaises(ValueError):
+      brushMask(0.)
+    with self.assertRaises(ValueError):
+      brushMask(2., 1.5)
+
+
+class TestStampDab(TestCase):
+  """Tests of dabBox and stampDab."""
+
+  def test_clipped(self) -> None:
+    """Dabs are clipped at the edges of the array, and dabs outside it
+    change nothing."""
+    array = np.zeros((20, 30, 4), dtype=np.uint8)
+    mask = brushMask(3.)
+    self.assertEqual(dabBox(array, 1, 1, mask), (0, 0, 5, 5))
+    self.assertIsNone(dabBox(array, -10, 5, mask))
+    color = np.array([255, 0, 0, 255], dtype=np.float32)
+    box = stampDab(array, 1, 1, mask, color)
+    self.assertEqual(box, (0, 0, 5, 5))
+    self.assertEqual(array[1, 1].tolist(), [255, 0, 0, 255])
+    self.assertFalse(array[6:].any())
+    self.assertIsNone(stampDab(array, 100, 100, mask, color))
+
+  def test_opacityAndFlow(self) -> None:
+    """The coverage is the mask times the opacity and the flow."""
+    array = np.zeros((9, 9, 4), dtype=np.uint8)
+    color = np.array([200, 200, 200, 255], dtype=np.float32)
+    stampDab(array, 4, 4, brushMask(3.), color, opacity=.5, flow=.5)
+    self.assertAlmostEqual(int(array[4, 4, 3]), 64, delta=1)
+
+
+class TestBrushStroke(TestCase):
+  """Tests of BrushStroke."""
+
+  def test_noGaps(self) -> None:
+    """Fast strokes place dabs along the whole segment."""
+    array = np.zeros((20, 200, 4), dtype=np.uint8)
+    stroke = BrushStroke(array, 3., (255, 255, 255, 255))
+    stroke.begin(5, 10)
+    box = stroke.strokeTo(190, 10)
+    stroke.end()
+    self.assertTrue((array[10, 5:191, 3] == 255).all())
+    self.assertEqual(box[1::2], (7, 14))
+    self.assertFalse(stroke.isActive())
+
+  def test_beforeWrite(self) -> None:
+    """The callback receives the box of each dab before it is written."""
+    array = np.zeros((20, 20, 4), dtype=np.uint8)
+    seen = []
+
+    def beforeWrite(box: tuple) -> None:
+      """Records the box and the pixels inside it."""
+      left, top, right, bottom = box
+      seen.append((box, array[top:bottom, left:right].any()))
+
+    stroke = BrushStroke(array, 2., (0, 0, 0, 255), beforeWrite=beforeWrite)
+    stroke.begin(10, 10)
+    self.assertEqual(seen, [((8, 8, 13, 13), False)])
+
+  def test_invalid(self) -> None:
+    """Arrays of the wrong shape and colors lacking channels are
+    rejected."""
+    with self.assertRaises(ValueError):
+      BrushStroke(np.zeros((4, 4)), 1., (0, 0, 0, 255))
+    with self.assertRaises(ValueError):
+      BrushStroke(np.zeros((4, 4, 4)), 1., (0, 0))
+    with self.assertRaises(KeyError):
+      BrushStroke(np.zeros((4, 4, 4)), 1., (0, 0, 0, 255), mode='nope')
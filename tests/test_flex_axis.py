@@ -0,0 +1,32 @@
+"""Tests of the distribution of space by FlexAxis."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from unittest import TestCase
+
+from ezside.layouts import FlexAxis
+
+
+class TestFlexAxis(TestCase):
+  """Tests of the distribution of space by FlexAxis."""
+
+  def setUp(self) -> None:
+    """Creates an axis of an expanding, a preferring, a fixed and a
+    contracting track, each of natural size 100."""
+    self.axis = FlexAxis()
+    rules = [(FlexAxis.EXPAND, False), (FlexAxis.PREFER, False),
+             (FlexAxis.FIXED, False), (FlexAxis.FIXED, True)]
+    for track, (growth, shrinks) in enumerate(rules):
+      self.axis.constrain(track, 1, growth, shrinks, 1.)
+      self.axis.require(track, 1, 100.)
+
+  def test_surplus(self) -> None:
+    """Surplus space goes to the expanding track only."""
+    self.assertEqual(self.axis.distribute(500.), [200., 100., 100., 100.])
+
+  def test_deficit(self) -> None:
+    """Only the contracting track gives up space, such that preferring
+    tracks keep their required size."""
+    self.assertEqual(self.axis.distribute(350.), [100., 100., 100., 50.])
+    self.assertEqual(self.axis.distribute(100.), [100., 100., 100., 0.])
@@ -0,0 +1,88 @@
+"""Tests of the image jobs and of their lifetime in ImgEdit."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QThreadPool
+from PySide6.QtWidgets import QApplication, QMainWindow
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+import ezside.app
+from ezside.imaging import PixelBuffer, OpenImageJob, SaveImageJob
+from ezside.layouts import AbstractLayout
+from ezside.widgets import ImgEdit
+
+
+class TestImageJob(TestCase):
+  """Tests of the image jobs and of their lifetime in ImgEdit."""
+
+  def setUp(self) -> None:
+    """Writes two images to a temporary directory."""
+    self.tempDir = TemporaryDirectory()
+    self.files = []
+    for index, width in enumerate((40, 60)):
+      fid = os.path.join(self.tempDir.name, 'image%d.png' % index)
+      PixelBuffer(width, 30, (index, 0, 0, 255)).save(fid)
+      self.files.append(fid)
+
+  def tearDown(self) -> None:
+    QThreadPool.globalInstance().waitForDone()
+    app.processEvents()
+    self.tempDir.cleanup()
+
+  def _record(self, job: OpenImageJob | SaveImageJob) -> list[str]:
+    """Returns the list receiving the names of the signals emitted."""
+    out = []
+    signals = job.signals
+    signals.opened.connect(lambda *_: out.append('opened'))
+    signals.saved.connect(lambda *_: out.append('saved'))
+    signals.failed.connect(lambda *_: out.append('failed'))
+    signals.finished.connect(lambda *_: out.append('finished'))
+    return out
+
+  def test_finishedIsLast(self) -> None:
+    """Jobs emit 'finished' last, also when cancelled or failed."""
+    job = OpenImageJob(1, self.files[0])
+    emitted = self._record(job)
+    job.run()
+    self.assertEqual(emitted, ['opened', 'finished'])
+    job = OpenImageJob(2, os.path.join(self.tempDir.name, 'missing.png'))
+    emitted = self._record(job)
+    job.run()
+    self.assertEqual(emitted, ['failed', 'finished'])
+    job = OpenImageJob(3, self.files[0])
+    emitted = self._record(job)
+    job.cancel()
+    job.run()
+    self.assertEqual(emitted, ['finished'])
+    dst = os.path.join(self.tempDir.name, 'saved.png')
+    job = SaveImageJob(4, dst, PixelBuffer(8, 8))
+    emitted = self._record(job)
+    job.run()
+    self.assertEqual(emitted, ['saved', 'finished'])
+
+  def test_supersededOpenJobKept(self) -> None:
+    """Opening a second image before the first is ready keeps the first
+    job until it finishes, and shows only the second image."""
+    window, layout, imgEdit = QMainWindow(), AbstractLayout(), ImgEdit()
+    layout.addWidget(imgEdit, 0, 0)
+    window.setCentralWidget(layout)
+    imgEdit.mainWindow = window
+    imgEdit.openImage(self.files[0])
+    first = imgEdit.__open_job__
+    imgEdit.openImage(self.files[1])
+    self.assertTrue(first.isCancelled())
+    self.assertIn(first, imgEdit.__open_jobs__.values())
+    QThreadPool.globalInstance().waitForDone()
+    app.processEvents()
+    self.assertEqual(imgEdit.__open_jobs__, {})
+    self.assertEqual(imgEdit.fid, self.files[1])
+    self.assertEqual(imgEdit.data.width, 60)
@@ -0,0 +1,94 @@
+"""Tests of the dirty rectangle updates of ImgEdit."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+import sys
+from unittest import TestCase
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QSize, QRect
+from PySide6.QtWidgets import QApplication, QMainWindow
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+import ezside.app
+from ezside.layouts import AbstractLayout
+from ezside.widgets import ImgEdit
+
+
+class RecordingEdit(ImgEdit):
+  """Editor recording the rectangles passed to 'update'."""
+
+  def __init__(self, *args) -> None:
+    ImgEdit.__init__(self, *args)
+    self.updates = []
+
+  def update(self, *args) -> None:
+    """Records the rectangle, or None for the entire widget."""
+    self.updates.append(args[0] if args else None)
+    ImgEdit.update(self, *args)
+
+
+class TestImgEditUpdates(TestCase):
+  """Tests of the dirty rectangle updates of ImgEdit."""
+
+  def setUp(self) -> None:
+    """Creates an editor showing a new image of 600 by 400 pixels at
+    zoom 1."""
+    self.window, layout = QMainWindow(), AbstractLayout()
+    self.imgEdit = RecordingEdit()
+    layout.addWidget(self.imgEdit, 0, 0)
+    self.window.setCentralWidget(layout)
+    self.imgEdit.mainWindow = self.window
+    self.imgEdit.newImage(QSize(600, 400), 'image.png')
+    self.assertEqual(self.imgEdit.zoom, 1.)
+
+  def _edit(self, box: tuple, color: tuple) -> None:
+    """Writes the color to the box of the active layer and updates the
+    view as a brush stroke does."""
+    buffer = self.imgEdit.data
+    buffer.writeRegion(box, color)
+    buffer.markDirty(box)
+    del self.imgEdit.updates[:]
+    self.imgEdit.updateImage(box)
+
+  def test_repaintsBoxOnly(self) -> None:
+    """Only the view rectangle covering the box is repainted."""
+    self._edit((300, 100, 320, 110), (255, 0, 0, 255))
+    rect = self.imgEdit.updates[-1]
+    self.assertIsInstance(rect, QRect)
+    offset = self.imgEdit._viewOffset().toPoint()
+    self.assertTrue(rect.contains(QRect(offset.x() + 300, offset.y() + 100,
+                                        20, 10)))
+    self.assertLessEqual(rect.width(), 25)
+    self.assertLessEqual(rect.height(), 15)
+
+  def test_invalidatesCoveringTiles(self) -> None:
+    """Only the pyramid tiles covering the box are brought up to date
+    again."""
+    pyramid = self.imgEdit.__mip_pyramid__
+    pyramid.getLevel(1)
+    valid = pyramid.__valid_tiles__[1]
+    self.assertTrue(valid.all())
+    self._edit((300, 100, 320, 110), (255, 0, 0, 255))
+    self.assertEqual(valid.tolist(), [[False, True]])
+    level = pyramid.getLevel(1, (150, 50, 160, 55))
+    self.assertEqual(level.readRegion((155, 52, 156, 53))[0, 0].tolist(),
+                     [255, 0, 0, 255])
+
+  def test_recompositesBox(self) -> None:
+    """With several layers, only the box is recomposited and marked
+    dirty in the composite."""
+    self.imgEdit.addLayer('top')
+    composite = self.imgEdit.layers.getComposite()
+    self.assertIsNot(composite, self.imgEdit.data)
+    composite.takeDirtyTiles()
+    self._edit((300, 100, 320, 110), (0, 0, 255, 255))
+    self.assertEqual(composite.getDirtyTiles(), {(0, 1)})
+    pixels = composite.readRegion((300, 100, 301, 101))[0, 0]
+    self.assertEqual(pixels.tolist(), [0, 0, 255, 255])
+    self.assertEqual(composite.readRegion((0, 0, 1, 1))[0, 0].tolist(),
+                     [255, 255, 255, 255])
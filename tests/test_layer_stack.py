@@ -0,0 +1,97 @@
+"""Tests of the layers and cached composites of LayerStack."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from unittest import TestCase
+
+import numpy as np
+
+from ezside.imaging import TiledImage, LayerStack, blend
+
+
+def _pixels(image: TiledImage) -> np.ndarray:
+  """Returns a copy of every pixel of the image."""
+  return image.readRegion(image.getBox())
+
+
+class TestLayerStack(TestCase):
+  """Tests of the layers and cached composites of LayerStack."""
+
+  def setUp(self) -> None:
+    """Creates a stack of an opaque grey background, a half transparent
+    red layer and a multiplying blue layer, with the red layer active."""
+    self.base = TiledImage(32, 16, (100, 100, 100, 255))
+    self.stack = LayerStack(self.base)
+    self.red = self.stack.addLayer('red', TiledImage(32, 16,
+                                                     (255, 0, 0, 128)))
+    self.blue = self.stack.addLayer('blue', TiledImage(32, 16,
+                                                       (0, 0, 255, 255)))
+    self.stack.setLayerBlendMode(2, 'multiply')
+    self.stack.setActiveIndex(1)
+
+  def _expected(self) -> np.ndarray:
+    """Returns the composite computed by blending every visible layer
+    directly."""
+    out = np.zeros((16, 32, 4), dtype=np.uint8)
+    for layer in self.stack.getLayers():
+      if layer.isVisible():
+        blend(out, _pixels(layer.getBuffer()), layer.getBlendMode(),
+              layer.getOpacity())
+    return out
+
+  def test_passThrough(self) -> None:
+    """A single opaque layer in normal mode is its own composite."""
+    stack = LayerStack(self.base)
+    self.assertIs(stack.getComposite(), self.base)
+    stack.setLayerOpacity(0, .5)
+    self.assertIsNot(stack.getComposite(), self.base)
+
+  def test_composite(self) -> None:
+    """The composite matches blending every visible layer."""
+    composite = _pixels(self.stack.getComposite())
+    self.assertTrue(np.array_equal(composite, self._expected()))
+
+  def test_updateActiveLayer(self) -> None:
+    """Recompositing a box after the active layer changes matches
+    blending every layer, and marks the box dirty."""
+    composite = self.stack.getComposite()
+    composite.takeDirtyTiles()
+    self.red.getBuffer().region((4, 4, 12, 12))[...] = (0, 255, 0, 255)
+    self.stack.update((4, 4, 12, 12))
+    self.assertTrue(np.array_equal(_pixels(composite), self._expected()))
+    self.assertEqual(composite.getDirtyTiles(), {(0, 0)})
+
+  def test_hiddenLayer(self) -> None:
+    """Hidden layers are left out of the composite."""
+    self.stack.setLayerVisible(2, False)
+    composite = _pixels(self.stack.getComposite())
+    self.assertTrue(np.array_equal(composite, self._expected()))
+    self.assertGreater(composite[0, 0, 0], 100)
+
+  def test_removeAndMove(self) -> None:
+    """Removing and moving layers keeps the active layer and rebuilds the
+    composite."""
+    self.stack.moveLayer(2, 0)
+    self.assertIs(self.stack.getActiveLayer(), self.red)
+    self.stack.removeLayer(1)
+    self.assertIs(self.stack.getActiveLayer(), self.red)
+    composite = _pixels(self.stack.getComposite())
+    self.assertTrue(np.array_equal(composite, self._expected()))
+    with self.assertRaises(IndexError):
+      self.stack.removeLayer(5)
+
+  def test_layerSetters(self) -> None:
+    """The layer setters reject values of the wrong type or range."""
+    with self.assertRaises(TypeError):
+      self.stack.setLayerOpacity(1, '0.5')
+    with self.assertRaises(ValueError):
+      self.stack.setLayerOpacity(1, 1.5)
+    with self.assertRaises(TypeError):
+      self.stack.setLayerBlendMode(1, None)
+    with self.assertRaises(KeyError):
+      self.stack.setLayerBlendMode(1, 'no such mode')
+    with self.assertRaises(TypeError):
+      self.stack.setLayerVisible(1, 'yes')
+    self.stack.setLayerOpacity(1, 1)
+    self.assertEqual(self.red.getOpacity(), 1.)
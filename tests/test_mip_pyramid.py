@@ -0,0 +1,67 @@
+"""Tests of MipPyramid."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from unittest import TestCase
+
+import numpy as np
+
+from ezside.imaging import TiledImage, MipPyramid
+
+
+class TestMipPyramid(TestCase):
+  """Tests of MipPyramid."""
+
+  def setUp(self) -> None:
+    """Creates a pyramid over an image of 1025 by 600 pixels holding
+    random colors."""
+    rng = np.random.default_rng(12)
+    self.pixels = rng.integers(0, 256, (600, 1025, 4), dtype=np.uint8)
+    self.base = TiledImage.fromArray(self.pixels)
+    self.pyramid = MipPyramid(self.base)
+
+  def test_levels(self) -> None:
+    """Levels halve the size until the image fits a single tile, and the
+    level chosen for a zoom has at least the pixels painted."""
+    self.assertEqual(self.pyramid.getLevelCount(), 4)
+    self.assertEqual(self.pyramid.levelFor(2.), 0)
+    self.assertEqual(self.pyramid.levelFor(.5), 1)
+    self.assertEqual(self.pyramid.levelFor(.3), 1)
+    self.assertEqual(self.pyramid.levelFor(1 / 64), 3)
+    self.assertIs(self.pyramid.getLevel(0), self.base)
+    level = self.pyramid.getLevel(3)
+    self.assertEqual((level.width, level.height), (129, 75))
+
+  def test_average(self) -> None:
+    """Each pixel is the rounded average of four pixels of the level
+    below, repeating the last column of odd widths."""
+    level = self.pyramid.getLevel(1)
+    self.assertEqual((level.width, level.height), (513, 300))
+    block = self.pixels[20:22, 30:32].astype(int)
+    expected = (block.sum((0, 1)) + 2) // 4
+    self.assertEqual(level.readRegion((15, 10, 16, 11))[0, 0].tolist(),
+                     expected.tolist())
+    edge = self.pixels[0:2, 1024].astype(int)
+    expected = (2 * edge.sum(0) + 2) // 4
+    self.assertEqual(level.readRegion((512, 0, 513, 1))[0, 0].tolist(),
+                     expected.tolist())
+
+  def test_lazyTiles(self) -> None:
+    """Only the tiles requested are computed, and edits invalidate only
+    the tiles covering them."""
+    self.pyramid.getLevel(1, (0, 0, 10, 10))
+    valid = self.pyramid.__valid_tiles__[1]
+    self.assertEqual(valid.tolist(), [[True, False, False],
+                                      [False, False, False]])
+    self.pyramid.getLevel(1)
+    self.assertTrue(valid.all())
+    self.base.writeRegion((600, 500, 610, 510), (0, 0, 0, 255))
+    self.pyramid.invalidate((600, 500, 610, 510))
+    self.assertEqual(valid.tolist(), [[True, False, True],
+                                      [True, True, True]])
+    level = self.pyramid.getLevel(1, (300, 250, 305, 255))
+    self.assertEqual(level.readRegion((301, 251, 302, 252))[0, 0].tolist(),
+                     [0, 0, 0, 255])
+    self.pyramid.invalidateAll()
+    self.assertFalse(valid.any())
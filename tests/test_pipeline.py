@@ -0,0 +1,107 @@
+"""Tests of the image operations and of Pipeline."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+import pickle
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+
+from ezside.imaging import PixelBuffer, ImageOp, Resize, Fill, ColorBlend
+from ezside.imaging import StrokeReplay, Pipeline
+
+
+class TestImageOps(TestCase):
+  """Tests of the image operations."""
+
+  def test_incompleteOp(self) -> None:
+    """Operations not implementing 'apply' fail at creation."""
+
+    class Incomplete(ImageOp):
+      """Operation lacking 'apply'."""
+
+    with self.assertRaises(TypeError):
+      Incomplete()
+
+  def test_resize(self) -> None:
+    """Resize keeps the aspect ratio when given only the width or when
+    fitting."""
+    buffer = PixelBuffer(40, 20)
+    self.assertEqual(Resize(20).getSize(40, 20), (20, 10))
+    self.assertEqual(Resize(10, 10, fit=True).getSize(40, 20), (10, 5))
+    out = Resize(10, 4).apply(buffer)
+    self.assertEqual((out.width, out.height), (10, 4))
+
+  def test_fill(self) -> None:
+    """Fill writes the color inside the box only."""
+    buffer = Fill((1, 2, 3, 4), (1, 1, 3, 2)).apply(PixelBuffer(4, 3))
+    self.assertEqual(buffer.array[1, 1].tolist(), [1, 2, 3, 4])
+    self.assertEqual(buffer.array[0, 0].tolist(), [255, 255, 255, 255])
+    self.assertEqual(int((buffer.array == (1, 2, 3, 4)).all(2).sum()), 2)
+
+  def test_colorBlend(self) -> None:
+    """ColorBlend moves the color channels and keeps the alpha."""
+    buffer = PixelBuffer(3, 300, (0, 0, 0, 100))
+    ColorBlend((200, 100, 50), .5).apply(buffer)
+    self.assertTrue((buffer.array == (100, 50, 25, 100)).all())
+
+  def test_strokeReplay(self) -> None:
+    """StrokeReplay paints along the points given."""
+    buffer = PixelBuffer(32, 8, (0, 0, 0, 255))
+    StrokeReplay([(4, 4), (28, 4)], 2., (255, 0, 0, 255)).apply(buffer)
+    self.assertEqual(buffer.array[4, 4].tolist(), [255, 0, 0, 255])
+    self.assertEqual(buffer.array[4, 16].tolist(), [255, 0, 0, 255])
+    self.assertEqual(buffer.array[0, 16].tolist(), [0, 0, 0, 255])
+
+  def test_picklable(self) -> None:
+    """Operations survive pickling, as required by the process pool."""
+    op = pickle.loads(pickle.dumps(Fill((1, 2, 3, 4))))
+    self.assertEqual(op.color, (1, 2, 3, 4))
+
+
+class TestPipeline(TestCase):
+  """Tests of Pipeline."""
+
+  def setUp(self) -> None:
+    """Writes two images to a temporary directory."""
+    self.tempDir = TemporaryDirectory()
+    self.sources = []
+    for index in range(2):
+      fid = os.path.join(self.tempDir.name, 'src%d.png' % index)
+      PixelBuffer(16, 8, (index, 0, 0, 255)).save(fid)
+      self.sources.append(fid)
+
+  def tearDown(self) -> None:
+    self.tempDir.cleanup()
+
+  def test_rejectsOthers(self) -> None:
+    """Only image operations are accepted."""
+    with self.assertRaises(TypeError):
+      Pipeline(lambda buffer: buffer)
+    with self.assertRaises(TypeError):
+      Pipeline().then(lambda buffer: buffer)
+
+  def test_processOne(self) -> None:
+    """Each stage is timed and the result saved."""
+    pipeline = Pipeline(Resize(8), Fill((9, 9, 9, 255)))
+    dst = os.path.join(self.tempDir.name, 'out', 'dst.png')
+    timings = pipeline.processOne(self.sources[0], dst)
+    self.assertEqual(list(timings), pipeline.getStageNames())
+    out = PixelBuffer.open(dst)
+    self.assertEqual((out.width, out.height), (8, 4))
+    self.assertTrue((out.array == (9, 9, 9, 255)).all())
+
+  def test_run(self) -> None:
+    """Every job is processed on the process pool."""
+    pipeline = Pipeline(Resize(4), workers=1, maxPending=1)
+    jobs = [(src, src[:-4] + '-out.png') for src in self.sources]
+    results = pipeline.run(jobs)
+    self.assertEqual(len(results), 2)
+    for _, dst in jobs:
+      out = PixelBuffer.open(dst)
+      self.assertEqual((out.width, out.height), (4, 2))
+    summary = pipeline.summarize(results)
+    self.assertEqual(list(summary), pipeline.getStageNames())
@@ -0,0 +1,94 @@
+"""Tests of PixelBuffer."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+from importlib.util import find_spec
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipUnless
+
+import numpy as np
+
+from ezside.imaging import PixelBuffer
+
+
+class TestPixelBuffer(TestCase):
+  """Tests of PixelBuffer."""
+
+  def test_fill(self) -> None:
+    """Buffers are filled with opaque white unless given a color, and
+    must have a positive size."""
+    buffer = PixelBuffer(3, 2)
+    self.assertEqual(buffer.array.shape, (2, 3, 4))
+    self.assertTrue((buffer.array == 255).all())
+    self.assertTrue((PixelBuffer(3, 2, (1, 2, 3, 4)).array
+                     == (1, 2, 3, 4)).all())
+    with self.assertRaises(ValueError):
+      PixelBuffer(0, 2)
+
+  def test_fromArray(self) -> None:
+    """Arrays of 1, 3 or 4 channels and floating point arrays are
+    converted to RGBA, opaque unless given alpha."""
+    grey = PixelBuffer.fromArray(np.full((2, 3), 7, dtype=np.uint8))
+    self.assertEqual(grey.array[0, 0].tolist(), [7, 7, 7, 255])
+    rgb = PixelBuffer.fromArray(np.full((2, 3, 3), 9, dtype=np.uint8))
+    self.assertEqual(rgb.array[1, 2].tolist(), [9, 9, 9, 255])
+    rgba = PixelBuffer.fromArray(np.full((2, 3, 4), 5, dtype=np.uint8))
+    self.assertEqual(rgba.array[1, 2].tolist(), [5, 5, 5, 5])
+    floats = PixelBuffer.fromArray(np.full((2, 3, 3), .5))
+    self.assertEqual(floats.array[0, 0].tolist(), [128, 128, 128, 255])
+    with self.assertRaises(ValueError):
+      PixelBuffer.fromArray(np.zeros((2, 3, 2)))
+
+  def test_qImageSharesMemory(self) -> None:
+    """The QImage shows edits made to the array without copying."""
+    buffer = PixelBuffer(4, 3, (0, 0, 0, 255))
+    image = buffer.asQImage()
+    buffer.array[1, 2] = (10, 20, 30, 255)
+    self.assertEqual(image.pixelColor(2, 1).getRgb(), (10, 20, 30, 255))
+    self.assertIs(buffer.asQImage(), image)
+
+  def test_regions(self) -> None:
+    """Regions are views, boxes are clipped, and regions are read and
+    written as copies."""
+    buffer = PixelBuffer(8, 6, (0, 0, 0, 0))
+    buffer.region((1, 1, 3, 2))[...] = 1
+    self.assertEqual(int(buffer.array.any(2).sum()), 2)
+    self.assertEqual(buffer.splitBox((-2, 4, 20, 9)), [(0, 4, 8, 6)])
+    self.assertEqual(buffer.splitBox((8, 0, 9, 1)), [])
+    buffer.writeRegion((4, 4, 6, 6), (2, 2, 2, 2))
+    pixels = buffer.readRegion((3, 3, 6, 6))
+    self.assertEqual(pixels.shape, (3, 3, 4))
+    pixels[...] = 0
+    self.assertTrue((buffer.region((4, 4, 6, 6)) == 2).all())
+
+  def test_copy(self) -> None:
+    """Copies hold the same pixels and do not share memory."""
+    buffer = PixelBuffer.fromArray(
+        np.arange(300 * 2 * 3, dtype=np.uint8).reshape(300, 2, 3))
+    copy = buffer.copy()
+    self.assertTrue(np.array_equal(copy.array, buffer.array))
+    copy.array[...] = 0
+    self.assertTrue(buffer.array.any())
+
+  def test_saveOpen(self) -> None:
+    """Saved buffers open with the same pixels."""
+    buffer = PixelBuffer.fromArray(
+        np.arange(5 * 4 * 4, dtype=np.uint8).reshape(5, 4, 4) | 128)
+    with TemporaryDirectory() as tempDir:
+      fid = os.path.join(tempDir, 'buffer.png')
+      buffer.save(fid)
+      opened = PixelBuffer.open(fid)
+    self.assertTrue(np.array_equal(opened.array, buffer.array))
+    self.assertEqual(buffer.toImage().size, (4, 5))
+
+  @skipUnless(find_spec('torch'), 'torch is not installed')
+  def test_tensor(self) -> None:
+    """Tensors round trip through buffers."""
+    buffer = PixelBuffer(4, 3, (51, 102, 153, 255))
+    tensor = buffer.toTensor()
+    self.assertEqual(tuple(tensor.shape), (3, 3, 4))
+    self.assertAlmostEqual(float(tensor[1, 0, 0]), .4, places=5)
+    self.assertTrue(np.array_equal(PixelBuffer.fromTensor(tensor).array,
+                                   buffer.array))
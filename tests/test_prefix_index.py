@@ -0,0 +1,90 @@
+"""Tests of the sizes, offsets and search of PrefixIndex."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from unittest import TestCase
+
+import numpy as np
+
+from ezside.layouts import PrefixIndex
+
+
+class TestPrefixIndex(TestCase):
+  """Tests of the sizes, offsets and search of PrefixIndex."""
+
+  def setUp(self) -> None:
+    """Creates an index of 1000 entries estimated at 10 and sizes drawn
+    at random for every third entry."""
+    self.index = PrefixIndex(1000, 10.)
+    self.sizes = np.full(1000, 10.)
+    rng = np.random.default_rng(7)
+    for entry in range(0, 1000, 3):
+      size = float(rng.integers(1, 40))
+      self.index.setSize(entry, size)
+      self.sizes[entry] = size
+    self.starts = np.concatenate(([0.], np.cumsum(self.sizes)))
+
+  def test_uniform(self) -> None:
+    """An index without measured sizes follows from the estimate."""
+    index = PrefixIndex(100, 4.)
+    self.assertTrue(index.isUniform())
+    self.assertEqual(index.getStart(25), 100.)
+    self.assertEqual(index.getTotal(), 400.)
+    self.assertEqual(index.indexAt(399.), 99)
+    self.assertEqual(index.indexAt(1e6), 99)
+    self.assertEqual(index.indexAt(-5.), 0)
+    index.setSize(3, 4.)
+    self.assertTrue(index.isUniform())
+    index.setSize(3, 5.)
+    self.assertFalse(index.isUniform())
+    self.assertEqual(index.getTotal(), 401.)
+
+  def test_getStart(self) -> None:
+    """The start of every entry is the sum of the sizes before it."""
+    for entry in range(1001):
+      self.assertAlmostEqual(self.index.getStart(entry),
+                             self.starts[entry])
+    self.assertAlmostEqual(self.index.getTotal(), self.starts[-1])
+    self.assertEqual(self.index.getSize(3), self.sizes[3])
+    self.assertEqual(self.index.getSize(4), 10.)
+
+  def test_indexAt(self) -> None:
+    """The entry at an offset is the last entry starting at or before
+    it, also at the boundaries between entries."""
+    offsets = [*self.starts[:-1], *(self.starts[:-1] + .5)]
+    for offset in offsets:
+      expected = int(np.searchsorted(self.starts, offset, 'right')) - 1
+      self.assertEqual(self.index.indexAt(offset), expected)
+    self.assertEqual(self.index.indexAt(self.starts[-1] + 1.), 999)
+    self.assertEqual(PrefixIndex().indexAt(0.), -1)
+
+  def test_changeSize(self) -> None:
+    """Changing a measured size moves the starts of the entries after
+    it only."""
+    before = self.index.getStart(500)
+    self.index.setSize(600, self.index.getSize(600) + 25.)
+    self.assertAlmostEqual(self.index.getStart(500), before)
+    self.assertAlmostEqual(self.index.getStart(601),
+                           self.starts[601] + 25.)
+
+  def test_reset(self) -> None:
+    """Resetting forgets every measured size."""
+    self.index.reset(50, 2.)
+    self.assertEqual(len(self.index), 50)
+    self.assertTrue(self.index.isUniform())
+    self.assertEqual(self.index.getEstimate(), 2.)
+    self.assertEqual(self.index.getTotal(), 100.)
+
+  def test_invalid(self) -> None:
+    """Invalid counts, sizes and indices are rejected."""
+    with self.assertRaises(ValueError):
+      PrefixIndex(-1)
+    with self.assertRaises(ValueError):
+      PrefixIndex(10, 0.)
+    with self.assertRaises(ValueError):
+      self.index.setSize(0, -1.)
+    with self.assertRaises(IndexError):
+      self.index.getSize(1000)
+    with self.assertRaises(IndexError):
+      self.index.setSize(-1, 5.)
@@ -0,0 +1,126 @@
+"""Tests of scrolling and event routing in ScrollLayout."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+import sys
+from unittest import TestCase
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QPointF, QPoint, QSizeF, Qt
+from PySide6.QtGui import QImage, QPainter, QWheelEvent
+from PySide6.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+import ezside.app
+from ezside.basewidgets import BoxItem
+from ezside.layouts import ScrollLayout
+
+
+class Cell(BoxItem):
+  """Item of fixed size recording the events it receives."""
+
+  def __init__(self, name: tuple, events: list,
+               takesWheel: bool = False) -> None:
+    BoxItem.__init__(self)
+    self.name, self.events, self.takesWheel = name, events, takesWheel
+
+  def requiredSize(self) -> QSizeF:
+    return QSizeF(50, 20)
+
+  def enterEvent(self, event: object) -> None:
+    self.events.append(('enter', self.name))
+
+  def leaveEvent(self, event: object) -> None:
+    self.events.append(('leave', self.name))
+
+  def wheelEvent(self, event: QWheelEvent) -> None:
+    """Accepts the event only if 'takesWheel' is True."""
+    self.events.append(('wheel', self.name, event.position()))
+    if not self.takesWheel:
+      event.ignore()
+
+
+def _wheel(point: QPointF, dy: int) -> QWheelEvent:
+  """Returns a wheel event scrolling by the pixel distance given."""
+  return QWheelEvent(point, point, QPoint(0, dy), QPoint(0, dy),
+                     Qt.MouseButton.NoButton, Qt.KeyboardModifier.NoModifier,
+                     Qt.ScrollPhase.ScrollUpdate, False)
+
+
+class TestScrollLayout(TestCase):
+  """Tests of scrolling and event routing in ScrollLayout."""
+
+  def setUp(self) -> None:
+    """Creates a layout 200 by 100 holding 50 rows of 4 cells, the first
+    row taking wheel events."""
+    self.events = []
+    self.layout = ScrollLayout()
+    self.cells = {}
+    with self.layout.batchUpdate():
+      for row in range(50):
+        for col in range(4):
+          cell = Cell((row, col), self.events, takesWheel=not row)
+          self.cells[row, col] = cell
+          self.layout.addWidget(cell, row, col)
+    self.layout.resize(200, 100)
+    self.layout.show()
+    app.processEvents()
+
+  def tearDown(self) -> None:
+    self.layout.close()
+
+  def test_scrollClamped(self) -> None:
+    """The offset stays inside the content."""
+    maxOffset = self.layout.getMaximumOffset()
+    self.assertGreater(maxOffset.y(), 0.)
+    self.layout.scrollTo(-10, 1e6)
+    self.assertEqual(self.layout.scrollOffset, QPointF(0, maxOffset.y()))
+
+  def test_itemAtScrolled(self) -> None:
+    """Points are mapped through the scroll offset."""
+    self.layout.scrollTo(0, 200)
+    margins = self.layout.allMargins
+    point = QPointF(margins.left() + 1, margins.top() + 1)
+    self.assertIs(self.layout.itemAt(point).widgetItem, self.cells[10, 0])
+
+  def test_wheelForwardedFirst(self) -> None:
+    """An item accepting the wheel event keeps the view in place, while
+    the view scrolls under items ignoring it."""
+    margins = self.layout.allMargins
+    point = QPointF(margins.left() + 5, margins.top() + 5)
+    event = _wheel(point, -30)
+    self.layout.wheelEvent(event)
+    self.assertTrue(event.isAccepted())
+    self.assertEqual(self.layout.scrollOffset, QPointF(0, 0))
+    self.assertEqual(self.events[-1], ('wheel', (0, 0), QPointF(5, 5)))
+    self.layout.scrollTo(0, 40)
+    self.layout.wheelEvent(_wheel(point, -30))
+    wheels = [event for event in self.events if event[0] == 'wheel']
+    self.assertEqual(wheels[-1][:2], ('wheel', (2, 0)))
+    self.assertEqual(self.layout.scrollOffset, QPointF(0, 70))
+
+  def test_clampOnContentChange(self) -> None:
+    """Removing items clamps the offset once control returns to the
+    event loop, and painting does not move the view."""
+    self.layout.scrollTo(0, 1e6)
+    self.layout.cursorPosition = QPointF(20, 20)
+    with self.layout.batchUpdate():
+      for row in range(10, 50):
+        for col in range(4):
+          self.layout.removeWidget(self.cells[row, col])
+    offset = self.layout.scrollOffset
+    del self.events[:]
+    image = QImage(200, 100, QImage.Format.Format_ARGB32)
+    painter = QPainter(image)
+    self.layout.paintMeLike(self.layout.rect().toRectF(), painter)
+    painter.end()
+    self.assertEqual(self.layout.scrollOffset, offset)
+    self.assertEqual(self.events, [])
+    app.processEvents()
+    self.assertEqual(self.layout.scrollOffset.y(),
+                     self.layout.getMaximumOffset().y())
+    self.assertLess(self.layout.scrollOffset.y(), offset.y())
@@ -0,0 +1,136 @@
+"""Tests of recording and replaying brush strokes with StrokeLog."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+
+from ezside.imaging import PixelBuffer, BrushStroke, StrokeLog, UndoStack
+
+
+class TestStrokeLog(TestCase):
+  """Tests of recording and replaying brush strokes with StrokeLog."""
+
+  def setUp(self) -> None:
+    """Records two strokes on a log of a 64 by 32 image, the second on
+    layer 1 in multiply mode at half flow."""
+    self.log = StrokeLog(64, 32, opacity=.5)
+    self.log.beginStroke()
+    for x in range(8, 40, 4):
+      self.log.addPoint(x, 8, 3., (255, 0, 0, 255), t=x / 100)
+    self.log.commitStroke()
+    self.log.beginStroke(1, 'multiply', .5)
+    for y in range(4, 28, 4):
+      self.log.addPoint(48, y, 2., (0, 0, 255, 255), t=1 + y / 100)
+    self.log.commitStroke()
+
+  def test_counts(self) -> None:
+    """Every point and stroke is counted."""
+    self.assertEqual(len(self.log), 14)
+    self.assertEqual(self.log.getStrokeCount(), 2)
+    self.assertEqual(self.log.getStrokeInfo(2), (1, 'multiply', .5))
+
+  def test_replayMatchesPainting(self) -> None:
+    """Replaying onto a single buffer paints as a brush stroke does."""
+    replayed = self.log.replay(PixelBuffer(64, 32))
+    painted = PixelBuffer(64, 32)
+    for records in self.log.iterStrokes():
+      first = records[0]
+      _, mode, flow = self.log.getStrokeInfo(int(first['stroke']))
+      stroke = BrushStroke(painted.array, float(first['r']),
+                           tuple(first['rgba']), .5, flow=flow, mode=mode)
+      stroke.begin(float(records['x'][0]), float(records['y'][0]))
+      for x, y in zip(records['x'][1:], records['y'][1:]):
+        stroke.strokeTo(float(x), float(y))
+      stroke.end()
+    self.assertTrue(np.array_equal(replayed.array, painted.array))
+    self.assertFalse((replayed.array == 255).all())
+
+  def test_replayLayers(self) -> None:
+    """Each stroke is replayed onto the buffer of its layer."""
+    layers = [PixelBuffer(64, 32), PixelBuffer(64, 32)]
+    self.log.replay(layers)
+    self.assertFalse((layers[0].region((0, 0, 44, 16)) == 255).all())
+    self.assertTrue((layers[0].region((44, 0, 64, 32)) == 255).all())
+    self.assertTrue((layers[1].region((0, 0, 44, 32)) == 255).all())
+    self.assertFalse((layers[1].region((44, 0, 64, 32)) == 255).all())
+    with self.assertRaises(IndexError):
+      self.log.replay(layers[:1])
+
+  def test_scaledReplay(self) -> None:
+    """Replaying onto a buffer of another size scales the strokes."""
+    buffer = self.log.replay(PixelBuffer(128, 64))
+    self.assertFalse((buffer.array[16, 16:80] == 255).all())
+
+  def test_roundTrip(self) -> None:
+    """Logs written to a file are read back unchanged."""
+    with TemporaryDirectory() as tempDir:
+      fid = os.path.join(tempDir, 'strokes.bin')
+      self.log.save(fid)
+      loaded = StrokeLog.load(fid)
+    self.assertEqual(loaded.getImageSize(), (64, 32))
+    self.assertTrue(np.array_equal(loaded.getRecords(),
+                                   self.log.getRecords()))
+    self.assertEqual(loaded.getStrokeInfo(2), (1, 'multiply', .5))
+    with self.assertRaises(ValueError):
+      StrokeLog.fromBytes(b'NOTALOG!' + bytes(64))
+
+  def test_undoRedo(self) -> None:
+    """Strokes undone are left out of replays until redone."""
+    self.assertTrue(self.log.undoStroke())
+    self.assertEqual(self.log.getStrokeCount(), 1)
+    self.assertTrue(self.log.redoStroke())
+    self.assertEqual(self.log.getStrokeCount(), 2)
+    self.assertFalse(self.log.redoStroke())
+
+  def test_discardedStrokeKeepsRedo(self) -> None:
+    """A stroke discarded after an undo does not prevent the redo, as in
+    painting, undoing and then clicking without changing any pixel."""
+    self.log.undoStroke()
+    self.log.beginStroke()
+    self.log.addPoint(1, 1, 1., (0, 0, 0, 255))
+    self.log.discardStroke()
+    self.assertTrue(self.log.redoStroke())
+    self.assertEqual(self.log.getStrokeCount(), 2)
+    self.assertEqual(self.log.getStrokeInfo(2), (1, 'multiply', .5))
+
+  def test_committedStrokeClearsRedo(self) -> None:
+    """A stroke committed after an undo discards the stroke undone."""
+    self.log.undoStroke()
+    self.log.beginStroke()
+    self.log.addPoint(1, 1, 1., (0, 0, 0, 255))
+    self.log.commitStroke()
+    self.assertFalse(self.log.redoStroke())
+
+  def test_followsUndoStack(self) -> None:
+    """Driven as the editor does, the log stays in step with the undo
+    stack when a stroke changing no pixel follows an undo."""
+    buffer, undoStack = PixelBuffer(64, 32), UndoStack()
+    log = StrokeLog(64, 32)
+
+    def paint(x: float, y: float, rgba: tuple) -> None:
+      """Paints a single dab, recording it as the editor does."""
+      undoStack.beginStroke(buffer)
+      stroke = BrushStroke(buffer.array, 2., rgba,
+                           beforeWrite=undoStack.capture)
+      log.beginStroke()
+      log.addPoint(x, y, 2., rgba)
+      stroke.begin(x, y)
+      stroke.end()
+      if undoStack.endStroke():
+        log.commitStroke()
+      else:
+        log.discardStroke()
+
+    paint(10, 10, (0, 0, 0, 255))
+    undoStack.undo()
+    log.undoStroke()
+    paint(200, 200, (0, 0, 0, 255))
+    self.assertIsNotNone(undoStack.redo())
+    self.assertTrue(log.redoStroke())
+    replayed = log.replay(PixelBuffer(64, 32))
+    self.assertTrue(np.array_equal(replayed.array, buffer.array))
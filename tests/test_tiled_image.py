@@ -0,0 +1,163 @@
+"""Tests of the tile storage, opening and saving of TiledImage."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+from PIL import Image
+
+from ezside.imaging import TiledImage, BrushStroke
+
+
+class TestTiledImage(TestCase):
+  """Tests of the tile storage, opening and saving of TiledImage."""
+
+  def setUp(self) -> None:
+    """Creates an image of 600 by 300 pixels holding random colors, which
+    spans three columns and two rows of tiles."""
+    rng = np.random.default_rng(11)
+    self.pixels = rng.integers(0, 256, (300, 600, 4), dtype=np.uint8)
+    self.pixels[:, :, 3] = 255
+    self.image = TiledImage.fromArray(self.pixels)
+    self.tempDir = TemporaryDirectory()
+
+  def tearDown(self) -> None:
+    self.tempDir.cleanup()
+
+  def _fid(self, name: str) -> str:
+    """Returns the path of the file in the temporary directory."""
+    return os.path.join(self.tempDir.name, name)
+
+  def test_tiles(self) -> None:
+    """Boxes are split at tile borders and regions are views of single
+    tiles."""
+    image = self.image
+    self.assertEqual(image.getTileCount(), (2, 3))
+    self.assertEqual(image.splitBox((250, 250, 270, 900)),
+                     [(250, 250, 256, 256), (256, 250, 270, 256),
+                      (250, 256, 256, 300), (256, 256, 270, 300)])
+    self.assertEqual(image.splitBox((600, 0, 700, 10)), [])
+    image.region((256, 0, 260, 4))[...] = 7
+    self.assertTrue((image.readRegion((256, 0, 260, 4)) == 7).all())
+    with self.assertRaises(ValueError):
+      image.region((250, 0, 260, 4))
+    with self.assertRaises(TypeError):
+      _ = image.array
+
+  def test_readWrite(self) -> None:
+    """Regions spanning several tiles are read and written whole."""
+    image = self.image
+    self.assertTrue(np.array_equal(image.readRegion(image.getBox()),
+                                   self.pixels))
+    patch = np.full((100, 300, 4), 9, dtype=np.uint8)
+    image.writeRegion((200, 200, 500, 300), patch)
+    image.writeRegion((0, 0, 10, 10), (1, 2, 3, 4))
+    self.pixels[200:300, 200:500] = 9
+    self.pixels[:10, :10] = (1, 2, 3, 4)
+    self.assertTrue(np.array_equal(image.readRegion(image.getBox()),
+                                   self.pixels))
+    copy = image.copy()
+    self.assertIsInstance(copy, TiledImage)
+    self.assertTrue(np.array_equal(copy.readRegion(copy.getBox()),
+                                   self.pixels))
+
+  def test_tileImage(self) -> None:
+    """Tile images share memory with the tiles and are clipped to the
+    image."""
+    tileImage = self.image.tileImage((1, 2))
+    self.assertEqual((tileImage.width(), tileImage.height()), (88, 44))
+    self.image.writeRegion((512, 256, 513, 257), (10, 20, 30, 255))
+    self.assertEqual(tileImage.pixelColor(0, 0).getRgb(), (10, 20, 30, 255))
+    self.assertIs(self.image.tileImage((1, 2)), tileImage)
+
+  def test_brushStroke(self) -> None:
+    """Strokes painted into the tiles match strokes painted into an
+    array."""
+    array = self.pixels.copy()
+    boxes = []
+    for target in (self.image, array):
+      stroke = BrushStroke(target, 9., (255, 0, 0, 255), .5)
+      stroke.begin(240, 240)
+      boxes.append(stroke.strokeTo(270, 270))
+      stroke.end()
+    self.assertEqual(boxes[0], boxes[1])
+    self.assertTrue(np.array_equal(
+        self.image.readRegion(self.image.getBox()), array))
+
+  def test_openFormats(self) -> None:
+    """Files read band by band and files decoded by Pillow both load the
+    pixels Pillow reads."""
+    source = Image.fromarray(self.pixels[:, :, :3])
+    for name, layout in (('raw.bmp', True), ('raw.ppm', True),
+                         ('raw.tga', True), ('raw.tif', True),
+                         ('palette.bmp', True), ('lzw.tif', False),
+                         ('image.png', False)):
+      fid = self._fid(name)
+      if name.startswith('palette'):
+        source.quantize(16).save(fid)
+      elif name.startswith('lzw'):
+        source.save(fid, compression='tiff_lzw')
+      else:
+        source.save(fid)
+      with Image.open(fid) as image:
+        self.assertEqual(TiledImage._getRawLayout(image) is not None,
+                         layout, name)
+        expected = np.asarray(image.convert('RGBA'))
+      opened = TiledImage.open(fid)
+      self.assertTrue(np.array_equal(opened.readRegion(opened.getBox()),
+                                     expected), name)
+
+  def test_openProgress(self) -> None:
+    """Progress is reported after each band, and returning False stops
+    the loading."""
+    fid = self._fid('image.bmp')
+    self.image.save(fid)
+    reports = []
+
+    def progress(rows: int, total: int) -> bool:
+      """Records the progress reported."""
+      reports.append((rows, total))
+      return True
+
+    TiledImage.open(fid, progress)
+    self.assertEqual(reports, [(256, 300), (300, 300)])
+    self.assertIsNone(TiledImage.open(fid, lambda *_: False))
+
+  def test_save(self) -> None:
+    """Saved files hold the pixels of the image, and JPEG files are saved
+    without the alpha channel."""
+    self.pixels[:50, :50, 3] = 100
+    self.image.writeRegion((0, 0, 50, 50), self.pixels[:50, :50])
+    for name in ('image.png', 'image.tif'):
+      fid = self._fid(name)
+      self.image.save(fid)
+      with Image.open(fid) as image:
+        saved = np.asarray(image.convert('RGBA'))
+      self.assertTrue(np.array_equal(saved, self.pixels), name)
+    fid = self._fid('image.jpg')
+    self.image.save(fid)
+    with Image.open(fid) as image:
+      self.assertEqual((image.mode, image.size), ('RGB', (600, 300)))
+
+  def test_preview(self) -> None:
+    """Previews of files holding uncompressed pixels are sampled without
+    decoding the image, and JPEG previews are decoded at reduced scale."""
+    fid = self._fid('image.bmp')
+    self.image.save(fid)
+    with Image.open(fid) as image, open(fid, 'rb') as file:
+      layout = TiledImage._getRawLayout(image)
+      preview = TiledImage._decodePreview(fid, file, image, layout, 150)
+      self.assertTrue(image.tile)
+    self.assertTrue(np.array_equal(preview.array, self.pixels[::4, ::4]))
+    fid = self._fid('image.jpg')
+    self.image.save(fid)
+    with Image.open(fid) as image, open(fid, 'rb') as file:
+      preview = TiledImage._decodePreview(fid, file, image, None, 150)
+    self.assertEqual((preview.width, preview.height), (150, 75))
+    received = []
+    TiledImage.open(fid, preview=received.append, previewSize=150)
+    self.assertEqual(received[0].width, 150)
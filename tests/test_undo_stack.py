@@ -0,0 +1,81 @@
+"""Tests of UndoStack."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+from unittest import TestCase
+
+import numpy as np
+
+from ezside.imaging import TiledImage, BrushStroke, UndoStack
+
+
+def _pixels(image: TiledImage) -> np.ndarray:
+  """Returns a copy of every pixel of the image."""
+  return image.readRegion(image.getBox())
+
+
+class TestUndoStack(TestCase):
+  """Tests of UndoStack."""
+
+  def setUp(self) -> None:
+    """Creates an undo stack for an image of 600 by 400 pixels holding
+    random colors."""
+    rng = np.random.default_rng(13)
+    pixels = rng.integers(0, 256, (400, 600, 4), dtype=np.uint8)
+    self.image = TiledImage.fromArray(pixels)
+    self.undoStack = UndoStack()
+
+  def _paint(self, x: float, y: float, color: tuple) -> bool:
+    """Paints a short stroke and returns True if it was stored."""
+    self.undoStack.beginStroke(self.image)
+    stroke = BrushStroke(self.image, 6., color,
+                         beforeWrite=self.undoStack.capture)
+    stroke.begin(x, y)
+    stroke.strokeTo(x + 40, y)
+    stroke.end()
+    return self.undoStack.endStroke()
+
+  def test_undoRedo(self) -> None:
+    """Undo restores the pixels from before each stroke, across tile
+    borders, and redo reapplies them."""
+    states = [_pixels(self.image)]
+    for x, y in ((240, 250), (100, 100)):
+      self.assertTrue(self._paint(x, y, (0, 0, 0, 255)))
+      states.append(_pixels(self.image))
+    for state in states[1::-1]:
+      box = self.undoStack.undo()
+      self.assertIsNotNone(box)
+      self.assertTrue(np.array_equal(_pixels(self.image), state))
+    self.assertIsNone(self.undoStack.undo())
+    self.assertIsNotNone(self.undoStack.redo())
+    self.assertTrue(np.array_equal(_pixels(self.image), states[1]))
+    self.assertTrue(self._paint(400, 300, (255, 255, 255, 255)))
+    self.assertFalse(self.undoStack.canRedo())
+
+  def test_compact(self) -> None:
+    """Only the small tiles touched are stored, and strokes changing no
+    pixel are not stored at all."""
+    self._paint(100, 100, (0, 0, 0, 255))
+    self.assertLess(self.undoStack.getMemoryUsage(), 2 * 2 * 64 * 64 * 4)
+    self.undoStack.beginStroke(self.image)
+    self.undoStack.capture((0, 0, 10, 10))
+    self.assertFalse(self.undoStack.endStroke())
+    self.assertFalse(self._paint(-100, -100, (0, 0, 0, 255)))
+    self.assertEqual(len(self.undoStack.__undo_entries__), 1)
+
+  def test_budget(self) -> None:
+    """Exceeding the budget discards the oldest strokes first, keeping
+    the newest."""
+    for y in range(20, 400, 40):
+      self._paint(20, y, (0, 0, 0, 255))
+    entries = [*self.undoStack.__undo_entries__]
+    budget = entries[-1].getNumBytes() + entries[-2].getNumBytes()
+    self.undoStack.setMemoryBudget(budget)
+    self.assertEqual(self.undoStack.__undo_entries__, entries[-2:])
+    self.undoStack.setMemoryBudget(0)
+    self.assertEqual(self.undoStack.__undo_entries__, entries[-1:])
+    with self.assertRaises(ValueError):
+      self.undoStack.setMemoryBudget(-1)
+    self.undoStack.clear()
+    self.assertFalse(self.undoStack.canUndo())
@@ -0,0 +1,141 @@
+"""Tests of the window of cells, recycling and scrolling in
+VirtualGridLayout."""
+#  AGPL-3.0 license
+#  Copyright (c) 2024 Asger Jon Vistisen
+from __future__ import annotations
+
+import os
+import sys
+from unittest import TestCase
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QPointF, QSizeF
+from PySide6.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+import ezside.app
+from ezside.basewidgets import BoxItem
+from ezside.layouts import VirtualGridLayout
+
+
+class Cell(BoxItem):
+  """Item of fixed size holding the value bound to it."""
+
+  def __init__(self) -> None:
+    BoxItem.__init__(self)
+    self.value = None
+
+  def requiredSize(self) -> QSizeF:
+    return QSizeF(20, 10)
+
+
+class CountingGrid(VirtualGridLayout):
+  """Grid counting the cells it creates."""
+
+  def __init__(self, *args) -> None:
+    self.created = 0
+    VirtualGridLayout.__init__(self, *args)
+
+  def createCell(self) -> Cell:
+    self.created += 1
+    return Cell()
+
+  def bindCell(self, cell: Cell, row: int, col: int,
+               value: object) -> None:
+    cell.value = value
+
+
+class TestVirtualGridLayout(TestCase):
+  """Tests of the window of cells, recycling and scrolling in
+  VirtualGridLayout."""
+
+  def setUp(self) -> None:
+    """Creates a grid 200 by 100 of a million rows and 50 columns, with
+    rows estimated at 32 and columns at 96."""
+    self.grid = CountingGrid(lambda: 1000000, lambda: 50,
+                             lambda row, col: (row, col))
+    self.grid.overscan = 2
+    self.grid.resize(200, 100)
+    self.grid.show()
+    app.processEvents()
+
+  def tearDown(self) -> None:
+    self.grid.close()
+
+  def _assertWindow(self) -> None:
+    """Asserts that exactly the cells inside the window are bound, each
+    to its own value."""
+    row0, row1, col0, col1 = self.grid._getWindow()
+    cells = self.grid.getCells()
+    self.assertEqual(len(cells), (row1 - row0) * (col1 - col0))
+    for (row, col), cell in cells.items():
+      self.assertTrue(row0 <= row < row1 and col0 <= col < col1)
+      self.assertEqual(cell.value, (row, col))
+
+  def test_onlyWindowBound(self) -> None:
+    """Cells are bound only to the rows and columns in the view and the
+    overscan around it."""
+    self.assertEqual(self.grid.rowCount, 1000000)
+    self.assertEqual(self.grid.colCount, 50)
+    self._assertWindow()
+    self.assertLess(len(self.grid.getCells()), 100)
+    self.assertIsNone(self.grid.getCell(500, 0))
+
+  def test_cellsRecycled(self) -> None:
+    """Scrolling rebinds the cells leaving the window to those entering
+    it instead of creating new cells."""
+    created = self.grid.created
+    for y in (5000., 123456., 3e6, 0.):
+      self.grid.scrollTo(100., y)
+      self._assertWindow()
+    self.assertEqual(self.grid.created, created)
+
+  def test_rowsMeasured(self) -> None:
+    """Rows shown take the height of their cells, while rows not yet
+    shown keep the estimate and columns only grow."""
+    self.assertEqual(self.grid.getCellRect(0, 0).height(), 10.)
+    self.assertEqual(self.grid.getCellRect(5000, 0).height(), 32.)
+    self.assertEqual(self.grid.getCellRect(0, 0).width(), 96.)
+    self.assertLess(self.grid.contentSize.height(), 32. * 1000000)
+
+  def test_scrollClamped(self) -> None:
+    """The offset stays inside the content."""
+    self.grid.scrollTo(-10., 1e12)
+    size, view = self.grid.contentSize, self.grid.getViewRect()
+    self.assertEqual(self.grid.scrollOffset,
+                     QPointF(0., size.height() - view.height()))
+    self.grid.scrollBy(1e6, 0.)
+    self.assertEqual(self.grid.scrollOffset.x(),
+                     size.width() - view.width())
+
+  def test_cellAt(self) -> None:
+    """Points are mapped through the scroll offset and points outside
+    the view find no cell."""
+    self.assertEqual(self.grid.cellAt(QPointF(5, 5)), (0, 0))
+    self.grid.scrollTo(100., 25.)
+    self.assertEqual(self.grid.cellAt(QPointF(5, 5)), (3, 1))
+    self.assertIsNone(self.grid.cellAt(QPointF(-5, 5)))
+    self.assertIsNone(self.grid.cellAt(QPointF(5, 500)))
+
+  def test_scrollToCell(self) -> None:
+    """Scrolling to a cell brings it fully into view."""
+    self.grid.scrollToCell(200, 10)
+    rect, view = self.grid.getCellRect(200, 10), self.grid.getViewRect()
+    self.assertTrue(view.contains(rect))
+    self.assertEqual(self.grid.cellAt(rect.center()), (200, 10))
+
+  def test_reloadData(self) -> None:
+    """Reloading queries the data source again and rejects callbacks
+    that are not callable."""
+    rows = [3]
+    self.grid.setDataSource(lambda: rows[0], lambda: 2,
+                            lambda row, col: row * col)
+    self.assertEqual(len(self.grid.getCells()), 6)
+    rows[0] = 0
+    self.grid.reloadData()
+    self.assertEqual(self.grid.getCells(), {})
+    self.assertIsNone(self.grid.cellAt(QPointF(5, 5)))
+    with self.assertRaises(TypeError):
+      self.grid.setDataSource(lambda: 1, 2, lambda row, col: None)